@@ -38,7 +38,7 @@ INSTALLED_APPS = [
     'django.contrib.messages',
     'django.contrib.staticfiles',
     'rest_framework',
-    'season',
+    'season.apps.SeasonConfig',
 ]
 
 REST_FRAMEWORK = {
@@ -50,11 +50,13 @@ REST_FRAMEWORK = {
 }
 
 MIDDLEWARE = [
+    'season.middleware.ServerTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'season.middleware.ProfilingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -86,13 +88,36 @@ WSGI_APPLICATION = 'djangoProject_test.wsgi.application'
 
 DATABASES = {
     'default': {
-        'ENGINE': os.environ.get('db_engine', 'django.db.backends.postgresql_psycopg2'),
+        # connection pool of the worker process is opt in: db_engine=season.db_pool.postgresql, see season.db_pool
+        # (season.db_pool.sqlite3 is the local stand-in). POOL settings are ignored by plain django backends
+        'ENGINE': os.environ.get('db_engine', 'django.db.backends.postgresql'),
         'NAME': os.environ.get('db_name','ipl_season_db'),
         'USER': os.environ.get('db_user','postgres'),
         'PASSWORD': os.environ.get('db_password','postgres'),
+        'POOL': {
+            'MIN_SIZE': int(os.environ.get('db_pool_min_size', 0)),
+            'MAX_SIZE': int(os.environ.get('db_pool_max_size', 10)),
+            # seconds idle connection is kept open above MIN_SIZE
+            'IDLE_TIMEOUT': float(os.environ.get('db_pool_idle_timeout', 300)),
+            # seconds request waits for a free connection before failing
+            'TIMEOUT': float(os.environ.get('db_pool_timeout', 30)),
+            # SELECT 1 before reusing connection
+            'PRE_PING': os.environ.get('db_pool_pre_ping', 'true').lower() == 'true',
+        },
+        'TEST': {
+            # postgres database cloned as test database, e.g. migrated + load_dataset once, test runs skip the load
+            'TEMPLATE': os.environ.get('db_test_template'),
+        },
     }
 }
 
+# django cache alias used to share season registry (valid season years) and data set version between worker
+# processes. season registry is kept per process and data set version is read from db when not set
+SEASON_REGISTRY_CACHE = os.environ.get('season_registry_cache')
+
+# seconds shared caches (CDN / reverse proxy) and clients may reuse stats responses without revalidation
+STATS_CACHE_MAX_AGE = int(os.environ.get('stats_cache_max_age', 300))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/3.1/ref/settings/#auth-password-validators
@@ -131,3 +156,60 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/3.1/howto/static-files/
 
 STATIC_URL = '/static/'
+
+# stats results cache, see season.result_cache
+# django cache alias shared by worker processes (e.g. redis), results are kept only in process when not set
+STATS_RESULT_CACHE = os.environ.get('stats_result_cache')
+# seconds results are kept at shared cache, None keeps them until evicted by the cache backend
+STATS_RESULT_CACHE_TIMEOUT = int(os.environ['stats_result_cache_timeout']) \
+    if os.environ.get('stats_result_cache_timeout') else None
+# max results of in process LRU tier, 0 disables it
+STATS_RESULT_CACHE_SIZE = int(os.environ.get('stats_result_cache_size', 1024))
+
+# stats backend: 'orm' (db queries / precomputed snapshots) or 'numpy' (season data loaded in memory once per
+# worker process and reloaded when data set version changes, see season.columnar)
+STATS_BACKEND = os.environ.get('stats_backend', 'orm')
+
+# request path prefixes instrumented by season.middleware.ServerTimingMiddleware: Server-Timing header of sql query
+# count, db time, view and rendering time
+SERVER_TIMING_PATHS = ('/api/season/',)
+# milliseconds above which instrumented requests are logged with their slowest sql queries (season.performance)
+SLOW_REQUEST_MS = float(os.environ.get('slow_request_ms', 500))
+
+# shared directory of season.metrics multiprocess mode, every worker process writes its metrics there and scrape
+# end point of any worker reports all of them. metrics are per process when not set
+METRICS_DIR = os.environ.get('metrics_dir')
+# max seconds between writes of worker process metrics to METRICS_DIR
+METRICS_FLUSH_INTERVAL = float(os.environ.get('metrics_flush_interval', 5))
+# bearer token of monitoring system (Prometheus authorization credentials) for metrics, stats-cache and db-pool end
+# points, staff users only when not set
+METRICS_TOKEN = os.environ.get('metrics_token')
+
+# staff users may profile requests by ?profile= query param or X-Profile header, see season.middleware
+PROFILING_ENABLED = os.environ.get('profiling_enabled', 'false').lower() == 'true'
+# directory of stored profiles, season_profiles at temp directory when not set
+PROFILE_DIR = os.environ.get('profile_dir')
+# functions by cumulative time in profile summary
+PROFILE_TOP = int(os.environ.get('profile_top', 30))
+
+# test databases are loaded from this data set snapshot (python manage.py dump_dataset) when set, test run fails
+# when it is missing
+TEST_RUNNER = 'season.test_runner.DatasetTestRunner'
+TEST_DATASET = os.environ.get('test_dataset')
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'season.performance': {
+            'handlers': ['console'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+    },
+}
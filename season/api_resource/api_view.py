@@ -1,44 +1,140 @@
+import hashlib
+from functools import wraps
+
+from django.conf import settings
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
 from rest_framework import viewsets
 from rest_framework.decorators import action
 from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
-from season.models import SeasonMatch, Season
+from season.api_resource.permissions import IsOperator
+from season.columnar import columnar_stats
+from season.db_pool import pool_stats
+from season.instrumentation import timing
+from season.models import LEADERBOARD_TOP, SeasonMatch, SeasonStatsSnapshot, STATS_ACTIONS
+from season.registry import dataset_version, season_registry
+from season.result_cache import stats_result_cache
 
+# action returning every stats action of the season in one response
+SUMMARY_ACTION = 'summary'
+# max number of seasons in one years query param
+MAX_SEASON_YEARS = 100
+# max top N counts of leaderboard actions (top query param)
+MAX_TOP = 100
+# STATS_BACKEND setting of in memory numpy stats, see season.columnar
+NUMPY_BACKEND = 'numpy'
 
-def validate_season_year(func):
+
+def registry_years(version=None):
     """
-    common validation for the season of the year
-    handle from db season records (currently not implemented as we have static data set for input)
+    available season years of season registry
+    :param version: data set version already read by the request, read from db if not given
+    :return:
+    """
+    return season_registry.years if version is None else season_registry.years_of(version)
 
-    future improvement needed:
-        redis like cache to keep long life value until data set is not updated again. Always keep
-        start season year and end season of the records. If any record season record is missing, result will go as empty
 
-    cache required to handle validation. avoid multiple db hits to validation season year
+def validate_season_year(func):
+    """
+    common validation for the season of the year
+    handle from season registry (cached season records), no db hit once registry is loaded.
+    registry is reloaded when data set version changes (new seasons imported, season records changed)
     :param func:
     :return:
     """
-    def func_validator(method=None, action_name=None, year=None):
+    def func_validator(method=None, action_name=None, year=None, **kwargs):
         """
         validate year must be numeric
         validate year in between of season records. avoid db hits
         :param method
         :param action_name:
         :param year:
+        :param kwargs: version of data set read by the request, read from db if not given
+        :return:
+        """
+        with timing('validate'):
+            # accept only numbers
+            if not year.isnumeric():
+                raise ValidationError(f'Season {year} must be a numeric type')
+            available = registry_years(kwargs.get('version'))
+            if int(year) not in available:
+                raise ValidationError(f'Season {year} not available at our db, '
+                                      f'seasons from {min(available, default=None)} to {max(available, default=None)}')
+        res = func(method, action_name, year, **kwargs)
+        return res
+    return func_validator
+
+
+def parse_season_years(years):
+    """
+    season years of range and list query param, e.g. 2009-2017 or 2009,2011 or 2009-2011,2015
+    :param years:
+    :return: sorted list of years
+    """
+    res = set()
+    for part in years.split(','):
+        start, _, end = part.strip().partition('-')
+        if not start.isnumeric() or not (end or start).isnumeric():
+            raise ValidationError(f'Season years {years} must be a numeric range or list, e.g. 2009-2017')
+        start, end = int(start), int(end or start)
+        if start > end or end - start >= MAX_SEASON_YEARS:
+            raise ValidationError(f'Season years range {part} must be ascending and up to {MAX_SEASON_YEARS} seasons')
+        res.update(range(start, end + 1))
+    if len(res) > MAX_SEASON_YEARS:
+        raise ValidationError(f'Season years {years} must be up to {MAX_SEASON_YEARS} seasons')
+    return sorted(res)
+
+
+def validate_season_years(func):
+    """
+    common validation of several season years (years query param)
+    handle from season registry as validate_season_year
+    :param func:
+    :return:
+    """
+    def func_validator(method=None, action_name=None, years=None, **kwargs):
+        """
+        validate years must be a numeric range or list
+        validate every year in between of season records. avoid db hits
+        :param method
+        :param action_name:
+        :param years:
+        :param kwargs: version of data set read by the request, read from db if not given
         :return:
         """
-        # accept only numbers
-        if not year.isnumeric():
-            raise ValidationError(f'Season {year} must be a numeric type')
-        # future improvement need to keep season year in cache memory to avoid db hits
-        # currently having static data set so applied static validation.
-        if not Season.objects.filter(year=int(year)).exists():
-            raise ValidationError(f'Season {year} not available at our db')
-        res = func(method, action_name, year)
+        with timing('validate'):
+            if not years:
+                raise ValidationError('Season years are required, e.g. ?years=2009-2017')
+            years = parse_season_years(years)
+            available = registry_years(kwargs.get('version'))
+            missing = [year for year in years if year not in available]
+            if missing:
+                raise ValidationError(f'Seasons {missing} not available at our db, '
+                                      f'seasons from {min(available, default=None)} to {max(available, default=None)}')
+        res = func(method, action_name, years, **kwargs)
         return res
     return func_validator
 
 
+def parse_top(top, action_name):
+    """
+    top N counts of leaderboard action (top query param), records tied on these counts are included
+    :param top:
+    :param action_name:
+    :return: None if not given, default top of the action is used
+    """
+    if top is None:
+        return None
+    if action_name not in LEADERBOARD_TOP:
+        raise ValidationError(f'Action {action_name} does not support top, leaderboard actions are '
+                              f'{", ".join(LEADERBOARD_TOP)}')
+    if not top.isnumeric() or not 1 <= int(top) <= MAX_TOP:
+        raise ValidationError(f'Top {top} must be a number from 1 to {MAX_TOP}')
+    return int(top)
+
+
 class SeasonMatchAPIResource:
     """
     Resource class act as API response and exception handler
@@ -47,36 +143,121 @@ class SeasonMatchAPIResource:
     model = SeasonMatch
 
     @validate_season_year
-    def take_action(self, action_name, year):
+    def take_action(self, action_name, year, version=None, top=None):
         """
         business action logic registry
+        results are cached per data set version, see season.result_cache
         :param action_name:
         :param year:
+        :param version: data set version, read from db if not given
+        :param top: top N counts of leaderboard action
         :return:
         """
         year = int(year)
-        if action_name == 'max_number_player_award':
-            return Response(self.model.max_number_player_award(year))
-        if action_name == 'highest_run_margin':
-            return Response(self.model.highest_run_margin(year))
-        if action_name == 'most_hosted_match_location':
-            return Response(self.model.most_hosted_match_location(year))
-        if action_name == 'team_bat_first':
-            return Response(self.model.team_bat_first(year))
-        if action_name == 'most_win_location':
-            return Response(self.model.most_win_location(year))
-        if action_name == 'get_top_1_teams':
-            return Response(self.model.get_top_1_teams(year))
-        if action_name == 'most_toss':
-            return Response(self.model.most_toss(year))
-        if action_name == 'get_top_4_teams':
-            return Response(self.model.get_top_4_teams(year))
-        if action_name == 'team_highest_wicket':
-            return Response(self.model.team_highest_wicket(year))
-        if action_name == 'team_won_by_highest_wickets':
-            return Response(self.model.team_won_by_highest_wickets(year))
-        if action_name == 'team_won_toss_matches':
-            return Response(self.model.team_won_toss_matches(year))
+        if action_name != SUMMARY_ACTION and action_name not in STATS_ACTIONS:
+            raise ValidationError(f'Action {action_name} not available')
+        top = parse_top(top, action_name)
+        if version is None:
+            version = dataset_version()['version']
+        return Response(stats_result_cache.get_or_compute(
+            action_name, year, version, lambda: self.season_result(action_name, year, version, top), top=top))
+
+    def season_result(self, action_name, year, version, top=None):
+        """
+        result of stats action of the season
+        :param action_name:
+        :param year:
+        :param version: data set version
+        :param top: top N counts of leaderboard action, default top if not given
+        :return:
+        """
+        if settings.STATS_BACKEND == NUMPY_BACKEND:
+            stats = columnar_stats(version)
+            if action_name == SUMMARY_ACTION:
+                return stats.season_summary(year)
+            return stats.action(action_name, year, top)
+        if top is not None:
+            # snapshot keeps default top only
+            return getattr(self.model, action_name)(year, top)
+        if action_name == SUMMARY_ACTION:
+            return self.snapshot_summary(year) or self.model.season_summary(year)
+        # season stats are precomputed at import, one primary key read
+        stats = SeasonStatsSnapshot.objects.filter(pk=year).values_list('stats', flat=True).first()
+        if stats and action_name in stats:
+            return stats[action_name]
+        # snapshot missing, compute live
+        return getattr(self.model, action_name)(year)
+
+    @staticmethod
+    def snapshot_summary(year):
+        """
+        every stats action of the season precomputed at import, one primary key read
+        :param year:
+        :return: None if snapshot missing or incomplete
+        """
+        stats = SeasonStatsSnapshot.objects.filter(pk=year).values_list('stats', flat=True).first()
+        if stats and set(STATS_ACTIONS) <= set(stats):
+            return {action: stats[action] for action in STATS_ACTIONS}
+        return None
+
+    @validate_season_year
+    def season_year(self, action_name, year, version=None):
+        """
+        validated season year
+        :param action_name:
+        :param year:
+        :param version: data set version, read from db if not given
+        :return:
+        """
+        return int(year)
+
+    @validate_season_years
+    def take_seasons_action(self, action_name, years, version=None, top=None):
+        """
+        business action of several seasons in one go
+        :param action_name:
+        :param years:
+        :param version: data set version, read from db if not given
+        :param top: top N counts of leaderboard action
+        :return: year -> result
+        """
+        if action_name not in STATS_ACTIONS:
+            raise ValidationError(f'Action {action_name} not available')
+        top = parse_top(top, action_name)
+        if version is None:
+            version = dataset_version()['version']
+        return Response(stats_result_cache.get_or_compute(
+            action_name, years, version, lambda: self.seasons_result(action_name, years, version, top), top=top))
+
+    def seasons_result(self, action_name, years, version, top=None):
+        """
+        result of stats action of several seasons
+        :param action_name:
+        :param years:
+        :param version: data set version
+        :param top: top N counts of leaderboard action, default top if not given
+        :return: year -> result
+        """
+        if settings.STATS_BACKEND == NUMPY_BACKEND:
+            return columnar_stats(version).seasons_stats(action_name, years, top)
+        if top is not None:
+            return self.model.seasons_stats(action_name, years, top)
+        # all seasons precomputed at import, one primary key lookup
+        snapshots = dict(SeasonStatsSnapshot.objects.filter(pk__in=years).values_list('year', 'stats'))
+        if all(action_name in snapshots.get(year, {}) for year in years):
+            return {year: snapshots[year][action_name] for year in years}
+        # snapshot missing, compute live grouped by season
+        return self.model.seasons_stats(action_name, years)
+
+    def perform_seasons_action(self, request, action_name):
+        """
+        :param request:
+        :param action_name:
+        :return:
+        """
+        return self.take_seasons_action(action_name, request.query_params.get('years'),
+                                        version=request_dataset_version(request)['version'],
+                                        top=request.query_params.get('top'))
 
     def perform_action(self, request, action_name, year):
         """
@@ -85,15 +266,99 @@ class SeasonMatchAPIResource:
         :param year:
         :return:
         """
-        return self.take_action(action_name, year)
+        return self.take_action(action_name, year, version=request_dataset_version(request)['version'],
+                                top=request.query_params.get('top'))
 
 
-class StatsViewSet(viewsets.ViewSet):
+def request_dataset_version(request):
+    """
+    data set version read once per request, shared by ETag and Last-Modified
+    :param request:
+    :return:
+    """
+    if not hasattr(request, 'dataset_version'):
+        request.dataset_version = dataset_version()
+    return request.dataset_version
+
+
+def stats_etag(request, *args, **kwargs):
+    """
+    strong ETag of stats response, same data set version + url + accepted format gives same response
+    :param request:
+    :param args:
+    :param kwargs:
+    :return:
+    """
+    version = request_dataset_version(request)['version']
+    key = f"{version}:{request.get_full_path()}:{request.META.get('HTTP_ACCEPT', '')}"
+    return hashlib.md5(key.encode()).hexdigest()
+
+
+def stats_last_modified(request, *args, **kwargs):
+    """
+    stats responses change only when data set is imported
+    :param request:
+    :param args:
+    :param kwargs:
+    :return:
+    """
+    return request_dataset_version(request)['updated_at']
+
+
+def stats_condition(func):
+    """
+    conditional GET of stats view, ETag / Last-Modified are kept on successful responses only. error responses
+    (e.g. 400 of unknown season) must not be revalidated by clients or cached by upstream proxies
+    :param func:
+    :return:
+    """
+    conditional = condition(etag_func=stats_etag, last_modified_func=stats_last_modified)(func)
+
+    @wraps(func)
+    def inner(request, *args, **kwargs):
+        response = conditional(request, *args, **kwargs)
+        if response.status_code not in (200, 304):
+            for header in ('ETag', 'Last-Modified'):
+                if response.has_header(header):
+                    del response[header]
+        return response
+    return inner
+
+
+def patch_stats_cache(response):
+    """
+    let clients and upstream CDN / reverse proxy reuse successful responses
+    :param response:
+    :return:
     """
+    if response.status_code == 200:
+        patch_cache_control(response, public=True, max_age=settings.STATS_CACHE_MAX_AGE)
+        patch_vary_headers(response, ['Accept'])
+    return response
+
 
+class StatsViewSet(viewsets.ViewSet):
+    """
+    conditional GET: If-None-Match / If-Modified-Since are answered with 304 before any stats is computed
     """
     resource = SeasonMatchAPIResource()
 
+    @method_decorator(stats_condition)
+    def dispatch(self, request, *args, **kwargs):
+        return super().dispatch(request, *args, **kwargs)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        """
+        let clients and upstream CDN / reverse proxy reuse successful responses
+        :param request:
+        :param response:
+        :param args:
+        :param kwargs:
+        :return:
+        """
+        response = super().finalize_response(request, response, *args, **kwargs)
+        return patch_stats_cache(response)
+
     @action(detail=True,  methods=['get'])
     def get_top_4_teams(self, request, pk):
         """
@@ -214,3 +479,56 @@ class StatsViewSet(viewsets.ViewSet):
         :return:
         """
         return self.resource.perform_action(request=request, action_name='team_won_toss_matches', year=pk)
+
+    @action(detail=True, methods=['get'])
+    def summary(self, request, pk):
+        """
+        every stats of the season in one response, action name -> result
+        end point: api/season/stats/{year}/summary/
+        :param request:
+        :param pk:
+        :return:
+        """
+        return self.resource.perform_action(request=request, action_name=SUMMARY_ACTION, year=pk)
+
+    # known actions only, stats/{year}/ must not be routed here
+    @action(detail=False, methods=['get'], url_path=f'(?P<action_name>{"|".join(STATS_ACTIONS)})', url_name='seasons')
+    def seasons(self, request, action_name):
+        """
+        stats action of several seasons in one response, season year -> result
+        end point: api/season/stats/{action}/?years=2009-2017 (or ?years=2009,2011)
+        :param request:
+        :param action_name:
+        :return:
+        """
+        return self.resource.perform_seasons_action(request=request, action_name=action_name)
+
+
+class StatsCacheViewSet(viewsets.ViewSet):
+    """
+    stats results cache counters of the worker process serving the request
+    """
+    permission_classes = [IsOperator]
+
+    def list(self, request):
+        """
+        end point: api/season/stats-cache/
+        :param request:
+        :return:
+        """
+        return Response(stats_result_cache.stats())
+
+
+class DbPoolViewSet(viewsets.ViewSet):
+    """
+    db connection pools of the worker process serving the request
+    """
+    permission_classes = [IsOperator]
+
+    def list(self, request):
+        """
+        end point: api/season/db-pool/
+        :param request:
+        :return:
+        """
+        return Response(pool_stats())
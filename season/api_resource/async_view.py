@@ -0,0 +1,182 @@
+import asyncio
+import calendar
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+from django.http import Http404, HttpResponse, HttpResponseNotAllowed
+from django.utils.cache import get_conditional_response, quote_etag
+from django.utils.http import http_date
+from rest_framework.exceptions import ValidationError
+from rest_framework.renderers import JSONRenderer
+from season.api_resource.api_view import (NUMPY_BACKEND, parse_top, patch_stats_cache, request_dataset_version,
+                                          SeasonMatchAPIResource, stats_etag, stats_last_modified, SUMMARY_ACTION)
+from season.instrumentation import timing
+from season.models import STATS_ACTIONS
+from season.result_cache import evaluate, stats_result_cache
+
+
+def run_query(func, *args, **kwargs):
+    """
+    blocking ORM call in worker thread, connection of the thread is released after the call as at the end of request
+    (kept open for CONN_MAX_AGE)
+    :param func:
+    :param args:
+    :param kwargs:
+    :return:
+    """
+    try:
+        return func(*args, **kwargs)
+    finally:
+        close_old_connections()
+
+
+def in_thread(func, *args, **kwargs):
+    """
+    awaitable ORM call. default thread sensitive mode runs every sync call of the process on one thread, so
+    concurrent queries would wait on each other. here every call gets a pool thread and its own db connection
+    :param func:
+    :param args:
+    :param kwargs:
+    :return:
+    """
+    return sync_to_async(run_query, thread_sensitive=False)(func, *args, **kwargs)
+
+
+class AsyncSeasonMatchAPIResource(SeasonMatchAPIResource):
+    """
+    SeasonMatchAPIResource for async views, db work runs in worker threads and independent queries run concurrently
+    """
+    async def take_summary(self, year, version, top=None):
+        """
+        every stats action of the season, cached per data set version as sync summary
+        :param year:
+        :param version: data set version
+        :param top: not supported by summary, validation only
+        :return:
+        """
+        year = await in_thread(self.season_year, SUMMARY_ACTION, year, version=version)
+        parse_top(top, SUMMARY_ACTION)
+        key = stats_result_cache.key(SUMMARY_ACTION, year, version)
+        result = await in_thread(stats_result_cache.get, key)
+        if result is None:
+            result = await self.summary_result(year, version)
+            await in_thread(stats_result_cache.set, key, result)
+        return result
+
+    async def summary_result(self, year, version):
+        """
+        summary from snapshot, snapshot missing: match level stats and team wickets (team_highest_wicket) are
+        queried concurrently
+        :param year:
+        :param version: data set version
+        :return:
+        """
+        if settings.STATS_BACKEND == NUMPY_BACKEND:
+            return await in_thread(self.season_result, SUMMARY_ACTION, year, version)
+        result = await in_thread(self.snapshot_summary, year)
+        if result is None:
+            result, wickets = await asyncio.gather(
+                in_thread(self.model.match_summary, year),
+                in_thread(lambda: evaluate(self.model.team_highest_wicket(year))))
+            result['team_highest_wicket'] = wickets
+            result = {action_name: result[action_name] for action_name in STATS_ACTIONS}
+        return result
+
+    async def take_action(self, action_name, year, version=None, top=None):
+        """
+        stats action of the season
+        :param action_name:
+        :param year:
+        :param version: data set version
+        :param top: top N counts of leaderboard action
+        :return:
+        """
+        if action_name == SUMMARY_ACTION:
+            return await self.take_summary(year, version, top)
+        return await in_thread(lambda: evaluate(SeasonMatchAPIResource.take_action(
+            self, action_name, year, version=version, top=top).data))
+
+    async def take_seasons_action(self, action_name, years, version=None, top=None):
+        """
+        stats action of several seasons, one grouped query
+        :param action_name:
+        :param years:
+        :param version: data set version
+        :param top: top N counts of leaderboard action
+        :return:
+        """
+        response = await in_thread(super().take_seasons_action, action_name, years, version=version, top=top)
+        return response.data
+
+
+resource = AsyncSeasonMatchAPIResource()
+
+
+def json_response(data, status=200):
+    """
+    same JSON body as DRF JSONRenderer of sync stats views
+    :param data:
+    :param status:
+    :return:
+    """
+    with timing('render'):
+        content = JSONRenderer().render(data)
+    return HttpResponse(content, status=status, content_type='application/json')
+
+
+async def conditional_stats(request, compute):
+    """
+    async counterpart of StatsViewSet conditional GET: If-None-Match / If-Modified-Since are answered with 304
+    before any stats is computed, validation errors as DRF 400 response (without ETag / Last-Modified)
+    :param request:
+    :param compute: coroutine function of data set version giving response data
+    :return:
+    """
+    if request.method not in ('GET', 'HEAD'):
+        return HttpResponseNotAllowed(['GET', 'HEAD'])
+    version = await in_thread(request_dataset_version, request)
+    etag = quote_etag(stats_etag(request))
+    last_modified = stats_last_modified(request)
+    last_modified = calendar.timegm(last_modified.utctimetuple()) if last_modified else None
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        try:
+            response = patch_stats_cache(json_response(await compute(version['version'])))
+        except ValidationError as exc:
+            return json_response(exc.detail, status=400)
+    if last_modified and not response.has_header('Last-Modified'):
+        response['Last-Modified'] = http_date(last_modified)
+    response.setdefault('ETag', etag)
+    return response
+
+
+async def stats_action(request, year, action_name):
+    """
+    stats action of the season served without blocking the event loop
+    end point: api/season/async/stats/{year}/{action}/
+    :param request:
+    :param year:
+    :param action_name:
+    :return:
+    """
+    # same as unknown action route of StatsViewSet
+    if action_name != SUMMARY_ACTION and action_name not in STATS_ACTIONS:
+        raise Http404(f'Action {action_name} not available')
+    return await conditional_stats(request, lambda version: resource.take_action(
+        action_name, year, version=version, top=request.GET.get('top')))
+
+
+async def stats_seasons(request, action_name):
+    """
+    stats action of several seasons, season year -> result
+    end point: api/season/async/stats/{action}/?years=2009-2017
+    :param request:
+    :param action_name:
+    :return:
+    """
+    # same as seasons route of StatsViewSet, stats/{year}/ is not a stats action
+    if action_name not in STATS_ACTIONS:
+        raise Http404(f'Action {action_name} not available')
+    return await conditional_stats(request, lambda version: resource.take_seasons_action(
+        action_name, request.GET.get('years'), version=version, top=request.GET.get('top')))
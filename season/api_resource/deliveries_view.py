@@ -0,0 +1,154 @@
+import base64
+import binascii
+import json
+
+from django.http import StreamingHttpResponse
+from rest_framework import viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from season.instrumentation import timing
+from season.models import DELIVERY_KEY, DismissalKind, SeasonTeamPlay
+from season.registry import season_registry
+
+# deliveries per page (limit query param)
+DEFAULT_PAGE_SIZE = 1000
+MAX_PAGE_SIZE = 10000
+# rows fetched per server side cursor round trip of NDJSON export
+EXPORT_CHUNK_SIZE = 2000
+# deliveries per written chunk of NDJSON export
+EXPORT_LINES = 500
+NDJSON_CONTENT_TYPE = 'application/x-ndjson'
+DISMISSAL_KINDS = dict(DismissalKind.get_choices())
+
+
+def encode_cursor(row):
+    """
+    opaque cursor of the delivery key
+    :param row: delivery values
+    :return:
+    """
+    return base64.urlsafe_b64encode(json.dumps([row[field] for field in DELIVERY_KEY]).encode()).decode()
+
+
+def decode_cursor(cursor):
+    """
+
+    :param cursor: cursor query param
+    :return: delivery key values, None if not given
+    """
+    if cursor is None:
+        return None
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (binascii.Error, ValueError):
+        raise ValidationError(f'Cursor {cursor} is not valid')
+    # json true / false are int too
+    if not isinstance(values, list) or len(values) != len(DELIVERY_KEY) or \
+            not all(isinstance(value, int) and not isinstance(value, bool) for value in values):
+        raise ValidationError(f'Cursor {cursor} is not valid')
+    return values
+
+
+def parse_number(value, name):
+    """
+
+    :param value: query param
+    :param name: query param name
+    :return: None if not given
+    """
+    if value is None:
+        return None
+    if not value.isnumeric():
+        raise ValidationError(f'{name.capitalize()} {value} must be a numeric type')
+    return int(value)
+
+
+def delivery_filters(query_params):
+    """
+    validated filters of deliveries (season, match, team, player query params) and position after cursor
+    season handled from season registry as validate_season_year
+    :param query_params:
+    :return: SeasonTeamPlay.deliveries arguments
+    """
+    with timing('validate'):
+        season = parse_number(query_params.get('season'), 'season')
+        if season is not None and season not in season_registry:
+            raise ValidationError(f'Season {season} not available at our db, '
+                                  f'seasons from {season_registry.min_year} to {season_registry.max_year}')
+        return {
+            'season': season,
+            'match': parse_number(query_params.get('match'), 'match'),
+            'team': query_params.get('team'),
+            'player': query_params.get('player'),
+            'after': decode_cursor(query_params.get('cursor')),
+        }
+
+
+def delivery_record(row):
+    """
+    delivery values as api record, match_id as match and dismissal kind by name (None if not out)
+    :param row:
+    :return:
+    """
+    row['match'] = row.pop('match_id')
+    kind = row['dismissal_kind']
+    row['dismissal_kind'] = None if kind == DismissalKind.NOT_OUT.value else DISMISSAL_KINDS.get(kind)
+    return row
+
+
+def ndjson_chunks(rows):
+    """
+    one json document per line, lines are written EXPORT_LINES at a time
+    :param rows: delivery values
+    :return:
+    """
+    lines = list()
+    for row in rows:
+        lines.append(json.dumps(delivery_record(row)))
+        if len(lines) >= EXPORT_LINES:
+            yield '\n'.join(lines) + '\n'
+            lines = list()
+    if lines:
+        yield '\n'.join(lines) + '\n'
+
+
+class DeliveryViewSet(viewsets.ViewSet):
+    """
+    ball by ball deliveries filtered by season, match, team or player (names), keyset paginated on
+    (match, inning, over, ball, id): every page is an index range scan after the cursor, no OFFSET
+    """
+    def list(self, request):
+        """
+        page of deliveries and url of the next page (None on last page)
+        end point: api/season/deliveries/?season=2017&team=Mumbai Indians&limit=1000&cursor=...
+        :param request:
+        :return:
+        """
+        filters = delivery_filters(request.query_params)
+        limit = parse_number(request.query_params.get('limit'), 'limit')
+        limit = DEFAULT_PAGE_SIZE if limit is None else limit
+        if not 1 <= limit <= MAX_PAGE_SIZE:
+            raise ValidationError(f'Limit {limit} must be a number from 1 to {MAX_PAGE_SIZE}')
+        # one more row tells whether next page exists
+        rows = list(SeasonTeamPlay.deliveries(**filters)[:limit + 1])
+        next_url = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            query = request.query_params.copy()
+            query['cursor'] = encode_cursor(rows[-1])
+            next_url = request.build_absolute_uri(f'{request.path}?{query.urlencode()}')
+        return Response({'next': next_url, 'results': [delivery_record(row) for row in rows]})
+
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """
+        every matching delivery as NDJSON stream in constant memory, rows are read by server side cursor
+        (postgres) and written while the query is read. cursor query param starts after its delivery as in list
+        end point: api/season/deliveries/export/?season=2017
+        :param request:
+        :return:
+        """
+        rows = SeasonTeamPlay.deliveries(**delivery_filters(request.query_params)).iterator(
+            chunk_size=EXPORT_CHUNK_SIZE)
+        return StreamingHttpResponse(ndjson_chunks(rows), content_type=NDJSON_CONTENT_TYPE)
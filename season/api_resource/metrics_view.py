@@ -0,0 +1,18 @@
+from django.http import HttpResponse, HttpResponseForbidden
+from django.views.decorators.http import require_GET
+
+from season.api_resource.permissions import operator_request
+from season.metrics import CONTENT_TYPE, metrics_registry
+
+
+@require_GET
+def metrics(request):
+    """
+    per action request counts, latency histograms, error and query counts and stats result cache lookups in
+    Prometheus text format, end point: api/season/metrics/. staff users or Authorization: Bearer <METRICS_TOKEN>
+    :param request:
+    :return:
+    """
+    if not operator_request(request):
+        return HttpResponseForbidden()
+    return HttpResponse(metrics_registry.scrape(), content_type=CONTENT_TYPE)
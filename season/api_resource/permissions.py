@@ -0,0 +1,30 @@
+import hmac
+
+from django.conf import settings
+from rest_framework.permissions import BasePermission
+
+
+def operator_request(request):
+    """
+    request of staff user or of monitoring system sending METRICS_TOKEN (Authorization: Bearer <token>)
+    :param request: django or DRF request
+    :return:
+    """
+    if request.user.is_staff:
+        return True
+    token = getattr(settings, 'METRICS_TOKEN', None)
+    return bool(token) and hmac.compare_digest(request.META.get('HTTP_AUTHORIZATION', ''), f'Bearer {token}')
+
+
+class IsOperator(BasePermission):
+    """
+    worker process internals (metrics, stats result cache and db pool counters) for staff users and monitoring only
+    """
+    def has_permission(self, request, view):
+        """
+
+        :param request:
+        :param view:
+        :return:
+        """
+        return operator_request(request)
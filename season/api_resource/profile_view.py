@@ -0,0 +1,23 @@
+from django.conf import settings
+from django.http import FileResponse, Http404
+from django.views.decorators.http import require_GET
+
+from season.profiling import profile_path
+
+
+@require_GET
+def profile_file(request, profile_id, suffix):
+    """
+    stored profile of ProfilingMiddleware, staff only
+    end point: api/season/profiles/{profile id}.prof (pstats file) or .json (summary)
+    :param request:
+    :param profile_id: X-Profile-Id of profiled response
+    :param suffix:
+    :return:
+    """
+    if not getattr(settings, 'PROFILING_ENABLED', False) or not request.user.is_staff:
+        raise Http404
+    path = profile_path(profile_id, suffix)
+    if path is None:
+        raise Http404
+    return FileResponse(open(path, 'rb'), as_attachment=suffix == 'prof', filename=f'{profile_id}.{suffix}')
@@ -3,3 +3,7 @@ from django.apps import AppConfig
 
 class SeasonConfig(AppConfig):
     name = 'season'
+
+    def ready(self):
+        # connect signal receivers
+        import season.signals  # noqa: F401
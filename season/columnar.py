@@ -0,0 +1,275 @@
+import threading
+
+import numpy as np
+
+from season.models import (CityVenue, dense_top, LEADERBOARD_TOP, MatchResult, Player, SeasonMatch, SeasonTeamPlay,
+                           STATS_ACTIONS, Team, TossDecision, WICKET_KINDS, WonBy)
+
+# SeasonMatch columns kept in memory, null foreign keys are stored as 0
+MATCH_COLUMNS = ('season__year', 'toss_won_by_id', 'winner_id', 'venue_id', 'man_of_match_id', 'result', 'won_by',
+                 'score', 'toss_decision')
+
+
+def int_column(values):
+    """
+    numpy integer array of column values, null as 0
+    :param values:
+    :return:
+    """
+    return np.fromiter((value or 0 for value in values), dtype=np.int64, count=len(values))
+
+
+def name_array(model):
+    """
+    names of master set indexed by id, index 0 (null) is None
+    :param model:
+    :return:
+    """
+    names = dict(model.objects.values_list('id', 'name'))
+    res = np.full(max(names, default=0) + 1, None, dtype=object)
+    for pk, name in names.items():
+        res[pk] = name
+    return res
+
+
+class ColumnarStats:
+    """
+    In memory stats backend. SeasonMatch and wicket deliveries are loaded once as numpy integer arrays and every
+    stats action is answered by bincount / masked reductions without db hit.
+    results are same as SeasonMatch stats actions, records tied on count are ordered by id (null last)
+    """
+    def __init__(self, version=None):
+        """
+
+        :param version: data set version of loaded arrays
+        """
+        self.version = version
+        rows = list(SeasonMatch.objects.order_by('pk').values_list(*MATCH_COLUMNS))
+        columns = list(zip(*rows)) or [()] * len(MATCH_COLUMNS)
+        (self.year, self.toss_won_by, self.winner, self.venue, self.man_of_match, self.result, self.won_by,
+         self.score, self.toss_decision) = (int_column(column) for column in columns)
+        wickets = list(SeasonTeamPlay.objects.filter(dismissal_kind__in=WICKET_KINDS).values_list(
+            'season__year', 'bowling_by_id'))
+        wicket_columns = list(zip(*wickets)) or [(), ()]
+        self.wicket_year, self.wicket_bowling_by = (int_column(column) for column in wicket_columns)
+        self.teams = name_array(Team)
+        self.venues = name_array(CityVenue)
+        self.players = name_array(Player)
+
+    @staticmethod
+    def rank(keys, names, name, top=None, null_group=False):
+        """
+        group counts ordered by count, same records as SeasonMatch ranked_groups
+        :param keys: group ids, 0 is null
+        :param names: group names indexed by id
+        :param name: output key of group name
+        :param top: records of top N counts, all records if not given
+        :param null_group: null group is kept with 0 count as Count(field) grouped by SeasonMatch field gives it,
+        team ledger of ledger actions has no null team
+        :return:
+        """
+        counts = np.bincount(keys, minlength=len(names))
+        null_count = counts[0]
+        counts[0] = 0
+        ids = np.flatnonzero(counts)
+        ids = ids[np.argsort(-counts[ids], kind='stable')]
+        res = [{name: names[pk], 'count': int(counts[pk])} for pk in ids]
+        if null_count and null_group:
+            res.append({name: None, 'count': 0})
+        return dense_top(res, top)
+
+    def season(self, year):
+        """
+        mask of season matches
+        :param year:
+        :return:
+        """
+        return self.year == year
+
+    def normal(self, year):
+        """
+        mask of season matches with normal result
+        :param year:
+        :return:
+        """
+        return self.season(year) & (self.result == MatchResult.NORMAL.value)
+
+    def most_toss(self, year, top=1):
+        """
+        team won the most number of tosses in the season
+        :param year:
+        :param top:
+        :return:
+        """
+        return self.rank(self.toss_won_by[self.season(year)], self.teams, 'toss_won_by__name', top)
+
+    def get_top_4_teams(self, year, top=4):
+        """
+        Top 4 teams in terms of wins
+        :param year:
+        :param top:
+        :return:
+        """
+        return self.rank(self.winner[self.normal(year)], self.teams, 'winner__name', top)
+
+    def max_number_player_award(self, year, top=1):
+        """
+        player won the maximum number of Player of the Match awards in the whole season
+        :param year:
+        :param top:
+        :return:
+        """
+        return self.rank(self.man_of_match[self.season(year)], self.players, 'man_of_match__name', top,
+                         null_group=True)
+
+    def get_top_1_teams(self, year, top=1):
+        """
+        team won max matches in the whole season
+        :param year:
+        :param top:
+        :return:
+        """
+        return self.rank(self.winner[self.normal(year)], self.teams, 'winner__name', top)
+
+    def most_win_location(self, year, top=1):
+        """
+        location has the most number of wins for the top team
+        :param year:
+        :param top:
+        :return:
+        """
+        mask = self.normal(year)
+        if not mask.any():
+            return []
+        # (venue, winner) pair as a single group id ordered by venue id (null venue last), Count('winner') skips
+        # null winner
+        venues = np.where(self.venue[mask] > 0, self.venue[mask], len(self.venues))
+        groups, inverse = np.unique(venues * len(self.teams) + self.winner[mask], return_inverse=True)
+        counts = np.bincount(inverse, weights=self.winner[mask] > 0).astype(np.int64)
+        res = list()
+        for group in np.argsort(-counts, kind='stable'):
+            venue, winner = divmod(int(groups[group]), len(self.teams))
+            res.append({'venue__name': self.venues[venue] if venue < len(self.venues) else None,
+                        'winner__name': self.teams[winner], 'count': int(counts[group])})
+        return dense_top(res, top)
+
+    def team_bat_first(self, year):
+        """
+        % of teams decided to bat when they won the toss
+        :param year:
+        :return:
+        """
+        decisions = self.toss_decision[self.season(year)]
+        only_bat = np.count_nonzero(decisions == TossDecision.BAT.value)
+        bat_and_ball = np.count_nonzero(np.isin(decisions, [TossDecision.BAT.value, TossDecision.FIELD.value]))
+        if bat_and_ball > 0:
+            return {'percent_team_decided_bat_first': round((int(only_bat) * 100) / int(bat_and_ball), 2)}
+        return {'percent_team_decided_bat_first': 0}
+
+    def most_hosted_match_location(self, year, top=1):
+        """
+        location hosted most number of matches
+        :param year:
+        :param top:
+        :return:
+        """
+        return self.rank(self.venue[self.season(year)], self.venues, 'venue__name', top, null_group=True)
+
+    def top_margin(self, year, won_by):
+        """
+        winners of the highest score of the season won by runs / wickets
+        :param year:
+        :param won_by:
+        :return:
+        """
+        mask = self.season(year) & (self.won_by == won_by)
+        if not mask.any():
+            return []
+        mask &= self.score == self.score[mask].max()
+        return [{'winner__name': self.teams[winner], 'score': int(score)}
+                for winner, score in zip(self.winner[mask], self.score[mask])]
+
+    def highest_run_margin(self, year):
+        """
+        team won by the highest margin of runs for the season
+        :param year:
+        :return:
+        """
+        return self.top_margin(year, WonBy.RUNS.value)
+
+    def team_highest_wicket(self, year, top=None):
+        """
+        season teams total wickets
+        :param year:
+        :param top:
+        :return:
+        """
+        return self.rank(self.wicket_bowling_by[self.wicket_year == year], self.teams, 'bowling_by__name', top)
+
+    def team_won_by_highest_wickets(self, year):
+        """
+        team won by the highest number of wickets for the season
+        :param year:
+        :return:
+        """
+        return self.top_margin(year, WonBy.WICKETS.value)
+
+    def team_won_toss_matches(self, year, top=None):
+        """
+        teams won the matches and toss both with their respective counts
+        :param year:
+        :param top:
+        :return:
+        """
+        mask = self.normal(year)
+        mask &= np.isin(self.winner, self.toss_won_by[mask])
+        return self.rank(self.winner[mask], self.teams, 'winner__name', top)
+
+    def action(self, action_name, year, top=None):
+        """
+        result of stats action of the season
+        :param action_name:
+        :param year:
+        :param top: top N counts of leaderboard actions, default top of the action if not given
+        :return:
+        """
+        if action_name not in STATS_ACTIONS:
+            raise ValueError(f'Action {action_name} not available')
+        if top is not None and action_name in LEADERBOARD_TOP:
+            return getattr(self, action_name)(year, top)
+        return getattr(self, action_name)(year)
+
+    def season_summary(self, year):
+        """
+        result of every stats action of the season
+        :param year:
+        :return: action name -> result
+        """
+        return {action_name: self.action(action_name, year) for action_name in STATS_ACTIONS}
+
+    def seasons_stats(self, action_name, years, top=None):
+        """
+        result of stats action of several seasons
+        :param action_name:
+        :param years:
+        :param top: top N counts of leaderboard actions
+        :return: year -> result
+        """
+        return {year: self.action(action_name, year, top) for year in years}
+
+
+_lock = threading.Lock()
+_stats = None
+
+
+def columnar_stats(version):
+    """
+    columnar stats of the worker process, loaded on first use and reloaded when data set version changes
+    :param version: current data set version
+    :return:
+    """
+    global _stats
+    with _lock:
+        if _stats is None or _stats.version != version:
+            _stats = ColumnarStats(version)
+        return _stats
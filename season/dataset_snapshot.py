@@ -0,0 +1,191 @@
+import io
+import json
+import zipfile
+
+from django.apps import apps
+from django.core.management.color import no_style
+from django.core.serializers import sort_dependencies
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections, DEFAULT_DB_ALIAS, models, transaction
+from django.db.migrations.recorder import MigrationRecorder
+
+from season.loaders import BulkCreateLoader, ExecuteManyLoader, PostgresCopyLoader
+from season.models import DatasetVersion
+from season.registry import bump_dataset_version, season_registry
+
+MANIFEST = 'manifest.json'
+SNAPSHOT_FORMAT = 1
+# data set version is bumped on restore instead, cached stats of the replaced data must not be hit
+EXCLUDED_MODELS = (DatasetVersion,)
+# field types stored as is by every db backend, values of other fields (dates, ...) are prepared by the field
+PLAIN_FIELD_TYPES = ('AutoField', 'BigAutoField', 'BigIntegerField', 'BooleanField', 'CharField', 'FloatField',
+                     'ForeignKey', 'IntegerField', 'OneToOneField', 'PositiveIntegerField',
+                     'PositiveSmallIntegerField', 'SmallIntegerField', 'TextField')
+
+
+class SnapshotError(Exception):
+    """
+    snapshot can't be restored into the database
+    """
+
+
+def snapshot_models():
+    """
+    season models in dependency order, referenced tables first
+    :return:
+    """
+    return [model for model in sort_dependencies([(apps.get_app_config('season'), None)])
+            if model not in EXCLUDED_MODELS]
+
+
+def model_fields(model):
+    """
+    column attnames of model table (match_id, score, ...), primary key included
+    :param model:
+    :return:
+    """
+    return [field.attname for field in model._meta.concrete_fields]
+
+
+def applied_migrations(using=DEFAULT_DB_ALIAS):
+    """
+    applied season migrations, snapshot restores only into the same schema
+    :param using:
+    :return:
+    """
+    return sorted(name for app, name in MigrationRecorder(connections[using]).applied_migrations() if app == 'season')
+
+
+def dump_dataset(path, using=DEFAULT_DB_ALIAS, batch_size=10000):
+    """
+    write every season table into compressed snapshot: manifest plus one json lines member per table
+    (rows as json arrays in primary key order). rows are streamed, one batch in memory at a time
+    :param path: snapshot zip path
+    :param using: db alias
+    :param batch_size: rows fetched per query chunk
+    :return: table label -> rows
+    """
+    counts = dict()
+    with zipfile.ZipFile(path, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for model in snapshot_models():
+            fields = model_fields(model)
+            rows = model.objects.using(using).order_by('pk').values_list(*fields).iterator(chunk_size=batch_size)
+            count = 0
+            with archive.open(f'{model._meta.label_lower}.jsonl', 'w') as member:
+                with io.TextIOWrapper(member, encoding='utf-8') as text:
+                    for row in rows:
+                        text.write(json.dumps(row, cls=DjangoJSONEncoder))
+                        text.write('\n')
+                        count += 1
+            counts[model._meta.label_lower] = count
+        archive.writestr(MANIFEST, json.dumps({
+            'format': SNAPSHOT_FORMAT,
+            'migrations': applied_migrations(using),
+            'tables': [{'model': model._meta.label_lower, 'fields': model_fields(model),
+                        'rows': counts[model._meta.label_lower]} for model in snapshot_models()],
+        }, indent=2))
+    return counts
+
+
+def read_rows(archive, name):
+    """
+    rows of table member, streamed
+    :param archive: open snapshot ZipFile
+    :param name: member name
+    :return:
+    """
+    with archive.open(name) as member:
+        for line in io.TextIOWrapper(member, encoding='utf-8'):
+            yield json.loads(line)
+
+
+def db_rows(model, fields, rows, using=DEFAULT_DB_ALIAS):
+    """
+    snapshot rows as db ready values for raw loaders
+    :param model:
+    :param fields: attnames in the order of row values
+    :param rows: json decoded rows
+    :param using:
+    :return:
+    """
+    connection = connections[using]
+    prepared = [(index, model._meta.get_field(name)) for index, name in enumerate(fields)]
+    prepared = [(index, field) for index, field in prepared if field.get_internal_type() not in PLAIN_FIELD_TYPES]
+    for row in rows:
+        for index, field in prepared:
+            row[index] = field.get_db_prep_save(field.to_python(row[index]), connection)
+        yield row
+
+
+def snapshot_loader(model, using=DEFAULT_DB_ALIAS, batch_size=10000):
+    """
+    fastest loader of the table: COPY on postgres, raw executemany otherwise. json fields are saved by the ORM
+    :param model:
+    :param using:
+    :param batch_size:
+    :return: loader, True if loader takes db ready values
+    """
+    if any(isinstance(field, models.JSONField) for field in model._meta.concrete_fields):
+        return BulkCreateLoader(using=using, batch_size=batch_size), False
+    if connections[using].vendor == 'postgresql':
+        return PostgresCopyLoader(using=using, batch_size=batch_size), True
+    return ExecuteManyLoader(using=using, batch_size=batch_size), True
+
+
+def flush_tables(tables, using=DEFAULT_DB_ALIAS):
+    """
+    delete every row of given tables in one go, no per row signals / cascades
+    :param tables:
+    :param using:
+    :return:
+    """
+    connection = connections[using]
+    with connection.cursor() as cursor:
+        for sql in connection.ops.sql_flush(no_style(), tables, allow_cascade=True):
+            cursor.execute(sql)
+
+
+def restore_dataset(path, using=DEFAULT_DB_ALIAS, replace=False, batch_size=10000):
+    """
+    bulk load snapshot of dump_dataset into migrated database (COPY on postgres), no csv parsing and no stats
+    computation. data set version is bumped and season registry reloaded afterwards
+    :param path: snapshot zip path
+    :param using: db alias
+    :param replace: replace existing season data, otherwise season tables must be empty
+    :param batch_size: rows per insert statement / COPY chunk
+    :return: table label -> restored rows
+    """
+    connection = connections[using]
+    with zipfile.ZipFile(path) as archive:
+        manifest = json.loads(archive.read(MANIFEST))
+        if manifest.get('format') != SNAPSHOT_FORMAT:
+            raise SnapshotError(f'snapshot format {manifest.get("format")} not supported, dump it again')
+        migrations = applied_migrations(using)
+        if manifest['migrations'] != migrations:
+            raise SnapshotError(f'snapshot was dumped at season migration {manifest["migrations"][-1]}, '
+                                f'database is at {migrations[-1] if migrations else "none"}, dump it again')
+        tables = [(apps.get_model(table['model']), table) for table in manifest['tables']]
+        for model, table in tables:
+            if table['fields'] != model_fields(model):
+                raise SnapshotError(f'columns of {table["model"]} differ from snapshot, dump it again')
+
+        counts = dict()
+        with transaction.atomic(using=using):
+            non_empty = [model._meta.label_lower for model, _ in tables if model.objects.using(using).exists()]
+            if non_empty and not replace:
+                raise SnapshotError(f'tables {", ".join(non_empty)} are not empty, restore with replace')
+            if non_empty:
+                flush_tables([model._meta.db_table for model, _ in tables], using)
+            for model, table in tables:
+                loader, raw = snapshot_loader(model, using, batch_size)
+                rows = read_rows(archive, f'{table["model"]}.jsonl')
+                if raw:
+                    rows = db_rows(model, table['fields'], rows, using)
+                counts[table['model']] = loader.load(model, table['fields'], rows)
+            # rows keep their primary keys, sequences continue after them
+            with connection.cursor() as cursor:
+                for sql in connection.ops.sequence_reset_sql(no_style(), [model for model, _ in tables]):
+                    cursor.execute(sql)
+            bump_dataset_version()
+    season_registry.invalidate()
+    return counts
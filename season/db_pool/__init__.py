@@ -0,0 +1,333 @@
+import os
+import threading
+import time
+from collections import Counter, deque
+from functools import partial
+
+# POOL settings of the database (DATABASES['default']['POOL']) when not given
+POOL_DEFAULTS = {
+    'MIN_SIZE': 0,  # connections kept open even when idle
+    'MAX_SIZE': 10,  # connections open at once, idle + in use
+    'IDLE_TIMEOUT': 300,  # seconds idle connection is kept above MIN_SIZE
+    'TIMEOUT': 30,  # seconds to wait for a free connection when MAX_SIZE connections are in use
+    'PRE_PING': True,  # check reused connection with SELECT 1 before handing it out
+}
+
+
+class PoolExhausted(Exception):
+    """
+    no free connection within pool TIMEOUT
+    """
+
+
+class ConnectionPool:
+    """
+    Thread safe pool of DB-API connections of one database in the worker process
+    idle connections are reused last in first out, so connections beyond the steady load age out by IDLE_TIMEOUT
+    """
+    def __init__(self, alias=None, database=None, min_size=0, max_size=10, idle_timeout=300, timeout=30,
+                 pre_ping=True):
+        self.alias = alias
+        self.database = database
+        self.min_size = min_size
+        self.max_size = max(max_size, min_size, 1)
+        self.idle_timeout = idle_timeout
+        self.timeout = timeout
+        self.pre_ping = pre_ping
+        self.condition = threading.Condition()
+        # (connection, backend state, released at)
+        self.idle = deque()
+        # connections handed out and not released yet
+        self.in_use = set()
+        # open connections, idle + in use
+        self.size = 0
+        self.counters = Counter()
+        self.wait_ms = 0.0
+        self.max_wait_ms = 0.0
+
+    @staticmethod
+    def ping(connection):
+        """
+        pre-ping health check
+        :param connection:
+        :return: False if connection is broken
+        """
+        try:
+            cursor = connection.cursor()
+            try:
+                cursor.execute('SELECT 1')
+            finally:
+                cursor.close()
+            # ping must not leave transaction open, autocommit can't be changed inside transaction
+            connection.rollback()
+            return True
+        except Exception:
+            return False
+
+    @staticmethod
+    def close_quietly(connection):
+        """
+
+        :param connection:
+        :return:
+        """
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+    def expired(self):
+        """
+        idle connections beyond IDLE_TIMEOUT and MIN_SIZE, removed from pool. call with condition held
+        :return:
+        """
+        res = list()
+        deadline = time.monotonic() - self.idle_timeout
+        while self.idle and self.idle[0][2] < deadline and self.size > self.min_size:
+            res.append(self.idle.popleft()[0])
+            self.size -= 1
+        self.counters['closed_idle'] += len(res)
+        return res
+
+    def acquire(self, connect):
+        """
+        idle connection or new connection while pool is below MAX_SIZE, otherwise wait for a released one
+        :param connect: callable opening new connection, gives (connection, backend state)
+        :return: connection, backend state
+        """
+        start = time.monotonic()
+        while True:
+            with self.condition:
+                expired = self.expired()
+                waited = False
+                while not self.idle and self.size >= self.max_size:
+                    remaining = start + self.timeout - time.monotonic()
+                    if remaining <= 0:
+                        self.counters['exhausted'] += 1
+                        raise PoolExhausted(f'no free db connection within {self.timeout}s, '
+                                            f'all {self.max_size} pooled connections are in use')
+                    waited = True
+                    self.condition.wait(remaining)
+                if waited:
+                    elapsed = (time.monotonic() - start) * 1000
+                    self.counters['waits'] += 1
+                    self.wait_ms += elapsed
+                    self.max_wait_ms = max(self.max_wait_ms, elapsed)
+                pooled = self.idle.pop() if self.idle else None
+                if pooled is None:
+                    self.size += 1
+            for connection in expired:
+                self.close_quietly(connection)
+
+            if pooled is None:
+                try:
+                    pooled = connect()
+                except Exception:
+                    self.discard(None)
+                    raise
+                self.counters['created'] += 1
+            elif self.pre_ping and not self.ping(pooled[0]):
+                # broken while idle (db restart, network, server idle timeout), try next one
+                self.counters['ping_failures'] += 1
+                self.discard(pooled[0])
+                continue
+            else:
+                self.counters['reused'] += 1
+            with self.condition:
+                self.in_use.add(pooled[0])
+            self.counters['checkouts'] += 1
+            self.fill(connect)
+            return pooled[0], pooled[1]
+
+    def fill(self, connect):
+        """
+        open idle connections up to MIN_SIZE
+        :param connect:
+        :return:
+        """
+        while True:
+            with self.condition:
+                if self.size >= self.min_size:
+                    return
+                self.size += 1
+            try:
+                connection, state = connect()
+            except Exception:
+                self.discard(None)
+                return
+            self.counters['created'] += 1
+            self.release(connection, state)
+
+    def release(self, connection, state=None):
+        """
+        return connection to pool, open transaction is rolled back
+        :param connection:
+        :param state: backend state of the connection
+        :return:
+        """
+        try:
+            connection.rollback()
+        except Exception:
+            self.discard(connection)
+            return
+        with self.condition:
+            self.in_use.discard(connection)
+            self.idle.append((connection, state or {}, time.monotonic()))
+            self.condition.notify()
+
+    def discard(self, connection):
+        """
+        close connection for good and free its pool slot
+        :param connection: None if connection could not be opened
+        :return:
+        """
+        if connection is not None:
+            self.close_quietly(connection)
+            self.counters['closed'] += 1
+        with self.condition:
+            self.in_use.discard(connection)
+            self.size -= 1
+            self.condition.notify()
+
+    def stats(self):
+        """
+        pool size, wait time and exhaustion counters
+        :return:
+        """
+        with self.condition:
+            idle = len(self.idle)
+            size = self.size
+        return {
+            'size': size,
+            'idle': idle,
+            'in_use': size - idle,
+            'min_size': self.min_size,
+            'max_size': self.max_size,
+            'checkouts': self.counters['checkouts'],
+            'created': self.counters['created'],
+            'reused': self.counters['reused'],
+            'closed_idle': self.counters['closed_idle'],
+            'closed_broken': self.counters['closed'],
+            'ping_failures': self.counters['ping_failures'],
+            'waits': self.counters['waits'],
+            'wait_ms_total': round(self.wait_ms, 2),
+            'wait_ms_avg': round(self.wait_ms / self.counters['waits'], 2) if self.counters['waits'] else 0,
+            'wait_ms_max': round(self.max_wait_ms, 2),
+            'exhausted': self.counters['exhausted'],
+        }
+
+
+_lock = threading.Lock()
+_pools = dict()
+_pid = None
+
+
+def connection_pool(alias, conn_params, options=None):
+    """
+    pool of the database in this worker process, created on first use. pools inherited from parent process
+    (fork of import workers / preforking servers) are never used, their sockets belong to the parent
+    :param alias: database alias
+    :param conn_params: connection params of the backend, pool per distinct params (e.g. test database)
+    :param options: POOL settings of the database
+    :return:
+    """
+    global _pid
+    key = (alias, repr(sorted(conn_params.items())))
+    with _lock:
+        if _pid != os.getpid():
+            _pools.clear()
+            _pid = os.getpid()
+        if key not in _pools:
+            options = {**POOL_DEFAULTS, **(options or {})}
+            _pools[key] = ConnectionPool(
+                alias=alias, database=conn_params.get('database') or conn_params.get('dbname'),
+                min_size=options['MIN_SIZE'], max_size=options['MAX_SIZE'], idle_timeout=options['IDLE_TIMEOUT'],
+                timeout=options['TIMEOUT'], pre_ping=options['PRE_PING'])
+        return _pools[key]
+
+
+def close_pools(alias):
+    """
+    close every pooled connection of the database, e.g. before dropping test database. connections in use are
+    closed too, their rollback fails when they are released and they are discarded then
+    :param alias: database alias
+    :return:
+    """
+    with _lock:
+        pools = [pool for pool in _pools.values() if pool.alias == alias] if _pid == os.getpid() else []
+    for pool in pools:
+        with pool.condition:
+            idle = [connection for connection, _, _ in pool.idle]
+            pool.idle.clear()
+            pool.size -= len(idle)
+            in_use = list(pool.in_use)
+        for connection in idle + in_use:
+            pool.close_quietly(connection)
+
+
+def pool_stats():
+    """
+    stats of every connection pool of this worker process
+    :return:
+    """
+    with _lock:
+        pools = list(_pools.values()) if _pid == os.getpid() else []
+    return [{'alias': pool.alias, 'database': pool.database, **pool.stats()} for pool in pools]
+
+
+class PooledDatabaseWrapperMixin:
+    """
+    DatabaseWrapper mixin taking connections from worker process pool (POOL settings of the database) instead of
+    opening a connection per request. closing the connection (end of request, CONN_MAX_AGE) returns it to the pool
+    """
+    # wrapper attributes set by get_new_connection of the backend, restored when pooled connection is reused
+    pool_state = ()
+
+    @property
+    def pooled(self):
+        """
+        pooling is off for databases connections can't share
+        :return:
+        """
+        return True
+
+    def get_new_connection(self, conn_params):
+        """
+        connection from pool
+        :param conn_params:
+        :return:
+        """
+        if not self.pooled:
+            self.pool = None
+            return super().get_new_connection(conn_params)
+        self.pool = connection_pool(self.alias, conn_params, self.settings_dict.get('POOL'))
+        try:
+            connection, state = self.pool.acquire(partial(self.new_pooled_connection, conn_params))
+        except PoolExhausted as exc:
+            raise self.Database.OperationalError(str(exc)) from exc
+        for name, value in state.items():
+            setattr(self, name, value)
+        return connection
+
+    def new_pooled_connection(self, conn_params):
+        """
+        new connection of the backend and wrapper state to restore on reuse
+        :param conn_params:
+        :return:
+        """
+        connection = super().get_new_connection(conn_params)
+        return connection, {name: getattr(self, name) for name in self.pool_state}
+
+    def _close(self):
+        """
+        return connection to pool
+        :return:
+        """
+        # pool of the connection when it was opened, test runner renames in memory test database back on teardown
+        if self.connection is None or getattr(self, 'pool', None) is None:
+            return super()._close()
+        if self.in_atomic_block:
+            # closed inside atomic block, wrapper keeps the connection until the block exits
+            self.pool.discard(self.connection)
+        else:
+            self.pool.release(self.connection, {name: getattr(self, name) for name in self.pool_state})
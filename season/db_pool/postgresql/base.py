@@ -0,0 +1,10 @@
+from django.db.backends.postgresql import base
+
+from season.db_pool import PooledDatabaseWrapperMixin
+
+
+class DatabaseWrapper(PooledDatabaseWrapperMixin, base.DatabaseWrapper):
+    """
+    postgresql backend with pooled connections, ENGINE 'season.db_pool.postgresql'
+    """
+    pool_state = ('isolation_level',)
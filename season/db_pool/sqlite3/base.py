@@ -0,0 +1,17 @@
+from django.db.backends.sqlite3 import base
+
+from season.db_pool import PooledDatabaseWrapperMixin
+
+
+class DatabaseWrapper(PooledDatabaseWrapperMixin, base.DatabaseWrapper):
+    """
+    sqlite backend with pooled connections, ENGINE 'season.db_pool.sqlite3'
+    local stand-in of pooled postgresql backend
+    """
+    @property
+    def pooled(self):
+        """
+        in memory database lives and dies with its connection, never pooled
+        :return:
+        """
+        return not self.is_in_memory_db()
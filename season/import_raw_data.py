@@ -1,30 +1,148 @@
 from season.models import Season, City, CityVenue, Team, Umpire, Player, TossDecision, MatchResult, WonBy, \
-    SeasonMatch, SeasonTeamPlay, DismissalKind
+    SeasonMatch, SeasonTeamPlay, DismissalKind, SeasonStatsSnapshot, TeamSeasonLedger, WICKET_KINDS
+from season.loaders import get_loader
+from season.registry import bump_dataset_version
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from django.apps import apps
+from django.db import connections, transaction
+import django
+import numpy as np
+import os
 import pandas as pd
 
+# csv dismissal kind text to db choice
+DISMISSAL_KIND_MAPPER = {
+    'bowled': DismissalKind.BOWLED.value,
+    'caught': DismissalKind.CAUGHT.value,
+    'caught and bowled': DismissalKind.CAUGHT_AND_BOWLED.value,
+    'hit wicket': DismissalKind.HIT_WICKET.value,
+    'lbw': DismissalKind.LBW.value,
+    'obstructing the field': DismissalKind.OBSTRUCTING_THE_FIELD.value,
+    'retired hurt': DismissalKind.RETIRED_HURT.value,
+    'run out': DismissalKind.RUN_OUT.value,
+    'stumped': DismissalKind.STUMPED.value,
+}
+
+# SeasonMatch fields in the order rows are prepared by save_season_matches_from_matches
+MATCH_FIELDS = ('csv_match_id', 'season_id', 'venue_id', 'date', 'team_1_id', 'team_2_id', 'toss_won_by_id',
+                'toss_decision', 'result', 'dl_applied', 'winner_id', 'won_by', 'score', 'man_of_match_id',
+                'umpire_1_id', 'umpire_2_id', 'umpire_3_id')
+
+# SeasonTeamPlay fields in the order columns are prepared by save_deliveries_of_matches
+DELIVERY_FIELDS = ('match_id', 'inning', 'over', 'ball', 'batting_by_id', 'bowling_by_id', 'batsman_id', 'bowler_id',
+                   'non_striker_id', 'is_super_over', 'wide_runs', 'bye_runs', 'leg_bye_runs', 'no_ball_runs',
+                   'penalty_runs', 'batsman_runs', 'extra_runs', 'dismissal_kind', 'dismissed_id', 'fielder_id',
+                   'season_id')
+
+# processor attributes holding master set hashmaps (name -> db id)
+MASTER_SETS = ('seasons', 'city_venues', 'teams', 'umpires', 'players')
+
+# deliveries columns holding player names
+DELIVERY_PLAYER_COLUMNS = ['batsman', 'non_striker', 'bowler', 'fielder', 'player_dismissed']
+# deliveries text columns read as categoricals: every distinct name is kept once instead of once per delivery, and a
+# chunk without any dismissal still reads them as text instead of float NaN
+DELIVERY_DTYPES = {column: 'category' for column in
+                   DELIVERY_PLAYER_COLUMNS + ['batting_team', 'bowling_team', 'dismissal_kind']}
+
+
+def count_wickets(rows, deltas):
+    """
+    pass delivery rows through to the loader, wickets are counted into team season ledger deltas on the way
+    :param rows: value tuples in DELIVERY_FIELDS order
+    :param deltas: (season_id, team_id) -> Counter
+    :return:
+    """
+    season, bowling_by, dismissal_kind = (DELIVERY_FIELDS.index(field) for field in
+                                          ('season_id', 'bowling_by_id', 'dismissal_kind'))
+    for row in rows:
+        if row[dismissal_kind] in WICKET_KINDS:
+            deltas[(row[season], row[bowling_by])]['wickets'] += 1
+        yield row
+
+
+def lookup_or_create(model, values, field='name'):
+    """
+    value -> db id hashmap of master set. existing records are resolved by one bulk lookup,
+    only missing ones are inserted
+    :param model: master model class
+    :param values: unique field values
+    :param field: unique field name
+    :return:
+    """
+    instances = model.objects.in_bulk(list(values), field_name=field)
+    missing = [model(**{field: value}) for value in set(values) - set(instances)]
+    instances.update({getattr(instance, field): instance for instance in model.objects.bulk_create(missing)})
+    return {value: instance.id for value, instance in instances.items()}
+
+
+def column_to_ids(column, mapper):
+    """
+    translate each value of data frame column into db id in one go
+    every distinct value is looked up once, rows pick their id by numpy fancy indexing
+    missing values (NaN) translate to None
+    :param column:
+    :param mapper: value -> db id
+    :return: list of ids
+    """
+    codes, values = pd.factorize(column)
+    # trailing None is picked by code -1 (missing value)
+    ids = np.array([mapper[value] for value in values] + [None], dtype=object)
+    return ids[codes].tolist()
+
 
 class InitialDataProcessor:
     """"
     focus only insert new data set. expected no update on data set
     always insert new season with complete data set.
-    support incremental season insert
-    current logic written only handle complete season insert
+    support incremental season insert: existing master records are reused and already imported
+    matches (csv_match_id) are skipped, see save_season and import_season command
     """
-    def __init__(self, matches_path, deliveries_path):
+    def __init__(self, matches_path, deliveries_path, loader=None, batch_size=5000, chunk_size=None):
         """
 
         :param matches_path:
         :param deliveries_path:
+        :param loader: season.loaders loader used for matches and deliveries, picked by db engine if not given
+        :param batch_size: rows per insert statement / COPY chunk of default loader
+        :param chunk_size: streaming mode, deliveries csv is read in chunks of chunk_size rows instead of
+        loading whole file in memory
         """
+        self.loader = loader or get_loader(batch_size=batch_size)
         self.matches_df = pd.read_csv(matches_path)
-        self.deliveries_df = pd.read_csv(deliveries_path)
-        # used to insert match data set. contains all season hashmap respective to db
+        self.deliveries_path = deliveries_path
+        self.chunk_size = chunk_size
+        # streaming mode never keeps complete deliveries data frame in memory
+        self.deliveries_df = None if chunk_size else pd.read_csv(deliveries_path, dtype=DELIVERY_DTYPES)
+        # used to insert match data set. contains all season hashmap (name -> db id) respective to db
         self.seasons = dict()
         self.city_venues = dict()
         self.teams = dict()
         self.umpires = dict()
         self.players = dict()
         self.season_matches = dict()
+        # csv match id -> season db id, denormalized into deliveries
+        self.match_seasons = dict()
+
+    def deliveries_chunks(self, columns=None):
+        """
+        deliveries data frame in bounded chunks (streaming mode) or as a single complete chunk
+        :param columns: read only given columns
+        :return: generator of data frames
+        """
+        if self.deliveries_df is not None:
+            yield self.deliveries_df if columns is None else self.deliveries_df[columns]
+            return
+        for chunk in pd.read_csv(self.deliveries_path, usecols=columns, dtype=DELIVERY_DTYPES,
+                                 chunksize=self.chunk_size):
+            yield chunk
+
+    def season_years(self):
+        """
+        all season years available in matches data set
+        :return:
+        """
+        return sorted(int(year) for year in self.matches_df.season.unique())
 
     def save_season_year_from_matches(self):
         """
@@ -33,9 +151,7 @@ class InitialDataProcessor:
         """
         # add all the seasons from matches
         # creating hashmap to handle subsequent insert of season
-        self.seasons = {season.year: season for season in
-                        Season.objects.bulk_create(
-                            [Season(year=int(year)) for year in self.matches_df.season.unique()])}
+        self.seasons = lookup_or_create(Season, self.season_years(), field='year')
 
     def save_city_venue_from_matches(self):
         """
@@ -43,21 +159,22 @@ class InitialDataProcessor:
         :return:
         """
         # add master set of all the cities
-        cities_name = {city.name: city for city in
-                       City.objects.bulk_create(
-                           [City(name=name) for name in self.matches_df.city.unique() if isinstance(name, str)])}
+        cities_name = lookup_or_create(City, [name for name in self.matches_df.city.unique() if isinstance(name, str)])
 
-        venues = list()
         # load city specific venue master set
         # create hashmap by concatenating city and venue to identify unique records
-        for venue in pd.Series(self.matches_df['city'] + '__' + self.matches_df['venue']).unique():
-            if isinstance(venue, str):
-                city, stadium = venue.split('__')
-                venues.append(CityVenue(city=cities_name[city], name=stadium))
+        venues = {venue for venue in pd.Series(self.matches_df['city'] + '__' + self.matches_df['venue']).unique()
+                  if isinstance(venue, str)}
+        self.city_venues = {city + '__' + name: pk for pk, city, name in CityVenue.objects.filter(
+            name__in=[venue.split('__')[1] for venue in venues]).values_list('id', 'city__name', 'name')}
 
-        cities_id = {city.id: city.name for city in cities_name.values()}
-        self.city_venues = {cities_id[venue.city.id] + '__' + venue.name: venue for venue in
-                            CityVenue.objects.bulk_create(venues)}
+        missing_venues = list()
+        for venue in venues - set(self.city_venues):
+            city, stadium = venue.split('__')
+            missing_venues.append(CityVenue(city_id=cities_name[city], name=stadium))
+        cities_id = {pk: name for name, pk in cities_name.items()}
+        self.city_venues.update({cities_id[venue.city_id] + '__' + venue.name: venue.id for venue in
+                                 CityVenue.objects.bulk_create(missing_venues)})
 
     def save_team_from_matches(self):
         """
@@ -65,9 +182,8 @@ class InitialDataProcessor:
         :return:
         """
         # all teams played in all the season
-        self.teams = {instance.name: instance for instance in Team.objects.bulk_create(
-            [Team(name=team) for team in list(set(self.matches_df.team1.unique()) | set(self.matches_df.team2.unique()))
-             if isinstance(team, str)])}
+        self.teams = lookup_or_create(Team, [team for team in set(self.matches_df.team1.unique()) | set(
+            self.matches_df.team2.unique()) if isinstance(team, str)])
 
     def save_umpire_from_matches(self):
         """
@@ -78,10 +194,8 @@ class InitialDataProcessor:
         # manage uniqueness of the names while combining
         # create a db entry in bulk and return instance
         # all umpires participated across season of matches
-        self.umpires = {instance.name: instance for instance in Umpire.objects.bulk_create(
-            [Umpire(name=umpire) for umpire in list(
-                set(self.matches_df.umpire1.unique()) | set(self.matches_df.umpire2.unique()) | set(
-                    self.matches_df.umpire3.unique())) if isinstance(umpire, str)])}
+        self.umpires = lookup_or_create(Umpire, [umpire for umpire in set(self.matches_df.umpire1.unique()) | set(
+            self.matches_df.umpire2.unique()) | set(self.matches_df.umpire3.unique()) if isinstance(umpire, str)])
 
     def save_player_from_matches_deliveries(self):
         """
@@ -91,23 +205,57 @@ class InitialDataProcessor:
         # combine all the player columns to create master set of player list from both data frames
         # manage uniqueness of the names while combining
         # all players names who has played across season
-        self.players = {instance.name: instance for instance in Player.objects.bulk_create(
-            [Player(name=player) for player in list(
-                set(self.matches_df.player_of_match.unique()) | set(self.deliveries_df.batsman.unique()) | set(
-                    self.deliveries_df.non_striker.unique()) | set(self.deliveries_df.bowler.unique()) | set(
-                    self.deliveries_df.fielder.unique()) | set(self.deliveries_df.player_dismissed.unique())) if
-             isinstance(player, str)])}
+        # deliveries are scanned chunk by chunk, only distinct names are kept
+        players = set(self.matches_df.player_of_match.unique())
+        for deliveries_df in self.deliveries_chunks(columns=DELIVERY_PLAYER_COLUMNS):
+            for column in DELIVERY_PLAYER_COLUMNS:
+                players.update(deliveries_df[column].unique())
+        self.players = lookup_or_create(Player, [player for player in players if isinstance(player, str)])
 
-    def save_season_matches_from_matches(self):
+    def save_master_sets(self):
+        """
+        seasons, cities, venues, teams, umpires and players. existing records are reused
+        :return:
+        """
+        self.save_season_year_from_matches()
+        self.save_city_venue_from_matches()
+        self.save_team_from_matches()
+        self.save_umpire_from_matches()
+        self.save_player_from_matches_deliveries()
+
+    def master_ids(self):
+        """
+        master sets hashmaps (name -> db id), handed over to season import workers
+        :return:
+        """
+        return {name: getattr(self, name) for name in MASTER_SETS}
+
+    def load_master_ids(self, master_ids):
+        """
+        reuse master sets saved by another processor instead of saving them again
+        :param master_ids: output of master_ids()
+        :return:
         """
+        for name in MASTER_SETS:
+            setattr(self, name, master_ids[name])
 
+    def save_season_matches_from_matches(self, years=None):
+        """
+        insert matches not available in db yet (identified by csv_match_id)
+        :param years: only matches of given season years, all seasons if not given
         :return:
         """
         # load match data for each season
         matches = []
         toss_decision_mapper = TossDecision.get_reverse_choice_dict()
         match_result_mapper = MatchResult.get_reverse_choice_dict()
-        for index, row in self.matches_df.iterrows():
+        matches_df = self.matches_df if years is None else self.matches_df[self.matches_df.season.isin(years)]
+        # matches already imported by previous run are skipped
+        imported = set(SeasonMatch.objects.filter(season__year__in=[int(year) for year in matches_df.season.unique()])
+                       .values_list('csv_match_id', flat=True))
+        for index, row in matches_df.iterrows():
+            if int(row['id']) in imported:
+                continue
             if isinstance(row['city'], str) and isinstance(row['venue'], str):
                 won_by = WonBy.Unknown.value
                 score = 0
@@ -117,101 +265,195 @@ class InitialDataProcessor:
                 elif row['win_by_wickets'] > 0:
                     won_by = WonBy.WICKETS.value
                     score = row['win_by_wickets']
-                matches.append(SeasonMatch(
+                matches.append(dict(
                     csv_match_id=int(row['id']),
-                    season=self.seasons[int(row['season'])],
-                    venue=self.city_venues[row['city'] + '__' + row['venue']],
+                    season_id=self.seasons[int(row['season'])],
+                    venue_id=self.city_venues[row['city'] + '__' + row['venue']],
                     date=row['date'],
-                    team_1=self.teams[row['team1']],
-                    team_2=self.teams[row['team2']],
-                    toss_won_by=self.teams[row['toss_winner']],
+                    team_1_id=self.teams[row['team1']],
+                    team_2_id=self.teams[row['team2']],
+                    toss_won_by_id=self.teams[row['toss_winner']],
                     toss_decision=toss_decision_mapper[row['toss_decision'].strip().lower()],
                     result=match_result_mapper[row['result'].strip().lower()],
                     dl_applied=int(row['dl_applied']),
-                    winner=self.teams[row['winner']] if isinstance(row['winner'], str) else None,
+                    winner_id=self.teams[row['winner']] if isinstance(row['winner'], str) else None,
                     won_by=won_by,
-                    score=score,
-                    man_of_match=self.players[row['player_of_match']]
+                    score=int(score),
+                    man_of_match_id=self.players[row['player_of_match']]
                     if isinstance(row['player_of_match'], str) else None,
-                    umpire_1=self.umpires[row['umpire1']] if isinstance(row['umpire1'], str) else None,
-                    umpire_2=self.umpires[row['umpire2']] if isinstance(row['umpire2'], str) else None,
-                    umpire_3=self.umpires[row['umpire3']] if isinstance(row['umpire3'], str) else None
+                    umpire_1_id=self.umpires[row['umpire1']] if isinstance(row['umpire1'], str) else None,
+                    umpire_2_id=self.umpires[row['umpire2']] if isinstance(row['umpire2'], str) else None,
+                    umpire_3_id=self.umpires[row['umpire3']] if isinstance(row['umpire3'], str) else None
                 ))
 
-        self.season_matches = {match_record.csv_match_id: match_record for match_record in
-                               SeasonMatch.objects.bulk_create(matches)}
+        self.loader.load(SeasonMatch, MATCH_FIELDS, (tuple(match[field] for field in MATCH_FIELDS)
+                                                     for match in matches))
+        TeamSeasonLedger.apply(TeamSeasonLedger.match_deltas(matches))
+        # loader does not hand back instances, read generated ids of the inserted matches
+        inserted = {match['csv_match_id'] for match in matches}
+        self.season_matches = {csv_match_id: pk for csv_match_id, pk in SeasonMatch.objects.filter(
+            season_id__in={match['season_id'] for match in matches}).values_list('csv_match_id', 'id')
+            if csv_match_id in inserted}
+        self.match_seasons = {match['csv_match_id']: match['season_id'] for match in matches}
 
-        # memory clean by deleting unwanted variable
-        del self.umpires
-        del self.seasons
-        del self.matches_df
+    def delivery_rows(self, deliveries_df):
+        """
+        column wise (vectorized) translation of deliveries data frame into SeasonTeamPlay rows. names and
+        dismissal kinds are translated into db ids for the whole data frame at once instead of per row lookups
+        :param deliveries_df:
+        :return: iterator of value tuples in DELIVERY_FIELDS order
+        """
+        # keep deliveries of imported matches only (matches without city/venue are skipped)
+        deliveries_df = deliveries_df[deliveries_df.match_id.isin(list(self.season_matches.keys()))]
+        dismissal_kinds = deliveries_df.dismissal_kind.str.strip().str.lower().map(DISMISSAL_KIND_MAPPER).fillna(
+            DismissalKind.NOT_OUT.value).astype(int)
+
+        return zip(
+            column_to_ids(deliveries_df.match_id, self.season_matches),
+            deliveries_df.inning.tolist(),
+            deliveries_df.over.tolist(),
+            deliveries_df.ball.tolist(),
+            column_to_ids(deliveries_df.batting_team, self.teams),
+            column_to_ids(deliveries_df.bowling_team, self.teams),
+            column_to_ids(deliveries_df.batsman, self.players),
+            column_to_ids(deliveries_df.bowler, self.players),
+            column_to_ids(deliveries_df.non_striker, self.players),
+            deliveries_df.is_super_over.astype(bool).tolist(),
+            deliveries_df.wide_runs.tolist(),
+            deliveries_df.bye_runs.tolist(),
+            deliveries_df.legbye_runs.tolist(),
+            deliveries_df.noball_runs.tolist(),
+            deliveries_df.penalty_runs.tolist(),
+            deliveries_df.batsman_runs.tolist(),
+            deliveries_df.extra_runs.tolist(),
+            dismissal_kinds.tolist(),
+            column_to_ids(deliveries_df.player_dismissed, self.players),
+            column_to_ids(deliveries_df.fielder, self.players),
+            column_to_ids(deliveries_df.match_id, self.match_seasons),
+        )
 
     def save_deliveries_of_matches(self):
         """
-
+        generator pipeline: read deliveries chunk -> map ids -> write through loader
+        loader flushes every batch, in streaming mode only one chunk is alive in memory
         :return:
         """
-        # inning, over and each boll delivery records
-        deliveries = []
-        for match_csv_id, season_match in self.season_matches.items():
-            match_delivery = self.deliveries_df[self.deliveries_df.match_id == match_csv_id]
-            for index, row in match_delivery.iterrows():
-                dismissal_kind = DismissalKind.NOT_OUT.value
-                csv_dismissal_kind = row['dismissal_kind'].strip().lower() if isinstance(row['dismissal_kind'],
-                                                                                         str) else ''
-                if csv_dismissal_kind == 'bowled':
-                    dismissal_kind = DismissalKind.BOWLED.value
-                if csv_dismissal_kind == 'caught':
-                    dismissal_kind = DismissalKind.CAUGHT.value
-                if csv_dismissal_kind == 'caught and bowled':
-                    dismissal_kind = DismissalKind.CAUGHT_AND_BOWLED.value
-                if csv_dismissal_kind == 'hit wicket':
-                    dismissal_kind = DismissalKind.HIT_WICKET.value
-                if csv_dismissal_kind == 'lbw':
-                    dismissal_kind = DismissalKind.LBW.value
-                if csv_dismissal_kind == 'obstructing the field':
-                    dismissal_kind = DismissalKind.OBSTRUCTING_THE_FIELD.value
-                if csv_dismissal_kind == 'retired hurt':
-                    dismissal_kind = DismissalKind.RETIRED_HURT.value
-                if csv_dismissal_kind == 'run out':
-                    dismissal_kind = DismissalKind.RUN_OUT.value
-                if csv_dismissal_kind == 'stumped':
-                    dismissal_kind = DismissalKind.STUMPED.value
-
-                deliveries.append(SeasonTeamPlay(
-                    match=season_match,
-                    inning=row['inning'],
-                    over=row['over'],
-                    ball=row['ball'],
-                    batting_by=self.teams[row['batting_team']],
-                    bowling_by=self.teams[row['bowling_team']],
-                    batsman=self.players[row['batsman']],
-                    bowler=self.players[row['bowler']],
-                    non_striker=self.players[row['non_striker']],
-                    is_super_over=row['is_super_over'],
-                    wide_runs=row['wide_runs'],
-                    bye_runs=row['bye_runs'],
-                    leg_bye_runs=row['legbye_runs'],
-                    no_ball_runs=row['noball_runs'],
-                    penalty_runs=row['penalty_runs'],
-                    batsman_runs=row['batsman_runs'],
-                    extra_runs=row['extra_runs'],
-                    dismissal_kind=dismissal_kind,
-                    dismissed=self.players[row['player_dismissed']] if isinstance(row['player_dismissed'],
-                                                                                  str) else None,
-                    fielder=self.players[row['fielder']] if isinstance(row['fielder'], str) else None
-                ))
-        SeasonTeamPlay.objects.bulk_create(deliveries)
+        # inning, over and each boll delivery records, translated one loader batch at a time
+        batch_size = self.loader.batch_size
+        rows = (row for deliveries_df in self.deliveries_chunks()
+                for start in range(0, len(deliveries_df), batch_size)
+                for row in self.delivery_rows(deliveries_df.iloc[start:start + batch_size]))
+        deltas = defaultdict(Counter)
+        self.loader.load(SeasonTeamPlay, DELIVERY_FIELDS, count_wickets(rows, deltas))
+        TeamSeasonLedger.apply(deltas)
 
-    def transform_input_save(self):
+    def transform_input_save(self, rebuild_stats=True):
         """
         responsible to save season step by step
+        :param rebuild_stats: compute stats snapshot of imported seasons at the end
         :return:
         """
-        self.save_season_year_from_matches()
-        self.save_city_venue_from_matches()
-        self.save_team_from_matches()
-        self.save_umpire_from_matches()
-        self.save_player_from_matches_deliveries()
+        self.save_master_sets()
+        years = self.season_years()
         self.save_season_matches_from_matches()
+
+        # memory clean by deleting unwanted variable
+        del self.umpires
+        del self.seasons
+        del self.matches_df
+
         self.save_deliveries_of_matches()
+        if rebuild_stats:
+            SeasonStatsSnapshot.rebuild(years)
+        bump_dataset_version()
+
+    def season_deliveries(self, years, directory):
+        """
+        deliveries split by season of the match into a csv file per season, read once for all the seasons.
+        in streaming mode deliveries csv is read chunk by chunk and every chunk is appended to the files of its
+        seasons, no season is ever complete in memory
+        :param years: season years
+        :param directory: directory of season files
+        :return: year -> deliveries csv path of the season
+        """
+        match_years = pd.Series(self.matches_df.season.astype(int).values, index=self.matches_df.id)
+        paths = {year: os.path.join(directory, f'deliveries_{year}.csv') for year in years}
+        written = set()
+        empty = None
+        for deliveries_df in self.deliveries_chunks():
+            empty = deliveries_df.iloc[:0]
+            for year, season_df in deliveries_df.groupby(deliveries_df.match_id.map(match_years)):
+                year = int(year)
+                if year in paths:
+                    season_df.to_csv(paths[year], mode='a' if year in written else 'w', header=year not in written,
+                                     index=False)
+                    written.add(year)
+        # seasons without deliveries get header only
+        for year in set(paths) - written:
+            empty.to_csv(paths[year], index=False)
+        return paths
+
+    def save_season(self, year, rebuild_stats=True):
+        """
+        new matches of the season with their deliveries. master sets must be saved before
+        stats snapshot of the season is recomputed before data set version is bumped, requests of the new version
+        never read (and cache) the old snapshot
+        :param year:
+        :param rebuild_stats: recompute stats snapshot of the season
+        :return: number of inserted matches
+        """
+        self.save_season_matches_from_matches(years=[year])
+        if self.season_matches:
+            self.save_deliveries_of_matches()
+            if rebuild_stats:
+                SeasonStatsSnapshot.rebuild([year])
+            bump_dataset_version()
+        return len(self.season_matches)
+
+
+def init_season_worker():
+    """
+    process pool initializer. spawned workers have to set up django, forked workers already have it
+    :return:
+    """
+    if not apps.ready:
+        django.setup()
+
+
+def save_season_worker(processor_kwargs, master_ids, year, deliveries_path):
+    """
+    process pool job: import one season in its own transaction over its own db connection
+    :param processor_kwargs: InitialDataProcessor arguments
+    :param master_ids: InitialDataProcessor.master_ids() of the processor which saved master sets
+    :param year:
+    :param deliveries_path: deliveries csv of the season, read as processor_kwargs say (chunk by chunk in
+    streaming mode)
+    :return: year, number of inserted matches
+    """
+    processor = InitialDataProcessor(**dict(processor_kwargs, deliveries_path=deliveries_path))
+    processor.load_master_ids(master_ids)
+    try:
+        with transaction.atomic():
+            return year, processor.save_season(year)
+    finally:
+        connections.close_all()
+
+
+def save_seasons_in_parallel(processor_kwargs, master_ids, deliveries, workers):
+    """
+    matches and deliveries of different seasons are independent, import them in a process pool
+    master sets must be committed before
+    :param processor_kwargs: InitialDataProcessor arguments
+    :param master_ids: InitialDataProcessor.master_ids()
+    :param deliveries: InitialDataProcessor.season_deliveries() of season years to import, workers read deliveries
+    file of their season instead of whole deliveries csv
+    :param workers: number of worker processes
+    :return: generator of (year, number of inserted matches) in completion order
+    """
+    # forked workers must not share the connection of parent process
+    connections.close_all()
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_season_worker) as executor:
+        futures = [executor.submit(save_season_worker, processor_kwargs, master_ids, year, deliveries_path)
+                   for year, deliveries_path in deliveries.items()]
+        for future in as_completed(futures):
+            yield future.result()
@@ -0,0 +1,144 @@
+import contextvars
+import time
+from contextlib import contextmanager
+
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+# timings of the request being served, visible to worker threads of async views (sync_to_async copies context)
+_timings = contextvars.ContextVar('request_timings', default=None)
+
+
+class RequestTimings:
+    """
+    per request timings: sql queries recorded by connection execute wrapper and named spans of request handling
+    (validate, view, render)
+    """
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.view_start = None
+        # (sql, params, milliseconds), appended from any thread serving the request
+        self.queries = list()
+        self.spans = dict()
+
+    def add(self, name, milliseconds):
+        """
+
+        :param name: span name
+        :param milliseconds:
+        :return:
+        """
+        self.spans[name] = self.spans.get(name, 0) + milliseconds
+
+    def elapsed(self, since=None):
+        """
+        milliseconds since given perf counter, request start by default
+        :param since:
+        :return:
+        """
+        return (time.perf_counter() - (self.start if since is None else since)) * 1000
+
+    @property
+    def db_ms(self):
+        """
+
+        :return:
+        """
+        return sum(query[2] for query in self.queries)
+
+    def server_timing(self):
+        """
+        Server-Timing header value, shown per request by browser dev tools
+        :return:
+        """
+        metrics = [f'db;dur={self.db_ms:.1f};desc="{len(self.queries)} queries"']
+        metrics += [f'{name};dur={milliseconds:.1f}' for name, milliseconds in self.spans.items()]
+        metrics.append(f'total;dur={self.elapsed():.1f}')
+        return ', '.join(metrics)
+
+    def slowest_queries(self, limit):
+        """
+
+        :param limit:
+        :return:
+        """
+        return [{'sql': sql, 'params': repr(params)[:500], 'ms': round(milliseconds, 2)}
+                for sql, params, milliseconds in sorted(self.queries, key=lambda query: -query[2])[:limit]]
+
+
+def current_timings():
+    """
+    timings of the request being served, None outside of instrumented request
+    :return:
+    """
+    return _timings.get()
+
+
+def start_timings():
+    """
+    start collecting timings of the request in current context
+    :return: timings, token for stop_timings
+    """
+    for connection in connections.all():
+        install_query_recorder(connection)
+    timings = RequestTimings()
+    return timings, _timings.set(timings)
+
+
+def stop_timings(token):
+    """
+
+    :param token: token of start_timings
+    :return:
+    """
+    _timings.reset(token)
+
+
+@contextmanager
+def timing(name):
+    """
+    add duration of the block to span of current request
+    :param name: span name
+    :return:
+    """
+    timings = _timings.get()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        if timings is not None:
+            timings.add(name, timings.elapsed(start))
+
+
+def record_query(execute, sql, params, many, context):
+    """
+    connection execute wrapper, records sql and duration while a request is instrumented
+    :param execute:
+    :param sql:
+    :param params:
+    :param many:
+    :param context:
+    :return:
+    """
+    timings = _timings.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings.queries.append((sql, params, timings.elapsed(start)))
+
+
+def install_query_recorder(connection, **kwargs):
+    """
+    connection_created receiver, wrapper stays installed for connection wrapper lifetime (reconnects included)
+    :param connection:
+    :param kwargs:
+    :return:
+    """
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+connection_created.connect(install_query_recorder)
@@ -0,0 +1,146 @@
+import csv
+import io
+from itertools import islice
+
+from django.db import connections, DEFAULT_DB_ALIAS
+
+# string columns, COPY reads unquoted empty csv field of them as NULL unless FORCE_NOT_NULL
+TEXT_FIELD_TYPES = ('CharField', 'TextField')
+
+
+class BulkCreateLoader:
+    """
+    Default loader: save rows with batched bulk_create
+    model instances are created per batch, only one batch is alive in memory
+    """
+    def __init__(self, using=DEFAULT_DB_ALIAS, batch_size=5000):
+        """
+
+        :param using: db alias
+        :param batch_size: rows per insert statement
+        """
+        self.using = using
+        self.batch_size = batch_size
+
+    def chunks(self, rows):
+        """
+        split rows iterable into lists of batch_size
+        :param rows:
+        :return:
+        """
+        rows = iter(rows)
+        chunk = list(islice(rows, self.batch_size))
+        while chunk:
+            yield chunk
+            chunk = list(islice(rows, self.batch_size))
+
+    def load(self, model, fields, rows):
+        """
+        insert rows into model table
+        :param model: django model class
+        :param fields: model field attnames (match_id, score, ...) in the order of row values
+        :param rows: iterable of value tuples
+        :return: number of saved rows
+        """
+        count = 0
+        for chunk in self.chunks(rows):
+            model.objects.using(self.using).bulk_create([model(**dict(zip(fields, values))) for values in chunk])
+            count += len(chunk)
+        return count
+
+
+class PostgresCopyLoader(BulkCreateLoader):
+    """
+    Postgres loader: stream rows with COPY FROM STDIN (psycopg2 copy_expert)
+    rows are written chunk by chunk into an in memory csv buffer, no model instances are created
+    """
+    def copy_statement(self, model, fields):
+        """
+        unquoted empty csv field is NULL, not null text columns read it as empty string instead (FORCE_NOT_NULL)
+        :param model:
+        :param fields:
+        :return:
+        """
+        connection = connections[self.using]
+        model_fields = [model._meta.get_field(field) for field in fields]
+        columns = ', '.join(connection.ops.quote_name(field.column) for field in model_fields)
+        not_null = ', '.join(connection.ops.quote_name(field.column) for field in model_fields
+                             if not field.null and field.get_internal_type() in TEXT_FIELD_TYPES)
+        options = f'FORMAT csv, FORCE_NOT_NULL ({not_null})' if not_null else 'FORMAT csv'
+        return f'COPY {connection.ops.quote_name(model._meta.db_table)} ({columns}) FROM STDIN WITH ({options})'
+
+    @staticmethod
+    def csv_buffer(rows):
+        """
+        rows in csv format of COPY. None is written as unquoted empty field (NULL), values holding delimiter,
+        quote, carriage return or line feed are quoted (quotes doubled)
+        :param rows: iterable of value tuples
+        :return: buffer positioned at start
+        """
+        buffer = io.StringIO()
+        # csv writer quotes values holding any character of line terminator, COPY rejects unquoted \r too
+        csv.writer(buffer, lineterminator='\r\n').writerows(rows)
+        buffer.seek(0)
+        return buffer
+
+    def load(self, model, fields, rows):
+        """
+        insert rows into model table
+        :param model: django model class
+        :param fields: model field attnames (match_id, score, ...) in the order of row values
+        :param rows: iterable of value tuples
+        :return: number of saved rows
+        """
+        sql = self.copy_statement(model, fields)
+        count = 0
+        with connections[self.using].cursor() as cursor:
+            for chunk in self.chunks(rows):
+                cursor.copy_expert(sql, self.csv_buffer(chunk))
+                count += len(chunk)
+        return count
+
+
+class ExecuteManyLoader(BulkCreateLoader):
+    """
+    Raw loader: insert rows of db ready values with cursor executemany, no model instances and no per field
+    preparation by the ORM. used to restore data set snapshots (season.dataset_snapshot) on non postgres dbs
+    """
+    def insert_statement(self, model, fields):
+        """
+
+        :param model:
+        :param fields:
+        :return:
+        """
+        connection = connections[self.using]
+        columns = ', '.join(connection.ops.quote_name(model._meta.get_field(field).column) for field in fields)
+        placeholders = ', '.join(['%s'] * len(fields))
+        return f'INSERT INTO {connection.ops.quote_name(model._meta.db_table)} ({columns}) VALUES ({placeholders})'
+
+    def load(self, model, fields, rows):
+        """
+        insert rows into model table
+        :param model: django model class
+        :param fields: model field attnames (match_id, score, ...) in the order of row values
+        :param rows: iterable of db ready value tuples
+        :return: number of saved rows
+        """
+        sql = self.insert_statement(model, fields)
+        count = 0
+        with connections[self.using].cursor() as cursor:
+            for chunk in self.chunks(rows):
+                cursor.executemany(sql, chunk)
+                count += len(chunk)
+        return count
+
+
+def get_loader(using=DEFAULT_DB_ALIAS, batch_size=5000):
+    """
+    pick the fastest loader supported by db engine
+    :param using: db alias
+    :param batch_size: rows per insert statement / COPY chunk
+    :return:
+    """
+    if connections[using].vendor == 'postgresql':
+        return PostgresCopyLoader(using=using, batch_size=batch_size)
+    return BulkCreateLoader(using=using, batch_size=batch_size)
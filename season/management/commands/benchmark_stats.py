@@ -0,0 +1,84 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand
+
+from season.columnar import ColumnarStats
+from season.models import Season, SeasonMatch, STATS_ACTIONS
+from season.result_cache import evaluate
+
+
+def normalize(result):
+    """
+    comparable result, order of records tied on count is not defined by ORM queries
+    :param result:
+    :return:
+    """
+    if isinstance(result, dict):
+        return result
+    return sorted(json.dumps(record, sort_keys=True) for record in result)
+
+
+def timed(func, repeat):
+    """
+    average milliseconds of the call and its last result
+    :param func:
+    :param repeat:
+    :return:
+    """
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = func()
+    return (time.perf_counter() - start) * 1000 / repeat, result
+
+
+class Command(BaseCommand):
+    """
+    ORM stats actions side by side with in memory numpy stats (STATS_BACKEND = 'numpy')
+    """
+    help = 'Benchmark ORM and numpy stats backends and verify they give same results'
+
+    def add_arguments(self, parser):
+        """
+
+        :param parser:
+        :return:
+        """
+        parser.add_argument('--season', type=int, nargs='+', dest='seasons', help='season years, all by default')
+        parser.add_argument('--action', nargs='+', dest='actions', choices=STATS_ACTIONS,
+                            help='benchmark only given actions')
+        parser.add_argument('--repeat', type=int, default=10, help='calls of every action per season')
+
+    def handle(self, *args, **options):
+        """
+
+        :param args:
+        :param options:
+        :return:
+        """
+        years = options['seasons'] or list(Season.objects.order_by('year').values_list('year', flat=True))
+        repeat = options['repeat']
+        load_ms, stats = timed(ColumnarStats, 1)
+        self.stdout.write(f'numpy arrays loaded in {load_ms:.1f} ms, {len(stats.year)} matches, '
+                          f'{len(stats.wicket_year)} wicket deliveries')
+        self.stdout.write(f'{"action":<30}{"orm ms":>10}{"numpy ms":>10}{"speedup":>10}  result')
+        total_orm = total_numpy = 0
+        differences = 0
+        for action_name in options['actions'] or STATS_ACTIONS:
+            orm_ms = numpy_ms = 0
+            same = True
+            for year in years:
+                elapsed, orm_result = timed(lambda: evaluate(getattr(SeasonMatch, action_name)(year)), repeat)
+                orm_ms += elapsed
+                elapsed, numpy_result = timed(lambda: stats.action(action_name, year), repeat)
+                numpy_ms += elapsed
+                if normalize(orm_result) != normalize(numpy_result):
+                    same = False
+                    self.stderr.write(f'{action_name} {year}: orm {orm_result} numpy {numpy_result}')
+            differences += not same
+            total_orm += orm_ms
+            total_numpy += numpy_ms
+            self.stdout.write(f'{action_name:<30}{orm_ms:>10.2f}{numpy_ms:>10.2f}'
+                              f'{orm_ms / numpy_ms if numpy_ms else 0:>9.1f}x  {"same" if same else "DIFFERENT"}')
+        self.stdout.write(f'{"total":<30}{total_orm:>10.2f}{total_numpy:>10.2f}'
+                          f'{total_orm / total_numpy if total_numpy else 0:>9.1f}x  {differences} different actions')
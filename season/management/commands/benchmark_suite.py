@@ -0,0 +1,307 @@
+import json
+import os
+import platform
+import statistics
+import tempfile
+import time
+from io import StringIO
+
+import django
+import pandas as pd
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, reset_queries
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.utils import timezone
+
+from season.db_pool import close_pools
+from season.models import SeasonMatch, SeasonTeamPlay, STATS_ACTIONS
+from season.result_cache import stats_result_cache
+
+# postgres plan nodes reading table / index rows
+SCAN_NODES = ('Seq Scan', 'Index Scan', 'Index Only Scan', 'Bitmap Heap Scan')
+# metrics compared with baseline. timings and rows scanned may grow by the regression threshold, query count
+# must not grow at all
+TIMED_METRICS = ('seconds', 'latency_ms_median', 'rows_scanned', 'api_latency_ms_median')
+STRICT_METRICS = ('queries', 'api_queries')
+
+
+def scale_dataset(matches_path, deliveries_path, scale, directory):
+    """
+    bundled data set repeated scale times within the same seasons (scale times matches and deliveries per season),
+    match ids of every copy are shifted past the previous copy
+    :param matches_path:
+    :param deliveries_path:
+    :param scale:
+    :param directory: output directory of scaled csv files
+    :return: matches path, deliveries path
+    """
+    if scale == 1:
+        return matches_path, deliveries_path
+    matches = pd.read_csv(matches_path)
+    deliveries = pd.read_csv(deliveries_path)
+    span = int(matches.id.max())
+    scaled_matches = os.path.join(directory, f'matches_{scale}x.csv')
+    scaled_deliveries = os.path.join(directory, f'deliveries_{scale}x.csv')
+    # one copy in memory at a time, 100x deliveries do not fit comfortably. first copy truncates the file
+    for copy in range(scale):
+        mode = 'w' if copy == 0 else 'a'
+        matches.assign(id=matches.id + copy * span).to_csv(
+            scaled_matches, mode=mode, header=copy == 0, index=False)
+        deliveries.assign(match_id=deliveries.match_id + copy * span).to_csv(
+            scaled_deliveries, mode=mode, header=copy == 0, index=False)
+    return scaled_matches, scaled_deliveries
+
+
+def plan_rows(node):
+    """
+    rows read by scan nodes of postgres EXPLAIN ANALYZE json plan, rows filtered out after reading included
+    :param node:
+    :return:
+    """
+    rows = 0
+    if node['Node Type'] in SCAN_NODES:
+        rows = (node.get('Actual Rows', 0) + node.get('Rows Removed by Filter', 0) +
+                node.get('Rows Removed by Index Recheck', 0)) * node.get('Actual Loops', 1)
+    return rows + sum(plan_rows(child) for child in node.get('Plans', ()))
+
+
+def rows_scanned(queries):
+    """
+    rows scanned by captured queries, postgres only (sqlite does not report it)
+    :param queries: captured queries
+    :return: None if not supported by db
+    """
+    if connection.vendor != 'postgresql':
+        return None
+    res = 0
+    with connection.cursor() as cursor:
+        for query in queries:
+            cursor.execute('EXPLAIN (ANALYZE, FORMAT JSON) ' + query['sql'])
+            plan = cursor.fetchone()[0]
+            plan = json.loads(plan) if isinstance(plan, str) else plan
+            res += plan_rows(plan[0]['Plan'])
+    return res
+
+
+def run_action(action_name, year):
+    """
+    stats action behind StatsViewSet action, lazy querysets evaluated
+    :param action_name:
+    :param year:
+    :return:
+    """
+    result = getattr(SeasonMatch, action_name)(year)
+    return result if isinstance(result, dict) else list(result)
+
+
+def request_action(client, action_name, year):
+    """
+    stats action served by StatsViewSet url (validation, snapshot read, rendering and middlewares included).
+    stats result cache is cleared first, every request reads what a cache miss reads
+    :param client: django test client
+    :param action_name:
+    :param year:
+    :return:
+    """
+    stats_result_cache.clear()
+    response = client.get(f'/api/season/stats/{year}/{action_name}/', HTTP_ACCEPT='application/json')
+    if response.status_code != 200:
+        raise CommandError(f'{action_name} of season {year} responded {response.status_code}')
+    return response
+
+
+def regressions(results, baseline, threshold):
+    """
+    metrics of results worse than baseline
+    :param results:
+    :param baseline: results of earlier run
+    :param threshold: allowed relative growth of timed metrics, e.g. 0.25
+    :return: list of messages
+    """
+    res = list()
+    for scale, current in results['scales'].items():
+        base = baseline.get('scales', {}).get(scale)
+        if not base:
+            continue
+        groups = [('import', current['import'], base.get('import', {}))]
+        groups += [(action_name, metrics, base.get('actions', {}).get(action_name, {}))
+                   for action_name, metrics in current['actions'].items()]
+        for name, metrics, base_metrics in groups:
+            for metric, value in metrics.items():
+                base_value = base_metrics.get(metric)
+                if metric not in TIMED_METRICS + STRICT_METRICS or value is None or base_value is None:
+                    continue
+                limit = base_value * (1 + threshold) if metric in TIMED_METRICS else base_value
+                if value > limit:
+                    res.append(f'{scale}x {name} {metric}: {value} > {base_value} (limit {limit:.2f})')
+    return res
+
+
+class Command(BaseCommand):
+    """
+    reproducible benchmark of import pipeline and every stats action at 1x, 10x, 100x of bundled data set
+    every scale runs in a throwaway test database, configured database is never touched
+    """
+    help = 'Benchmark import and stats actions at scaled data set sizes, compare with baseline results'
+
+    def add_arguments(self, parser):
+        """
+
+        :param parser:
+        :return:
+        """
+        parser.add_argument('--scale', type=int, nargs='+', dest='scales', default=[1, 10, 100],
+                            help='data set sizes as multiples of bundled data set')
+        parser.add_argument('--matches', default=str(settings.BASE_DIR / 'season/migrations/matches.csv'),
+                            help='matches csv path of 1x data set')
+        parser.add_argument('--deliveries', default=str(settings.BASE_DIR / 'season/migrations/deliveries.csv'),
+                            help='deliveries csv path of 1x data set')
+        parser.add_argument('--season', type=int, nargs='+', dest='seasons',
+                            help='season years of stats actions, all seasons by default')
+        parser.add_argument('--action', nargs='+', dest='actions', choices=STATS_ACTIONS,
+                            help='benchmark only given actions')
+        parser.add_argument('--repeat', type=int, default=5, help='calls of every action per season')
+        parser.add_argument('--chunk-size', type=int, default=100000,
+                            help='import streams deliveries csv in chunks of given rows')
+        parser.add_argument('--output', default='benchmark_results.json', help='results json path')
+        parser.add_argument('--baseline', help='results json of earlier run, regressions fail the command')
+        parser.add_argument('--threshold', type=float, default=0.25,
+                            help='allowed relative growth of timings and rows scanned over baseline')
+
+    def benchmark_import(self, matches_path, deliveries_path, chunk_size):
+        """
+        import_season command into empty database, stats snapshot included
+        :param matches_path:
+        :param deliveries_path:
+        :param chunk_size:
+        :return:
+        """
+        start = time.perf_counter()
+        call_command('import_season', matches=matches_path, deliveries=deliveries_path, chunk_size=chunk_size,
+                     stdout=StringIO())
+        seconds = time.perf_counter() - start
+        matches, deliveries = SeasonMatch.objects.count(), SeasonTeamPlay.objects.count()
+        return {
+            'matches': matches,
+            'deliveries': deliveries,
+            'seconds': round(seconds, 3),
+            'rows_per_second': round((matches + deliveries) / seconds),
+        }
+
+    def benchmark_action(self, action_name, years, repeat):
+        """
+        latency, queries and rows scanned per call of stats action, latency and queries of its api request
+        :param action_name:
+        :param years:
+        :param repeat:
+        :return:
+        """
+        latencies, api_latencies = list(), list()
+        queries = api_queries = 0
+        scanned = None
+        client = Client()
+        for year in years:
+            # query log is capped, import fills it up
+            reset_queries()
+            with CaptureQueriesContext(connection) as captured:
+                run_action(action_name, year)
+            queries += len(captured)
+            rows = rows_scanned(captured.captured_queries)
+            scanned = None if rows is None else (scanned or 0) + rows
+            for _ in range(repeat):
+                start = time.perf_counter()
+                run_action(action_name, year)
+                latencies.append((time.perf_counter() - start) * 1000)
+            reset_queries()
+            with CaptureQueriesContext(connection) as captured:
+                request_action(client, action_name, year)
+            api_queries += len(captured)
+            for _ in range(repeat):
+                start = time.perf_counter()
+                request_action(client, action_name, year)
+                api_latencies.append((time.perf_counter() - start) * 1000)
+        latencies.sort()
+        api_latencies.sort()
+        return {
+            'latency_ms_median': round(statistics.median(latencies), 3),
+            'latency_ms_p95': round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], 3),
+            'queries': round(queries / len(years), 2),
+            'rows_scanned': None if scanned is None else round(scanned / len(years)),
+            'api_latency_ms_median': round(statistics.median(api_latencies), 3),
+            'api_latency_ms_p95': round(api_latencies[min(len(api_latencies) - 1,
+                                                          int(len(api_latencies) * 0.95))], 3),
+            'api_queries': round(api_queries / len(years), 2),
+        }
+
+    def benchmark_scale(self, scale, directory, options):
+        """
+        import scaled data set into fresh test database and benchmark stats actions
+        :param scale:
+        :param directory:
+        :param options:
+        :return:
+        """
+        matches_path, deliveries_path = scale_dataset(options['matches'], options['deliveries'], scale, directory)
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            imported = self.benchmark_import(matches_path, deliveries_path, options['chunk_size'])
+            self.stdout.write(f'{scale}x: {imported["matches"]} matches, {imported["deliveries"]} deliveries '
+                              f'imported in {imported["seconds"]:.1f} s ({imported["rows_per_second"]} rows/s)')
+            years = options['seasons'] or sorted(SeasonMatch.objects.values_list(
+                'season__year', flat=True).distinct())
+            actions = dict()
+            self.stdout.write(f'{"action":<30}{"median ms":>12}{"p95 ms":>12}{"queries":>10}{"rows scanned":>14}'
+                              f'{"api median ms":>15}{"api queries":>13}')
+            # host of test client requests
+            with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+                for action_name in options['actions'] or STATS_ACTIONS:
+                    metrics = actions[action_name] = self.benchmark_action(action_name, years, options['repeat'])
+                    rows = '-' if metrics['rows_scanned'] is None else metrics['rows_scanned']
+                    self.stdout.write(f'{action_name:<30}{metrics["latency_ms_median"]:>12.2f}'
+                                      f'{metrics["latency_ms_p95"]:>12.2f}{metrics["queries"]:>10}{rows:>14}'
+                                      f'{metrics["api_latency_ms_median"]:>15.2f}{metrics["api_queries"]:>13}')
+            return {'import': imported, 'actions': actions}
+        finally:
+            # pooled connections keep test database open
+            close_pools(connection.alias)
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    def handle(self, *args, **options):
+        """
+
+        :param args:
+        :param options:
+        :return:
+        """
+        baseline = None
+        if options['baseline']:
+            with open(options['baseline']) as baseline_file:
+                baseline = json.load(baseline_file)
+        results = {
+            'meta': {
+                'created_at': timezone.now().isoformat(),
+                'vendor': connection.vendor,
+                'django': django.get_version(),
+                'python': platform.python_version(),
+                'repeat': options['repeat'],
+                'seasons': options['seasons'],
+            },
+            'scales': dict(),
+        }
+        with tempfile.TemporaryDirectory() as directory:
+            for scale in options['scales']:
+                results['scales'][str(scale)] = self.benchmark_scale(scale, directory, options)
+        with open(options['output'], 'w') as output:
+            json.dump(results, output, indent=2)
+        self.stdout.write(f'results written to {options["output"]}')
+
+        if baseline is not None:
+            found = regressions(results, baseline, options['threshold'])
+            for message in found:
+                self.stderr.write(f'regression {message}')
+            if found:
+                raise CommandError(f'{len(found)} metrics regressed over {options["threshold"]:.0%} threshold')
+            self.stdout.write(f'no regression over {options["threshold"]:.0%} threshold of {options["baseline"]}')
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS
+
+from season.dataset_snapshot import dump_dataset
+
+
+class Command(BaseCommand):
+    """
+    compact snapshot of imported data set (all season tables, stats snapshots included) for load_dataset and
+    test databases, restored in bulk instead of importing csv files again
+    """
+    help = 'Dump season tables into a compressed data set snapshot'
+
+    def add_arguments(self, parser):
+        """
+
+        :param parser:
+        :return:
+        """
+        parser.add_argument('--output', default='season_dataset.zip', help='snapshot zip path')
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS, help='db alias to dump')
+
+    def handle(self, *args, **options):
+        """
+
+        :param args:
+        :param options:
+        :return:
+        """
+        counts = dump_dataset(options['output'], using=options['database'])
+        for table, rows in counts.items():
+            self.stdout.write(f'{table}: {rows} rows')
+        self.stdout.write(f'snapshot written to {options["output"]}')
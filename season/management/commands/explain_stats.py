@@ -0,0 +1,70 @@
+import re
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from season.models import SeasonMatch, STATS_ACTIONS
+
+# plan node types of table access, postgres EXPLAIN and sqlite EXPLAIN QUERY PLAN
+SCAN_PATTERN = re.compile(r'(Seq Scan|Index Only Scan|Index Scan|Bitmap Heap Scan|Bitmap Index Scan'
+                          r'|SCAN [\w"]+(?: USING (?:COVERING )?INDEX [\w"]+)?'
+                          r'|SEARCH [\w"]+(?: USING (?:COVERING )?INDEX [\w"]+| USING INTEGER PRIMARY KEY)?)'
+                          r'( (?:using|on) [\w"]+(?: on [\w"]+)?)?')
+
+
+class Command(BaseCommand):
+    """
+    EXPLAIN report of the sql queries behind every stats action
+    """
+    help = 'Show query plans (table scans / index scans) of every stats action for a season'
+
+    def add_arguments(self, parser):
+        """
+
+        :param parser:
+        :return:
+        """
+        parser.add_argument('--season', type=int, default=2017, help='season year used by the queries')
+        parser.add_argument('--action', nargs='+', dest='actions', choices=STATS_ACTIONS,
+                            help='explain only given actions')
+        parser.add_argument('--analyze', action='store_true', help='postgres EXPLAIN ANALYZE (runs the queries)')
+        parser.add_argument('--full', action='store_true', help='print complete query plans')
+
+    def explain(self, sql, analyze=False):
+        """
+        query plan lines of the sql
+        :param sql:
+        :param analyze:
+        :return:
+        """
+        if connection.vendor == 'postgresql':
+            prefix = 'EXPLAIN (ANALYZE, BUFFERS) ' if analyze else 'EXPLAIN '
+        elif connection.vendor == 'sqlite':
+            prefix = 'EXPLAIN QUERY PLAN '
+        else:
+            prefix = 'EXPLAIN '
+        with connection.cursor() as cursor:
+            cursor.execute(prefix + sql)
+            return [' '.join(str(column) for column in row) for row in cursor.fetchall()]
+
+    def handle(self, *args, **options):
+        """
+        every action is executed once, each captured query is explained again
+        :param args:
+        :param options:
+        :return:
+        """
+        for action_name in options['actions'] or STATS_ACTIONS:
+            with CaptureQueriesContext(connection) as queries:
+                result = getattr(SeasonMatch, action_name)(options['season'])
+                # querysets are lazy
+                list(result) if not isinstance(result, dict) else result
+            self.stdout.write(f'== {action_name}: {len(queries)} queries')
+            for query in queries.captured_queries:
+                plan = self.explain(query['sql'], analyze=options['analyze'])
+                if options['full']:
+                    self.stdout.write(query['sql'])
+                    self.stdout.write('\n'.join(f'    {line}' for line in plan))
+                scans = [''.join(match) for line in plan for match in SCAN_PATTERN.findall(line)]
+                self.stdout.write(f'  scans: {", ".join(scans)}')
@@ -0,0 +1,49 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from season.synthetic import DatasetGenerator
+
+
+class Command(BaseCommand):
+    """
+    synthetic matches.csv / deliveries.csv for scale testing of import and stats end points
+    """
+    help = 'Generate synthetic IPL like matches and deliveries csv files in import_season schema'
+
+    def add_arguments(self, parser):
+        """
+
+        :param parser:
+        :return:
+        """
+        parser.add_argument('--output', required=True, help='output directory of matches.csv and deliveries.csv')
+        parser.add_argument('--seasons', type=int, default=10, help='number of seasons')
+        parser.add_argument('--start-year', type=int, default=2008, help='year of first season')
+        parser.add_argument('--teams', type=int, default=8,
+                            help='teams per season, every season has teams * (teams - 1) + 4 matches')
+        parser.add_argument('--players', type=int, default=18, help='squad size of every team')
+        parser.add_argument('--umpires', type=int, default=40, help='umpire pool size')
+        parser.add_argument('--seed', type=int, help='random seed, same seed gives same files')
+
+    def handle(self, *args, **options):
+        """
+
+        :param args:
+        :param options:
+        :return:
+        """
+        if options['seasons'] < 1:
+            raise CommandError('at least one season is needed')
+        try:
+            generator = DatasetGenerator(seasons=options['seasons'], start_year=options['start_year'],
+                                         teams=options['teams'], players=options['players'],
+                                         umpires=options['umpires'], seed=options['seed'])
+        except ValueError as exc:
+            raise CommandError(exc)
+        start = time.perf_counter()
+        matches, deliveries = generator.write(options['output'])
+        self.stdout.write(f'{matches} matches, {deliveries} deliveries written to {options["output"]} '
+                          f'in {time.perf_counter() - start:.1f} s')
+        self.stdout.write(f'import: python manage.py import_season --matches {options["output"]}/matches.csv '
+                          f'--deliveries {options["output"]}/deliveries.csv')
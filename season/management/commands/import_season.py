@@ -0,0 +1,83 @@
+import tempfile
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from season.import_raw_data import InitialDataProcessor, save_seasons_in_parallel
+from season.registry import season_registry
+
+
+class Command(BaseCommand):
+    """
+    incremental season import. safe to rerun, only new seasons / matches are inserted
+    """
+    help = 'Import new seasons and matches from matches and deliveries csv files'
+
+    def add_arguments(self, parser):
+        """
+
+        :param parser:
+        :return:
+        """
+        parser.add_argument('--matches', default=str(settings.BASE_DIR / 'season/migrations/matches.csv'),
+                            help='matches csv path')
+        parser.add_argument('--deliveries', default=str(settings.BASE_DIR / 'season/migrations/deliveries.csv'),
+                            help='deliveries csv path')
+        parser.add_argument('--season', type=int, nargs='+', dest='seasons',
+                            help='import only given season years')
+        parser.add_argument('--batch-size', type=int, default=5000, help='rows per insert statement / COPY chunk')
+        parser.add_argument('--chunk-size', type=int, default=None,
+                            help='stream deliveries csv in chunks of given rows')
+        parser.add_argument('--workers', type=int, default=1,
+                            help='import seasons in parallel worker processes (needs a db accepting '
+                                 'concurrent writers, e.g. postgres)')
+
+    def handle(self, *args, **options):
+        """
+        master sets are saved first, afterwards every season is committed in its own transaction
+        either one by one or by a pool of worker processes
+        :param args:
+        :param options:
+        :return:
+        """
+        if options['workers'] > 1 and connection.vendor == 'sqlite':
+            raise CommandError('sqlite does not support concurrent writers, use --workers 1')
+        processor_kwargs = dict(matches_path=options['matches'], deliveries_path=options['deliveries'],
+                                batch_size=options['batch_size'], chunk_size=options['chunk_size'])
+        processor = InitialDataProcessor(**processor_kwargs)
+        with transaction.atomic():
+            processor.save_master_sets()
+        # seasons are bulk inserted without signals
+        season_registry.invalidate()
+        years = options['seasons'] or processor.season_years()
+
+        # stats snapshot of every imported season is computed in the transaction of the season
+        if options['workers'] > 1:
+            with tempfile.TemporaryDirectory() as directory:
+                # deliveries csv is parsed once here and split into a file per season, not parsed once per worker
+                deliveries = processor.season_deliveries(years, directory)
+                self.report(save_seasons_in_parallel(processor_kwargs, processor.master_ids(), deliveries,
+                                                     workers=options['workers']))
+        else:
+            self.report((year, self.save_season(processor, year)) for year in years)
+
+    def report(self, results):
+        """
+
+        :param results: (year, number of inserted matches) of every season
+        :return:
+        """
+        for year, count in results:
+            self.stdout.write(f'Season {year}: {count} new matches imported')
+
+    @staticmethod
+    def save_season(processor, year):
+        """
+
+        :param processor:
+        :param year:
+        :return:
+        """
+        with transaction.atomic():
+            return processor.save_season(year)
@@ -0,0 +1,42 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+from season.dataset_snapshot import restore_dataset, SnapshotError
+
+
+class Command(BaseCommand):
+    """
+    fast data set bootstrap of fresh (migrated) database from dump_dataset snapshot, bulk load of stored rows
+    instead of parsing csv files and computing stats as import_season does
+    """
+    help = 'Restore season tables from a data set snapshot of dump_dataset'
+
+    def add_arguments(self, parser):
+        """
+
+        :param parser:
+        :return:
+        """
+        parser.add_argument('--input', default='season_dataset.zip', help='snapshot zip path')
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS, help='db alias to restore into')
+        parser.add_argument('--replace', action='store_true', help='replace existing season data')
+        parser.add_argument('--batch-size', type=int, default=10000, help='rows per insert statement / COPY chunk')
+
+    def handle(self, *args, **options):
+        """
+
+        :param args:
+        :param options:
+        :return:
+        """
+        start = time.perf_counter()
+        try:
+            counts = restore_dataset(options['input'], using=options['database'], replace=options['replace'],
+                                     batch_size=options['batch_size'])
+        except SnapshotError as exc:
+            raise CommandError(str(exc)) from exc
+        for table, rows in counts.items():
+            self.stdout.write(f'{table}: {rows} rows')
+        self.stdout.write(f'snapshot {options["input"]} restored in {time.perf_counter() - start:.1f} s')
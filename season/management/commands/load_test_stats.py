@@ -0,0 +1,118 @@
+import statistics
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import Counter
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+def fetch(url, timeout):
+    """
+    status code and milliseconds of one GET request
+    :param url:
+    :param timeout:
+    :return:
+    """
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(url, timeout=timeout) as response:
+            response.read()
+            status = response.status
+    except urllib.error.HTTPError as exc:
+        status = exc.code
+    except OSError as exc:
+        status = type(exc).__name__
+    return status, (time.perf_counter() - start) * 1000
+
+
+def percentile(values, percent):
+    """
+    nearest rank percentile of sorted values
+    :param values:
+    :param percent:
+    :return:
+    """
+    return values[min(len(values) - 1, int(len(values) * percent / 100))] if values else 0
+
+
+class Command(BaseCommand):
+    """
+    HTTP load test of running stats servers, e.g. WSGI server with sync views side by side with ASGI server with
+    async views (api/season/async/stats/...)
+    """
+    help = 'Load test stats end points with concurrent clients and compare throughput / latency of targets'
+
+    def add_arguments(self, parser):
+        """
+
+        :param parser:
+        :return:
+        """
+        parser.add_argument('--target', action='append', required=True, dest='targets',
+                            help='label=url of stats end point, e.g. '
+                                 'asgi=http://127.0.0.1:9003/api/season/async/stats/2017/summary/, repeatable')
+        parser.add_argument('--requests', type=int, default=1000, help='requests per target')
+        parser.add_argument('--concurrency', type=int, default=20, help='concurrent clients')
+        parser.add_argument('--timeout', type=float, default=30, help='request timeout seconds')
+
+    def run_target(self, url, requests, concurrency, timeout):
+        """
+        requests spread over concurrent client threads
+        :param url:
+        :param requests:
+        :param concurrency:
+        :param timeout:
+        :return: elapsed seconds, statuses, latencies
+        """
+        lock = threading.Lock()
+        statuses = Counter()
+        latencies = list()
+        remaining = [requests]
+
+        def client():
+            while True:
+                with lock:
+                    if remaining[0] <= 0:
+                        return
+                    remaining[0] -= 1
+                status, elapsed = fetch(url, timeout)
+                with lock:
+                    statuses[status] += 1
+                    latencies.append(elapsed)
+
+        threads = [threading.Thread(target=client) for _ in range(concurrency)]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return time.perf_counter() - start, statuses, sorted(latencies)
+
+    def handle(self, *args, **options):
+        """
+
+        :param args:
+        :param options:
+        :return:
+        """
+        targets = list()
+        for target in options['targets']:
+            label, sep, url = target.partition('=')
+            if not sep or not url.startswith('http'):
+                raise CommandError(f'Target {target} must be label=url')
+            targets.append((label, url))
+        requests, concurrency = options['requests'], options['concurrency']
+        if requests < 1 or concurrency < 1:
+            raise CommandError('requests and concurrency must be positive')
+        self.stdout.write(f'{requests} requests per target, {concurrency} concurrent clients')
+        self.stdout.write(f'{"target":<12}{"req/s":>10}{"mean ms":>10}{"p50 ms":>10}{"p95 ms":>10}{"p99 ms":>10}'
+                          f'  statuses')
+        for label, url in targets:
+            fetch(url, options['timeout'])  # warm up worker, db connection and result cache
+            elapsed, statuses, latencies = self.run_target(url, requests, concurrency, options['timeout'])
+            self.stdout.write(f'{label:<12}{requests / elapsed:>10.1f}{statistics.mean(latencies):>10.1f}'
+                              f'{percentile(latencies, 50):>10.1f}{percentile(latencies, 95):>10.1f}'
+                              f'{percentile(latencies, 99):>10.1f}  '
+                              f'{", ".join(f"{status}: {count}" for status, count in statuses.items())}')
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from season.models import SeasonStatsSnapshot, TeamSeasonLedger
+from season.registry import bump_dataset_version
+
+
+class Command(BaseCommand):
+    """
+    recount team season ledger and recompute stats snapshot of the seasons
+    """
+    help = 'Recount team season ledger and compute stats snapshot of every action for given seasons ' \
+           '(all seasons by default)'
+
+    def add_arguments(self, parser):
+        """
+
+        :param parser:
+        :return:
+        """
+        parser.add_argument('--season', type=int, nargs='+', dest='seasons', help='rebuild only given season years')
+
+    def handle(self, *args, **options):
+        """
+
+        :param args:
+        :param options:
+        :return:
+        """
+        with transaction.atomic():
+            # snapshot is computed from the ledger
+            TeamSeasonLedger.rebuild(options['seasons'])
+            SeasonStatsSnapshot.rebuild(options['seasons'])
+            bump_dataset_version()
+        self.stdout.write('Team season ledger and stats snapshot rebuilt')
@@ -0,0 +1,352 @@
+import atexit
+import fcntl
+import glob
+import json
+import math
+import os
+import re
+import threading
+import time
+import weakref
+from bisect import bisect_left
+
+from django.conf import settings
+
+from season.models import STATS_ACTIONS
+from season.result_cache import stats_result_cache
+
+# seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# sql queries per request
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+# name -> (type, help, histogram buckets)
+METRICS = {
+    'season_requests_total': ('counter', 'Requests by stats action and status', None),
+    'season_request_errors_total': ('counter', 'Requests answered with 4xx / 5xx status by stats action', None),
+    'season_request_duration_seconds': ('histogram', 'Request latency by stats action', LATENCY_BUCKETS),
+    'season_request_db_queries': ('histogram', 'SQL queries per request by stats action', QUERY_BUCKETS),
+    'season_request_db_seconds_total': ('counter', 'Time spent in SQL queries by stats action', None),
+    'season_stats_result_cache_lookups_total': ('counter', 'Stats result cache lookups by result', None),
+}
+# stats result cache counters -> result label
+CACHE_RESULTS = {'local_hits': 'local_hit', 'shared_hits': 'shared_hit', 'misses': 'miss'}
+
+# stats actions of action_name url param (several seasons, async views), other names are not used as label
+ACTION_LABELS = frozenset(STATS_ACTIONS + ('summary',))
+# Prometheus text exposition format
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+# metrics file of worker process in shared directory
+PROCESS_FILE = re.compile(r'metrics_(\d+)\.json$')
+# samples of exited worker processes in shared directory
+RETIRED_FILE = 'metrics_retired.json'
+
+
+def request_action(request):
+    """
+    metrics label of the request: stats action of action_name url param (several seasons action of StatsViewSet,
+    async stats views), action of viewset (StatsViewSet action), url name of other views
+    :param request:
+    :return:
+    """
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unresolved'
+    if match.kwargs.get('action_name') in ACTION_LABELS:
+        return match.kwargs['action_name']
+    actions = getattr(match.func, 'actions', None)
+    if actions:
+        return actions.get(request.method.lower(), match.url_name)
+    return match.url_name or 'unnamed'
+
+
+def process_alive(pid):
+    """
+    process of the pid is running (on this host)
+    :param pid:
+    :return:
+    """
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # running as another user
+        return True
+    return True
+
+
+def read_samples(path):
+    """
+    samples of metrics file
+    :param path:
+    :return: None if file is missing or partially written
+    """
+    try:
+        with open(path) as metrics_file:
+            samples = json.load(metrics_file)
+    except (OSError, ValueError):
+        return None
+    return {(name, tuple(tuple(label) for label in labels)): value for name, labels, value in samples}
+
+
+def write_samples(path, samples):
+    """
+    replace metrics file atomically, readers see old or new file
+    :param path:
+    :param samples: (name, labels) -> value
+    :return:
+    """
+    temp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+    with open(temp_path, 'w') as temp_file:
+        json.dump([[name, [list(label) for label in labels], value] for (name, labels), value in samples.items()],
+                  temp_file)
+    os.replace(temp_path, path)
+
+
+def merge(target, source):
+    """
+    add samples of source to target, histograms bucket by bucket
+    :param target: (name, labels) -> value
+    :param source:
+    :return: target
+    """
+    for key, value in source.items():
+        if isinstance(value, list):
+            current = target.get(key)
+            target[key] = list(value) if current is None else [a + b for a, b in zip(current, value)]
+        else:
+            target[key] = target.get(key, 0) + value
+    return target
+
+
+def format_value(value):
+    """
+
+    :param value:
+    :return:
+    """
+    if value == math.inf:
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def format_sample(name, labels, value):
+    """
+    sample line of text exposition format
+    :param name:
+    :param labels: (name, value) pairs
+    :param value:
+    :return:
+    """
+    if not labels:
+        return f'{name} {format_value(value)}'
+    escaped = ','.join('{}="{}"'.format(label, str(label_value).replace('\\', r'\\').replace('"', r'\"')
+                                        .replace('\n', r'\n')) for label, label_value in labels)
+    return f'{name}{{{escaped}}} {format_value(value)}'
+
+
+def exposition(samples):
+    """
+    samples in Prometheus text exposition format
+    :param samples: (name, labels) -> counter value or histogram [bucket counts..., +Inf count, sum]
+    :return:
+    """
+    lines = list()
+    for name, (kind, help_text, buckets) in METRICS.items():
+        series = sorted((labels, value) for (metric, labels), value in samples.items() if metric == name)
+        if not series:
+            continue
+        lines += [f'# HELP {name} {help_text}', f'# TYPE {name} {kind}']
+        for labels, value in series:
+            if kind != 'histogram':
+                lines.append(format_sample(name, labels, value))
+                continue
+            cumulative = 0
+            for bound, count in zip(buckets + (math.inf,), value):
+                cumulative += count
+                lines.append(format_sample(f'{name}_bucket', labels + (('le', format_value(bound)),), cumulative))
+            lines.append(format_sample(f'{name}_sum', labels, value[-1]))
+            lines.append(format_sample(f'{name}_count', labels, cumulative))
+    return '\n'.join(lines) + '\n'
+
+
+class MetricsRegistry:
+    """
+    In process metrics registry. every thread updates its own shard without locking, shards are merged when
+    scraped. with METRICS_DIR every worker process writes its totals to the shared directory (at most every
+    METRICS_FLUSH_INTERVAL seconds and at exit), scrape of any worker merges all of them
+    """
+    def __init__(self):
+        self.reset()
+        os.register_at_fork(after_in_child=self.reset)
+        atexit.register(self.flush)
+
+    def reset(self):
+        """
+        empty registry, forked worker process must not report counts of its parent
+        :return:
+        """
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.shards = list()
+        # samples of finished threads
+        self.retired = dict()
+        self.next_flush = 0
+
+    @property
+    def directory(self):
+        """
+        shared directory of multiprocess mode, None in single process mode
+        :return:
+        """
+        return getattr(settings, 'METRICS_DIR', None)
+
+    def shard(self):
+        """
+        samples of current thread
+        :return:
+        """
+        shard = getattr(self.local, 'shard', None)
+        if shard is None:
+            shard = self.local.shard = dict()
+            with self.lock:
+                self.shards.append(shard)
+            # per request threads (runserver) must not grow shards forever
+            weakref.finalize(threading.current_thread(), self.retire, shard)
+        return shard
+
+    def retire(self, shard):
+        """
+        merge shard of finished thread into retired samples
+        :param shard:
+        :return:
+        """
+        with self.lock:
+            if shard in self.shards:
+                self.shards.remove(shard)
+                merge(self.retired, shard)
+
+    def inc(self, name, labels, value=1):
+        """
+
+        :param name: counter name
+        :param labels: (name, value) pairs
+        :param value:
+        :return:
+        """
+        shard = self.shard()
+        key = (name, labels)
+        shard[key] = shard.get(key, 0) + value
+
+    def observe(self, name, labels, value):
+        """
+
+        :param name: histogram name
+        :param labels: (name, value) pairs
+        :param value:
+        :return:
+        """
+        buckets = METRICS[name][2]
+        shard = self.shard()
+        key = (name, labels)
+        values = shard.get(key)
+        if values is None:
+            values = shard[key] = [0] * (len(buckets) + 2)
+        values[bisect_left(buckets, value)] += 1
+        values[-1] += value
+
+    def record_request(self, request, status, seconds, queries, db_seconds):
+        """
+        metrics of one served request
+        :param request:
+        :param status: response status code
+        :param seconds: latency
+        :param queries: sql queries of the request
+        :param db_seconds: time spent in sql queries
+        :return:
+        """
+        labels = (('action', request_action(request)),)
+        self.inc('season_requests_total', labels + (('status', str(status)),))
+        if status >= 400:
+            self.inc('season_request_errors_total', labels + (('status', str(status)),))
+        self.observe('season_request_duration_seconds', labels, seconds)
+        self.observe('season_request_db_queries', labels, queries)
+        self.inc('season_request_db_seconds_total', labels, db_seconds)
+        if self.directory and time.monotonic() >= self.next_flush:
+            self.flush()
+
+    def collect(self):
+        """
+        samples of this process
+        :return:
+        """
+        with self.lock:
+            res = merge(dict(), self.retired)
+            shards = [shard.copy() for shard in self.shards]
+        for shard in shards:
+            merge(res, shard)
+        cache_stats = stats_result_cache.stats()
+        for counter, result in CACHE_RESULTS.items():
+            res[('season_stats_result_cache_lookups_total', (('result', result),))] = cache_stats[counter]
+        return res
+
+    def flush(self):
+        """
+        write samples of this process to shared directory
+        :return:
+        """
+        directory = self.directory
+        if not directory:
+            return
+        self.next_flush = time.monotonic() + getattr(settings, 'METRICS_FLUSH_INTERVAL', 5)
+        os.makedirs(directory, exist_ok=True)
+        write_samples(os.path.join(directory, f'metrics_{os.getpid()}.json'), self.collect())
+
+    def retire_exited(self):
+        """
+        merge files of exited worker processes into retired file of shared directory, so restarted workers do not
+        leave a file each behind. totals stay the same, counters never go back. called under directory lock
+        :return:
+        """
+        paths = glob.glob(os.path.join(self.directory, 'metrics_*.json'))
+        exited = [path for path in paths if PROCESS_FILE.search(path) and
+                  not process_alive(int(PROCESS_FILE.search(path).group(1)))]
+        if not exited:
+            return
+        retired_path = os.path.join(self.directory, RETIRED_FILE)
+        retired = read_samples(retired_path) or dict()
+        for path in exited:
+            merge(retired, read_samples(path) or dict())
+        write_samples(retired_path, retired)
+        for path in exited:
+            os.remove(path)
+
+    def read_directory(self):
+        """
+        samples of every worker process which wrote to shared directory, exited workers included. scrapes of the
+        workers take turns (lock file of shared directory), none of them sees a retired file twice
+        :return:
+        """
+        res = dict()
+        with open(os.path.join(self.directory, 'metrics.lock'), 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            self.retire_exited()
+            for path in glob.glob(os.path.join(self.directory, 'metrics_*.json')):
+                samples = read_samples(path)
+                if samples is not None:
+                    merge(res, samples)
+        return res
+
+    def scrape(self):
+        """
+        metrics in Prometheus text exposition format, of every worker process in multiprocess mode
+        :return:
+        """
+        if not self.directory:
+            return exposition(self.collect())
+        self.flush()
+        return exposition(self.read_directory())
+
+
+metrics_registry = MetricsRegistry()
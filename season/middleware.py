@@ -0,0 +1,269 @@
+import cProfile
+import json
+import logging
+import time
+from contextlib import nullcontext
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.http import JsonResponse
+from django.utils.cache import patch_cache_control, patch_vary_headers
+
+from season.instrumentation import current_timings, start_timings, stop_timings
+from season.metrics import metrics_registry, request_action
+from season.profiling import (NOCACHE_OPTION, profile_options, profile_summary, RETURN_OPTION,
+                              store_profile)
+from season.result_cache import bypass_result_cache
+
+logger = logging.getLogger('season.performance')
+
+# slowest sql queries written to slow request log
+SLOW_REQUEST_QUERIES = 10
+
+
+class ServerTimingMiddleware:
+    """
+    Per request performance instrumentation of SERVER_TIMING_PATHS: sql query count and db time, view time and
+    rendering time in Server-Timing header. requests slower than SLOW_REQUEST_MS are logged with their slowest
+    sql queries (season.performance logger). requests are counted by action at season.metrics registry. put first
+    in MIDDLEWARE so total covers every other middleware
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        """
+
+        :param get_response:
+        """
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            # handler awaits this middleware
+            markcoroutinefunction(self)
+
+    @staticmethod
+    def instrumented(request):
+        """
+
+        :param request:
+        :return:
+        """
+        return request.path.startswith(tuple(getattr(settings, 'SERVER_TIMING_PATHS', ())))
+
+    def __call__(self, request):
+        """
+
+        :param request:
+        :return:
+        """
+        if self.is_async:
+            return self.__acall__(request)
+        if not self.instrumented(request):
+            return self.get_response(request)
+        request.timings, token = start_timings()
+        try:
+            response = self.get_response(request)
+        finally:
+            stop_timings(token)
+        return self.finish(request, response)
+
+    async def __acall__(self, request):
+        """
+
+        :param request:
+        :return:
+        """
+        if not self.instrumented(request):
+            return await self.get_response(request)
+        request.timings, token = start_timings()
+        try:
+            response = await self.get_response(request)
+        finally:
+            stop_timings(token)
+        return self.finish(request, response)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        """
+        view starts after every request middleware
+        :param request:
+        :param view_func:
+        :param view_args:
+        :param view_kwargs:
+        :return:
+        """
+        if hasattr(request, 'timings'):
+            request.timings.view_start = time.perf_counter()
+
+    def process_template_response(self, request, response):
+        """
+        view returned lazily rendered response (DRF Response), rendering is timed by post render callback
+        :param request:
+        :param response:
+        :return:
+        """
+        timings = getattr(request, 'timings', None)
+        if timings is not None and timings.view_start is not None:
+            timings.add('view', timings.elapsed(timings.view_start))
+            render_start = time.perf_counter()
+            response.add_post_render_callback(lambda rendered: timings.add('render', timings.elapsed(render_start)))
+        return response
+
+    def finish(self, request, response):
+        """
+        Server-Timing header, request metrics and slow request log
+        :param request:
+        :param response:
+        :return:
+        """
+        timings = request.timings
+        if 'view' not in timings.spans and timings.view_start is not None:
+            # response rendered by the view itself, e.g. async views
+            timings.add('view', timings.elapsed(timings.view_start))
+        response['Server-Timing'] = timings.server_timing()
+        total_ms = timings.elapsed()
+        metrics_registry.record_request(request, response.status_code, total_ms / 1000, len(timings.queries),
+                                        timings.db_ms / 1000)
+        if total_ms >= getattr(settings, 'SLOW_REQUEST_MS', 500):
+            logger.warning('slow request %s', json.dumps({
+                'method': request.method,
+                'path': request.get_full_path(),
+                'status': response.status_code,
+                'total_ms': round(total_ms, 2),
+                'db_ms': round(timings.db_ms, 2),
+                'queries': len(timings.queries),
+                'spans': {name: round(milliseconds, 2) for name, milliseconds in timings.spans.items()},
+                'slowest_queries': timings.slowest_queries(SLOW_REQUEST_QUERIES),
+            }))
+        return response
+
+
+class ProfilingMiddleware:
+    """
+    Staff only on demand profiling, enabled by PROFILING_ENABLED. ?profile= query param or X-Profile header runs the
+    request under cProfile and stores pstats file and summary (top functions, sql executed) at PROFILE_DIR, profile
+    id in X-Profile-Id response header. options (comma separated): return responds with the summary, nocache skips
+    stats result cache lookups. async views are profiled on event loop thread only, their queries run in worker
+    threads (sql is still recorded). put after AuthenticationMiddleware
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        """
+
+        :param get_response:
+        """
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            # handler awaits this middleware
+            markcoroutinefunction(self)
+
+    @staticmethod
+    def requested(request):
+        """
+        profiling options of the request, requests of non staff users are never profiled
+        :param request:
+        :return: None if request is not profiled
+        """
+        if not getattr(settings, 'PROFILING_ENABLED', False):
+            return None
+        options = profile_options(request)
+        if options is None or not request.user.is_staff:
+            return None
+        return options
+
+    def __call__(self, request):
+        """
+
+        :param request:
+        :return:
+        """
+        if self.is_async:
+            return self.__acall__(request)
+        options = self.requested(request)
+        if options is None:
+            return self.get_response(request)
+        profiler, queries, token = self.start()
+        start = time.perf_counter()
+        try:
+            with bypass_result_cache() if NOCACHE_OPTION in options else nullcontext():
+                profiler.enable()
+                try:
+                    response = self.get_response(request)
+                finally:
+                    profiler.disable()
+        finally:
+            recorded = self.stop(queries, token)
+        return self.finish(request, response, options, profiler, recorded, start)
+
+    async def __acall__(self, request):
+        """
+
+        :param request:
+        :return:
+        """
+        # user is loaded from db lazily, not allowed on event loop
+        options = await sync_to_async(self.requested)(request)
+        if options is None:
+            return await self.get_response(request)
+        profiler, queries, token = self.start()
+        start = time.perf_counter()
+        try:
+            with bypass_result_cache() if NOCACHE_OPTION in options else nullcontext():
+                profiler.enable()
+                try:
+                    response = await self.get_response(request)
+                finally:
+                    profiler.disable()
+        finally:
+            recorded = self.stop(queries, token)
+        return self.finish(request, response, options, profiler, recorded, start)
+
+    @staticmethod
+    def start():
+        """
+        profiler and sql recording, timings of ServerTimingMiddleware are reused on instrumented paths
+        :return: profiler, recorded queries, token of own timings (None if reused)
+        """
+        timings = current_timings()
+        token = None
+        if timings is None:
+            timings, token = start_timings()
+        return cProfile.Profile(), (timings.queries, len(timings.queries)), token
+
+    @staticmethod
+    def stop(queries, token):
+        """
+
+        :param queries: recorded queries, count before profiling
+        :param token: token of own timings
+        :return: queries of profiled request
+        """
+        if token is not None:
+            stop_timings(token)
+        recorded, count = queries
+        return recorded[count:]
+
+    @staticmethod
+    def finish(request, response, options, profiler, queries, start):
+        """
+        store profile, respond with summary if requested. profiled response (profile id, summary) is for the staff
+        user only, never stored by shared caches or reused for requests without profiling
+        :param request:
+        :param response:
+        :param options:
+        :param profiler:
+        :param queries:
+        :param start:
+        :return:
+        """
+        summary = profile_summary(request, response, profiler, queries, (time.perf_counter() - start) * 1000)
+        profile_id = store_profile(profiler, summary, request_action(request))
+        if RETURN_OPTION in options:
+            response = JsonResponse(summary)
+        response['X-Profile-Id'] = profile_id
+        patch_vary_headers(response, ['X-Profile', 'Cookie'])
+        patch_cache_control(response, private=True, no_store=True)
+        return response
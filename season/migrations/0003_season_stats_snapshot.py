@@ -0,0 +1,21 @@
+# Generated by Django 3.1.3 on 2026-10-17 19:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('season', '0002_load_raw_data'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SeasonStatsSnapshot',
+            fields=[
+                ('year', models.IntegerField(primary_key=True, serialize=False)),
+                ('stats', models.JSONField(default=dict)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 3.1.3 on 2026-10-17 19:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('season', '0003_season_stats_snapshot'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='seasonmatch',
+            index=models.Index(fields=['season', 'result', 'winner'], name='match_season_result_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='seasonmatch',
+            index=models.Index(fields=['season', 'won_by', 'score'], name='match_season_won_by_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='seasonmatch',
+            index=models.Index(fields=['season', 'toss_decision'], name='match_season_toss_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='seasonteamplay',
+            index=models.Index(condition=models.Q(dismissal_kind__in=[1, 2, 3, 4, 5, 6, 7, 8, 9]), fields=['match', 'bowling_by'], name='play_wicket_match_idx'),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 3.1.3 on 2026-10-17 19:12
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+import django.db.models.deletion
+
+
+def fill_delivery_season(apps, schema_editor):
+    """
+    copy season of the match into existing deliveries, single UPDATE with correlated subquery
+    :param apps:
+    :param schema_editor:
+    :return:
+    """
+    SeasonMatch = apps.get_model('season', 'SeasonMatch')
+    SeasonTeamPlay = apps.get_model('season', 'SeasonTeamPlay')
+    SeasonTeamPlay.objects.update(season_id=Subquery(
+        SeasonMatch.objects.filter(pk=OuterRef('match_id')).values('season_id')[:1]))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('season', '0004_stats_query_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='seasonteamplay',
+            name='season',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, to='season.season'),
+        ),
+        migrations.RunPython(fill_delivery_season, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='seasonteamplay',
+            name='season',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='season.season'),
+        ),
+        migrations.RemoveIndex(
+            model_name='seasonteamplay',
+            name='play_wicket_match_idx',
+        ),
+        migrations.AddIndex(
+            model_name='seasonteamplay',
+            index=models.Index(condition=models.Q(dismissal_kind__in=[1, 2, 3, 4, 5, 6, 7, 8, 9]), fields=['season', 'bowling_by'], name='play_wicket_season_idx'),
+        ),
+    ]
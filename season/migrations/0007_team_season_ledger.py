@@ -0,0 +1,73 @@
+# Generated by Django 3.1.3 on 2026-10-17 19:23
+
+from collections import Counter, defaultdict
+
+from django.db import migrations, models
+from django.db.models import Count, F, Q
+import django.db.models.deletion
+
+# MatchResult.NORMAL, TossDecision.BAT / FIELD, DismissalKind wickets (all but NOT_OUT) at this migration
+NORMAL_RESULT, BAT, FIELD = 1, 1, 2
+WICKET_KINDS = list(range(1, 10))
+
+
+def fill_ledger(apps, schema_editor):
+    """
+    count ledger of already imported seasons, grouped by the db
+    :param apps:
+    :param schema_editor:
+    :return:
+    """
+    SeasonMatch = apps.get_model('season', 'SeasonMatch')
+    SeasonTeamPlay = apps.get_model('season', 'SeasonTeamPlay')
+    TeamSeasonLedger = apps.get_model('season', 'TeamSeasonLedger')
+    ledger = defaultdict(Counter)
+    normal = Q(result=NORMAL_RESULT)
+    for team in ['team_1_id', 'team_2_id']:
+        for record in SeasonMatch.objects.values('season_id', team).annotate(count=Count('pk')).order_by():
+            ledger[(record['season_id'], record[team])]['matches'] += record['count']
+    for record in SeasonMatch.objects.values('season_id', 'toss_won_by_id').annotate(
+            toss_wins=Count('pk'), normal_toss_wins=Count('pk', filter=normal),
+            toss_and_match_wins=Count('pk', filter=normal & Q(winner_id=F('toss_won_by_id'))),
+            bat_first=Count('pk', filter=Q(toss_decision=BAT)),
+            field_first=Count('pk', filter=Q(toss_decision=FIELD))).order_by():
+        ledger[(record.pop('season_id'), record.pop('toss_won_by_id'))].update(record)
+    for record in SeasonMatch.objects.filter(normal, winner__isnull=False).values('season_id', 'winner_id').annotate(
+            count=Count('pk')).order_by():
+        ledger[(record['season_id'], record['winner_id'])]['wins'] += record['count']
+    for record in SeasonTeamPlay.objects.filter(dismissal_kind__in=WICKET_KINDS, bowling_by__isnull=False).values(
+            'season_id', 'bowling_by_id').annotate(count=Count('pk')).order_by():
+        ledger[(record['season_id'], record['bowling_by_id'])]['wickets'] += record['count']
+    TeamSeasonLedger.objects.bulk_create([TeamSeasonLedger(season_id=season_id, team_id=team_id, **counters)
+                                          for (season_id, team_id), counters in ledger.items()], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('season', '0006_dataset_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TeamSeasonLedger',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('matches', models.IntegerField(default=0)),
+                ('wins', models.IntegerField(default=0)),
+                ('toss_wins', models.IntegerField(default=0)),
+                ('normal_toss_wins', models.IntegerField(default=0)),
+                ('toss_and_match_wins', models.IntegerField(default=0)),
+                ('bat_first', models.IntegerField(default=0)),
+                ('field_first', models.IntegerField(default=0)),
+                ('wickets', models.IntegerField(default=0)),
+                ('season', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='season.season')),
+                ('team', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='season.team')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='teamseasonledger',
+            constraint=models.UniqueConstraint(fields=('season', 'team'), name='ledger_season_team_uniq'),
+        ),
+        migrations.RunPython(fill_ledger, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 3.1.3 on 2026-10-17 20:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('season', '0007_team_season_ledger'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='seasonteamplay',
+            index=models.Index(fields=['season', 'match', 'inning', 'over', 'ball', 'id'],
+                               name='play_season_ball_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='seasonteamplay',
+            index=models.Index(fields=['match', 'inning', 'over', 'ball', 'id'], name='play_ball_idx'),
+        ),
+    ]
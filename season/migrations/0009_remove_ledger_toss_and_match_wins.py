@@ -0,0 +1,17 @@
+# Generated by Django 3.1.3 on 2026-10-17 21:10
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('season', '0008_seasonteamplay_ball_key'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='teamseasonledger',
+            name='toss_and_match_wins',
+        ),
+    ]
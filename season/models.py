@@ -1,7 +1,9 @@
+from collections import Counter, defaultdict
 from enum import Enum
-from django.db import models
-from django.db.models import Count, F, Sum
+from django.db import connections, models
+from django.db.models import Count, F, OuterRef, Q, Subquery, Sum, Window
 from django.db.models.aggregates import Max
+from django.db.models.functions import DenseRank, RowNumber
 
 
 class Choice(Enum):
@@ -29,6 +31,83 @@ class Choice(Enum):
         return {i[1].lower(): i[0] for i in cls.CHOICES.value}
 
 
+def leaderboard(counter, names, name):
+    """
+    group counts ordered by count and id, same shape as values(name).annotate(count=...).order_by('-count', id)
+    :param counter: group id -> count
+    :param names: group id -> group value
+    :param name: output key of group value
+    :return:
+    """
+    ranked = sorted(counter.items(), key=lambda item: (-item[1], item[0] is None, item[0] or 0))
+    return [{name: names.get(pk), 'count': count} for pk, count in ranked]
+
+
+def dense_top(records, top=None):
+    """
+    records of top N counts, same as DENSE_RANK() <= N of records ordered by count
+    :param records:
+    :param top: all records if not given
+    :return:
+    """
+    if top is None:
+        return records
+    counts = sorted({record['count'] for record in records}, reverse=True)[:top]
+    return [record for record in records if record['count'] in counts]
+
+
+def ranked_groups(qs, fields, count, top=None, partition_by=None, labels=None):
+    """
+    group counts ordered by count, records tied on count are ordered by id of group fields (e.g. winner_id of
+    winner__name). top N counts are ranked by DENSE_RANK() window over the aggregate and filtered by the db,
+    so every record tied on a top count is returned by a single query
+    :param qs: filtered queryset
+    :param fields: group by fields
+    :param count: count aggregate
+    :param top: records of top N counts, all records if not given
+    :param partition_by: lookup ranked separately, e.g. season__year
+    :param labels: output key of group fields, e.g. {'team__name': 'winner__name'}
+    :return: list of records
+    """
+    labels = labels or dict()
+    ids = [field.replace('__name', '_id') for field in fields]
+    partition = [partition_by] if partition_by else []
+    window = dict(partition_by=[F(lookup) for lookup in partition] or None)
+    qs = qs.order_by().values(*partition, *ids, *fields).annotate(count=count).annotate(
+        leaderboard_rank=Window(DenseRank(), order_by=F('count').desc(), **window),
+        leaderboard_position=Window(RowNumber(), order_by=[F('count').desc(), *[F(pk).asc() for pk in ids]],
+                                    **window))
+    # window functions can't be filtered in the same select, ranked rows are filtered by outer select
+    sql, params = qs.query.sql_with_params()
+    sql = f'SELECT * FROM ({sql}) ranked'
+    if top is not None:
+        sql, params = f'{sql} WHERE leaderboard_rank <= %s', (*params, top)
+    sql = f'{sql} ORDER BY {"1, " if partition else ""}leaderboard_position'
+    names = [*qs.query.extra_select, *qs.query.values_select, *qs.query.annotation_select]
+    with connections[qs.db].cursor() as cursor:
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+    return [{labels.get(name, name): value for name, value in zip(names, row)
+             if name in partition or name in fields or name == 'count'} for row in rows]
+
+
+def group_by_season(qs, fields, count, year_field='season__year', top=None, labels=None):
+    """
+    group counts of several seasons in one query, each season ordered and ranked by count
+    :param qs: filtered queryset
+    :param fields: group by fields
+    :param count: count aggregate
+    :param year_field: lookup of season year
+    :param top: records of top N counts of each season
+    :param labels: output key of group fields
+    :return: year -> list of records
+    """
+    res = defaultdict(list)
+    for record in ranked_groups(qs, fields, count, top=top, partition_by=year_field, labels=labels):
+        res[record.pop(year_field)].append(record)
+    return res
+
+
 class Player(models.Model):
     """
     Players Master set
@@ -147,65 +226,71 @@ class SeasonMatch(models.Model):
     umpire_3 = models.ForeignKey(Umpire, on_delete=models.SET_NULL, null=True, blank=True, related_name='third_umpire')
     csv_match_id = models.IntegerField()  # needed to handle import logic of deliveries
 
+    class Meta:
+        indexes = [
+            # season + result filter of win stats, winner lets group by winner read the index only
+            models.Index(fields=['season', 'result', 'winner'], name='match_season_result_idx'),
+            # max(score) per won_by of the season (highest_run_margin, team_won_by_highest_wickets)
+            models.Index(fields=['season', 'won_by', 'score'], name='match_season_won_by_idx'),
+            # toss decision counts of team_bat_first
+            models.Index(fields=['season', 'toss_decision'], name='match_season_toss_idx'),
+        ]
+
     @staticmethod
-    def most_toss(year):
+    def most_toss(year, top=1):
         """
         team won the most number of tosses in the season
         :param year:
+        :param top: teams of top N toss counts, tied teams included
         :return:
         """
 
-        qs = SeasonMatch.objects.filter(season__year=year)
-        qs = qs.values('toss_won_by__name').annotate(count=Count('toss_won_by')).order_by('-count')
-        return qs[:1]
+        qs = TeamSeasonLedger.objects.filter(season__year=year, toss_wins__gt=0)
+        return ranked_groups(qs, ['team__name'], Sum('toss_wins'), top=top, labels={'team__name': 'toss_won_by__name'})
 
     @staticmethod
-    def get_top_4_teams(year):
+    def get_top_4_teams(year, top=4):
         """
         Top 4 teams in terms of wins
         :param year:
+        :param top: teams of top N win counts, tied teams included
         :return:
         """
-        qs = SeasonMatch.objects.filter(season__year=year, result=MatchResult.NORMAL.value)
-        qs = qs.values('winner__name').annotate(count=Count('winner')).order_by('-count')
-        return qs[:4]
+        qs = TeamSeasonLedger.objects.filter(season__year=year, wins__gt=0)
+        return ranked_groups(qs, ['team__name'], Sum('wins'), top=top, labels={'team__name': 'winner__name'})
 
     @staticmethod
-    def max_number_player_award(year):
+    def max_number_player_award(year, top=1):
         """
         player won the maximum number of Player of the Match awards in the whole season
         :param year:
+        :param top: players of top N award counts, tied players included
         :return:
         """
         qs = SeasonMatch.objects.filter(season__year=year)
-        qs = qs.values('man_of_match__name').annotate(count=Count('man_of_match')).order_by('-count')
-        if len(qs) > 1:
-            last_record = qs[0]
-            res = list(filter(lambda x: last_record['count'] == x['count'], qs))
-            return res
-        return list(qs)
+        return ranked_groups(qs, ['man_of_match__name'], Count('man_of_match'), top=top)
 
     @staticmethod
-    def get_top_1_teams(year):
+    def get_top_1_teams(year, top=1):
         """
         team won max matches in the whole season
         :param year:
+        :param top: teams of top N win counts, tied teams included
         :return:
         """
-        qs = SeasonMatch.objects.filter(season__year=year, result=MatchResult.NORMAL.value)
-        qs = qs.values('winner__name').annotate(count=Count('winner')).order_by('-count')
-        return qs[:1]
+        qs = TeamSeasonLedger.objects.filter(season__year=year, wins__gt=0)
+        return ranked_groups(qs, ['team__name'], Sum('wins'), top=top, labels={'team__name': 'winner__name'})
 
     @staticmethod
-    def most_win_location(year):
+    def most_win_location(year, top=1):
         """
         location has the most number of wins for the top team
         :param year:
+        :param top: location and team of top N win counts, tied records included
         :return:
         """
         qs = SeasonMatch.objects.filter(season__year=year, result=MatchResult.NORMAL.value)
-        qs = qs.values('venue__name', 'winner__name').annotate(count=Count('winner')).order_by('-count')
-        return qs[:1]
+        return ranked_groups(qs, ['venue__name', 'winner__name'], Count('winner'), top=top)
 
     @staticmethod
     def team_bat_first(year):
@@ -214,24 +299,24 @@ class SeasonMatch(models.Model):
         :param year:
         :return:
         """
-        qs = SeasonMatch.objects.values('toss_won_by')
-        only_bat = qs.filter(season__year=year, toss_decision=TossDecision.BAT.value).count()
-        bat_and_ball = qs.filter(season__year=year,
-                                 toss_decision__in=[TossDecision.BAT.value, TossDecision.FIELD.value]).count()
+        totals = TeamSeasonLedger.objects.filter(season__year=year).aggregate(
+            only_bat=Sum('bat_first'), field=Sum('field_first'))
+        only_bat = totals['only_bat'] or 0
+        bat_and_ball = only_bat + (totals['field'] or 0)
         if bat_and_ball > 0:
             return {'percent_team_decided_bat_first': round((only_bat * 100) / bat_and_ball, 2)}
         return {'percent_team_decided_bat_first': 0}
 
     @staticmethod
-    def most_hosted_match_location(year):
+    def most_hosted_match_location(year, top=1):
         """
         location hosted most number of matches
         :param year:
+        :param top: locations of top N hosted match counts, tied locations included
         :return:
         """
         qs = SeasonMatch.objects.filter(season__year=year)
-        qs = qs.values('venue__name').annotate(count=Count('venue')).order_by('-count')
-        return qs[:1]
+        return ranked_groups(qs, ['venue__name'], Count('venue'), top=top)
 
     @staticmethod
     def highest_run_margin(year):
@@ -245,17 +330,16 @@ class SeasonMatch(models.Model):
         return qs.filter(score=margin['margin']).values('winner__name', 'score')
 
     @staticmethod
-    def team_highest_wicket(year):
+    def team_highest_wicket(year, top=None):
         """
         season teams total wickets
         :param year:
+        :param top: teams of top N wicket counts, all teams if not given
         :return:
         """
-        wickets = list(DismissalKind.get_reverse_choice_dict().values())
-        wickets.pop(DismissalKind.NOT_OUT.value)
-        qs = SeasonTeamPlay.objects.filter(match__season__year=year, dismissal_kind__in=wickets)
-        qs = qs.values('bowling_by__name').annotate(count=Count('pk')).order_by('-count')
-        return qs
+        # wickets of bowling team counted into ledger at import, deliveries are not scanned
+        qs = TeamSeasonLedger.objects.filter(season__year=year, wickets__gt=0)
+        return ranked_groups(qs, ['team__name'], Sum('wickets'), top=top, labels={'team__name': 'bowling_by__name'})
 
     @staticmethod
     def team_won_by_highest_wickets(year):
@@ -269,17 +353,152 @@ class SeasonMatch(models.Model):
         return qs.filter(score=wickets['wickets']).values('winner__name', 'score')
 
     @staticmethod
-    def team_won_toss_matches(year):
+    def team_won_toss_matches(year, top=None):
         """
         teams won the matches and toss both with their respective counts
         :param year:
+        :param top: teams of top N counts, all teams if not given
         :return:
         """
-        qs = SeasonMatch.objects.filter(season__year=year, result=MatchResult.NORMAL.value)
-        qs_win_toss = qs.values_list('toss_won_by__id', flat=True).distinct()
-        qs = SeasonMatch.objects.filter(season__year=year, result=MatchResult.NORMAL.value,
-                                        winner__id__in=list(qs_win_toss))
-        return qs.values('winner__name').annotate(count=Count('pk')).order_by('-count')
+        # wins of the teams won the toss of any match with normal result
+        qs = TeamSeasonLedger.objects.filter(season__year=year, normal_toss_wins__gt=0, wins__gt=0)
+        return ranked_groups(qs, ['team__name'], Sum('wins'), top=top, labels={'team__name': 'winner__name'})
+
+    @staticmethod
+    def seasons_stats(action_name, years, top=None):
+        """
+        stats action result of several seasons. each action runs a single query grouped by season
+        instead of one query per season
+        :param action_name:
+        :param years:
+        :param top: top N counts of leaderboard actions, default top of the action if not given
+        :return: year -> result (same shape as result of single season action)
+        """
+        top = top if top is not None else LEADERBOARD_TOP.get(action_name)
+        matches = SeasonMatch.objects.filter(season__year__in=years)
+        normal_matches = matches.filter(result=MatchResult.NORMAL.value)
+        ledger = TeamSeasonLedger.objects.filter(season__year__in=years)
+        res = dict()
+        if action_name == 'max_number_player_award':
+            res = group_by_season(matches, ['man_of_match__name'], Count('man_of_match'), top=top)
+        if action_name in ['highest_run_margin', 'team_won_by_highest_wickets']:
+            won_by = WonBy.RUNS.value if action_name == 'highest_run_margin' else WonBy.WICKETS.value
+            # highest score of the season by correlated subquery
+            margin = SeasonMatch.objects.filter(season=OuterRef('season'), won_by=won_by).values(
+                'season').annotate(margin=Max('score')).values('margin')
+            qs = matches.filter(won_by=won_by, score=Subquery(margin)).values('season__year', 'winner__name', 'score')
+            res = defaultdict(list)
+            for record in qs:
+                res[record.pop('season__year')].append(record)
+        if action_name == 'most_hosted_match_location':
+            res = group_by_season(matches, ['venue__name'], Count('venue'), top=top)
+        if action_name == 'team_bat_first':
+            qs = ledger.values('season__year').annotate(
+                only_bat=Sum('bat_first'), bat_and_ball=Sum('bat_first') + Sum('field_first')).order_by()
+            res = {record['season__year']: {'percent_team_decided_bat_first': round(
+                (record['only_bat'] * 100) / record['bat_and_ball'], 2) if record['bat_and_ball'] > 0 else 0}
+                for record in qs}
+        if action_name == 'most_win_location':
+            res = group_by_season(normal_matches, ['venue__name', 'winner__name'], Count('winner'), top=top)
+        if action_name in ['get_top_1_teams', 'get_top_4_teams']:
+            res = group_by_season(ledger.filter(wins__gt=0), ['team__name'], Sum('wins'), top=top,
+                                  labels={'team__name': 'winner__name'})
+        if action_name == 'most_toss':
+            res = group_by_season(ledger.filter(toss_wins__gt=0), ['team__name'], Sum('toss_wins'), top=top,
+                                  labels={'team__name': 'toss_won_by__name'})
+        if action_name == 'team_highest_wicket':
+            res = group_by_season(ledger.filter(wickets__gt=0), ['team__name'], Sum('wickets'), top=top,
+                                  labels={'team__name': 'bowling_by__name'})
+        if action_name == 'team_won_toss_matches':
+            # winner won the toss of any normal match of the same season
+            res = group_by_season(ledger.filter(normal_toss_wins__gt=0, wins__gt=0), ['team__name'], Sum('wins'),
+                                  top=top, labels={'team__name': 'winner__name'})
+        empty = {'percent_team_decided_bat_first': 0} if action_name == 'team_bat_first' else []
+        return {year: res.get(year, empty) for year in years}
+
+    @staticmethod
+    def season_summary(year):
+        """
+        result of every stats action of the season in one go
+        match level stats are counted by a few aggregate queries of season matches and team ledger, team wickets
+        (team_highest_wicket) by one more ledger query
+        :param year:
+        :return: action name -> result
+        """
+        res = SeasonMatch.match_summary(year)
+        res['team_highest_wicket'] = list(SeasonMatch.team_highest_wicket(year))
+        return {action_name: res[action_name] for action_name in STATS_ACTIONS}
+
+    @staticmethod
+    def match_summary(year):
+        """
+        match level stats of season summary (every stats action but team_highest_wicket), counted by the db with
+        grouped / filtered aggregates and team ledger, no match rows but the top margin ones are read
+        :param year:
+        :return: action name -> result
+        """
+        matches = SeasonMatch.objects.filter(season__year=year)
+        normal = Q(result=MatchResult.NORMAL.value)
+        # hosted matches and normal wins of every venue and winner, Count() skips null, null group still shows up
+        venue_wins = matches.values('venue_id', 'venue__name', 'winner_id', 'winner__name').annotate(
+            hosted=Count('venue'), normal=Count('pk', filter=normal), wins=Count('winner', filter=normal)).order_by()
+        awards = matches.values('man_of_match_id', 'man_of_match__name').annotate(
+            count=Count('man_of_match')).order_by()
+
+        def margin(won_by):
+            # highest score of the season by subquery
+            return Subquery(matches.filter(won_by=won_by).order_by().values('won_by').annotate(
+                margin=Max('score')).values('margin'))
+        margins = matches.filter(
+            Q(won_by=WonBy.RUNS.value, score=margin(WonBy.RUNS.value)) |
+            Q(won_by=WonBy.WICKETS.value, score=margin(WonBy.WICKETS.value))).values(
+            'won_by', 'winner__name', 'score').order_by('pk')
+        # team counters of the ledger, same as single season actions
+        ledger = TeamSeasonLedger.objects.filter(season__year=year).values(
+            'team_id', 'team__name', 'toss_wins', 'wins', 'normal_toss_wins', 'bat_first', 'field_first')
+
+        # counters are keyed by id, ties are ordered by id as the single season actions do
+        teams = {team['team_id']: team['team__name'] for team in ledger}
+        tosses = Counter({team['team_id']: team['toss_wins'] for team in ledger if team['toss_wins'] > 0})
+        wins = Counter({team['team_id']: team['wins'] for team in ledger if team['wins'] > 0})
+        toss_and_match_wins = Counter({team['team_id']: team['wins'] for team in ledger
+                                       if team['wins'] > 0 and team['normal_toss_wins'] > 0})
+        players = {award['man_of_match_id']: award['man_of_match__name'] for award in awards}
+        award_counts = Counter({award['man_of_match_id']: award['count'] for award in awards})
+        venues, hosted, win_locations = dict(), Counter(), Counter()
+        for group in venue_wins:
+            venues[group['venue_id']] = group['venue__name']
+            teams.setdefault(group['winner_id'], group['winner__name'])
+            hosted[group['venue_id']] += group['hosted']
+            if group['normal'] > 0:
+                win_locations[(group['venue_id'], group['winner_id'])] += group['wins']
+
+        def top_margin(won_by):
+            return [{'winner__name': match['winner__name'], 'score': match['score']} for match in margins
+                    if match['won_by'] == won_by]
+
+        top_wins = leaderboard(wins, teams, 'winner__name')
+        win_locations = sorted(win_locations.items(), key=lambda item: (
+            -item[1], item[0][0] is None, item[0][0] or 0, item[0][1] is None, item[0][1] or 0))
+        only_bat = sum(team['bat_first'] for team in ledger)
+        bat_and_ball = only_bat + sum(team['field_first'] for team in ledger)
+        return {
+            'get_top_4_teams': dense_top(top_wins, LEADERBOARD_TOP['get_top_4_teams']),
+            'most_toss': dense_top(leaderboard(tosses, teams, 'toss_won_by__name'), LEADERBOARD_TOP['most_toss']),
+            'max_number_player_award': dense_top(leaderboard(award_counts, players, 'man_of_match__name'),
+                                                 LEADERBOARD_TOP['max_number_player_award']),
+            'get_top_1_teams': dense_top(top_wins, LEADERBOARD_TOP['get_top_1_teams']),
+            'most_win_location': dense_top([{'venue__name': venues[venue], 'winner__name': teams[winner],
+                                             'count': count} for (venue, winner), count in win_locations],
+                                           LEADERBOARD_TOP['most_win_location']),
+            'team_bat_first': {'percent_team_decided_bat_first': round((only_bat * 100) / bat_and_ball, 2)
+                               if bat_and_ball > 0 else 0},
+            'most_hosted_match_location': dense_top(leaderboard(hosted, venues, 'venue__name'),
+                                                    LEADERBOARD_TOP['most_hosted_match_location']),
+            'highest_run_margin': top_margin(WonBy.RUNS.value),
+            'team_won_by_highest_wickets': top_margin(WonBy.WICKETS.value),
+            'team_won_toss_matches': leaderboard(toss_and_match_wins, teams, 'winner__name'),
+        }
 
 
 class DismissalKind(Choice):
@@ -313,11 +532,17 @@ class DismissalKind(Choice):
     default = NOT_OUT
 
 
+# dismissal kinds counted as wicket of bowling team
+WICKET_KINDS = [value for value, name in DismissalKind.get_choices() if value != DismissalKind.NOT_OUT.value]
+
+
 class SeasonTeamPlay(models.Model):
     """
     Season specific Team Play of batting and bowling
     """
     match = models.ForeignKey(SeasonMatch, on_delete=models.CASCADE)
+    # denormalized season of the match, season filters avoid joining deliveries with matches
+    season = models.ForeignKey(Season, on_delete=models.CASCADE)
     inning = models.IntegerField()
     batting_by = models.ForeignKey(Team, on_delete=models.SET_NULL, null=True, related_name='batting_team')
     bowling_by = models.ForeignKey(Team, on_delete=models.SET_NULL, null=True, related_name='bowling_team')
@@ -338,3 +563,218 @@ class SeasonTeamPlay(models.Model):
     dismissed = models.ForeignKey(Player, on_delete=models.SET_NULL, null=True, blank=True,
                                   related_name='player_dismissed')
     fielder = models.ForeignKey(Player, on_delete=models.SET_NULL, null=True, blank=True, related_name='player_fielder')
+
+    class Meta:
+        indexes = [
+            # wickets of ledger rebuild, partial index keeps only wicket deliveries (few % of all the deliveries)
+            models.Index(fields=['season', 'bowling_by'], name='play_wicket_season_idx',
+                         condition=Q(dismissal_kind__in=WICKET_KINDS)),
+            # deliveries API pages of a season, read in key order without sorting the season
+            models.Index(fields=['season', 'match', 'inning', 'over', 'ball', 'id'], name='play_season_ball_idx'),
+            # key of deliveries API keyset pagination, serves the range scans of every page. not unique, csv files
+            # may repeat a ball number (id breaks the tie)
+            models.Index(fields=['match', 'inning', 'over', 'ball', 'id'], name='play_ball_idx'),
+        ]
+
+    @staticmethod
+    def deliveries(season=None, match=None, team=None, player=None, after=None):
+        """
+        ball by ball deliveries in DELIVERY_KEY order, teams and players by name
+        :param season: season year
+        :param match: match id
+        :param team: batting or bowling team name
+        :param player: name of batsman, non striker, bowler, dismissed player or fielder
+        :param after: DELIVERY_KEY values, only deliveries after them
+        :return: values queryset
+        """
+        queryset = SeasonTeamPlay.objects.all()
+        if season is not None:
+            queryset = queryset.filter(season__year=season)
+        if match is not None:
+            queryset = queryset.filter(match_id=match)
+        if team is not None:
+            teams = Team.objects.filter(name=team).values('id')
+            queryset = queryset.filter(Q(batting_by__in=teams) | Q(bowling_by__in=teams))
+        if player is not None:
+            players = Player.objects.filter(name=player).values('id')
+            queryset = queryset.filter(Q(batsman__in=players) | Q(non_striker__in=players) | Q(bowler__in=players) |
+                                       Q(dismissed__in=players) | Q(fielder__in=players))
+        if after is not None:
+            queryset = queryset.filter(keyset_after(DELIVERY_KEY, after))
+        return queryset.order_by(*DELIVERY_KEY).values(
+            *DELIVERY_FIELDS, **{name: F(lookup) for name, lookup in DELIVERY_NAMES.items()})
+
+
+# keyset of deliveries, unique per delivery (id orders deliveries of repeated ball number)
+DELIVERY_KEY = ('match_id', 'inning', 'over', 'ball', 'id')
+DELIVERY_FIELDS = DELIVERY_KEY + ('is_super_over', 'wide_runs', 'bye_runs', 'leg_bye_runs', 'no_ball_runs',
+                                  'penalty_runs', 'batsman_runs', 'extra_runs', 'dismissal_kind')
+# output name -> lookup of related name, names must not clash with model fields
+DELIVERY_NAMES = {
+    'season_year': 'season__year',
+    'batting_team': 'batting_by__name',
+    'bowling_team': 'bowling_by__name',
+    'batsman_name': 'batsman__name',
+    'non_striker_name': 'non_striker__name',
+    'bowler_name': 'bowler__name',
+    'dismissed_name': 'dismissed__name',
+    'fielder_name': 'fielder__name',
+}
+
+
+def keyset_after(fields, values):
+    """
+    rows after the key in order of fields, (field_1, field_2, ...) > (value_1, value_2, ...)
+    bound of the first field lets db range scan the index of the key instead of reading skipped rows (OFFSET)
+    :param fields:
+    :param values:
+    :return: Q
+    """
+    condition = Q()
+    for index, (field, value) in enumerate(zip(fields, values)):
+        condition |= Q(**dict(zip(fields[:index], values[:index])), **{f'{field}__gt': value})
+    return Q(**{f'{fields[0]}__gte': values[0]}) & condition
+
+
+class TeamSeasonLedger(models.Model):
+    """
+    Rollup of team counters of the season, one record per team and season
+    updated incrementally whenever matches / deliveries are inserted (importer and post_save signals)
+    """
+    season = models.ForeignKey(Season, on_delete=models.CASCADE)
+    team = models.ForeignKey(Team, on_delete=models.CASCADE)
+    matches = models.IntegerField(default=0)
+    # wins of matches with normal result
+    wins = models.IntegerField(default=0)
+    toss_wins = models.IntegerField(default=0)
+    # toss wins of matches with normal result
+    normal_toss_wins = models.IntegerField(default=0)
+    bat_first = models.IntegerField(default=0)
+    field_first = models.IntegerField(default=0)
+    wickets = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            # stats read all the teams of the season
+            models.UniqueConstraint(fields=['season', 'team'], name='ledger_season_team_uniq'),
+        ]
+
+    @staticmethod
+    def match_deltas(matches, deltas=None):
+        """
+        counter deltas of inserted matches
+        :param matches: iterable of dicts with season_id, team_1_id, team_2_id, toss_won_by_id, toss_decision,
+        result and winner_id
+        :param deltas: (season_id, team_id) -> Counter, new one if not given
+        :return: deltas
+        """
+        deltas = deltas if deltas is not None else defaultdict(Counter)
+        for match in matches:
+            season_id = match['season_id']
+            deltas[(season_id, match['team_1_id'])]['matches'] += 1
+            deltas[(season_id, match['team_2_id'])]['matches'] += 1
+            toss = deltas[(season_id, match['toss_won_by_id'])]
+            toss['toss_wins'] += 1
+            if match['toss_decision'] == TossDecision.BAT.value:
+                toss['bat_first'] += 1
+            if match['toss_decision'] == TossDecision.FIELD.value:
+                toss['field_first'] += 1
+            if match['result'] == MatchResult.NORMAL.value:
+                toss['normal_toss_wins'] += 1
+                if match['winner_id'] is not None:
+                    deltas[(season_id, match['winner_id'])]['wins'] += 1
+        return deltas
+
+    @classmethod
+    def apply(cls, deltas):
+        """
+        add counter deltas to ledger records, missing records are created first
+        :param deltas: (season_id, team_id) -> Counter
+        :return:
+        """
+        deltas = {key: delta for key, delta in deltas.items() if key[1] is not None and any(delta.values())}
+        if not deltas:
+            return
+        # conflicts ignored, record may be created by another importer meanwhile
+        cls.objects.bulk_create([cls(season_id=season_id, team_id=team_id) for season_id, team_id in deltas],
+                                ignore_conflicts=True)
+        for (season_id, team_id), delta in deltas.items():
+            cls.objects.filter(season_id=season_id, team_id=team_id).update(
+                **{counter: F(counter) + value for counter, value in delta.items() if value})
+
+    @classmethod
+    def rebuild(cls, years=None):
+        """
+        recount ledger of given seasons from matches and deliveries
+        :param years: all seasons if not given
+        :return:
+        """
+        matches = SeasonMatch.objects.all()
+        deliveries = SeasonTeamPlay.objects.filter(dismissal_kind__in=WICKET_KINDS)
+        ledger = cls.objects.all()
+        if years is not None:
+            matches = matches.filter(season__year__in=years)
+            deliveries = deliveries.filter(season__year__in=years)
+            ledger = ledger.filter(season__year__in=years)
+        ledger.delete()
+        deltas = cls.match_deltas(matches.values('season_id', 'team_1_id', 'team_2_id', 'toss_won_by_id',
+                                                 'toss_decision', 'result', 'winner_id').iterator())
+        # wickets are counted by the db, deliveries are too many to be read
+        for record in deliveries.values('season_id', 'bowling_by_id').annotate(count=Count('pk')).order_by():
+            deltas[(record['season_id'], record['bowling_by_id'])]['wickets'] += record['count']
+        cls.apply(deltas)
+
+
+# SeasonMatch stats actions exposed by api
+STATS_ACTIONS = ('get_top_4_teams', 'most_toss', 'max_number_player_award', 'get_top_1_teams', 'most_win_location',
+                 'team_bat_first', 'most_hosted_match_location', 'highest_run_margin', 'team_highest_wicket',
+                 'team_won_by_highest_wickets', 'team_won_toss_matches')
+
+# leaderboard actions -> default top N counts (None for all records), top N can be changed by api
+LEADERBOARD_TOP = {'get_top_4_teams': 4, 'most_toss': 1, 'max_number_player_award': 1, 'get_top_1_teams': 1,
+                   'most_win_location': 1, 'most_hosted_match_location': 1, 'team_highest_wicket': None,
+                   'team_won_toss_matches': None}
+
+
+class SeasonStatsSnapshot(models.Model):
+    """
+    Serialized result of every stats action of the season
+    season data never changes after import, so stats are computed once per import instead of per request
+    """
+    year = models.IntegerField(primary_key=True)
+    stats = models.JSONField(default=dict)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    @staticmethod
+    def compute(year):
+        """
+        run every stats action of the season
+        :param year:
+        :return: action name -> serialized result
+        """
+        stats = dict()
+        for action_name in STATS_ACTIONS:
+            result = getattr(SeasonMatch, action_name)(year)
+            stats[action_name] = result if isinstance(result, dict) else list(result)
+        return stats
+
+    @classmethod
+    def rebuild(cls, years=None):
+        """
+        compute and save snapshot of given seasons
+        :param years: all seasons if not given
+        :return:
+        """
+        if years is None:
+            years = Season.objects.values_list('year', flat=True)
+        for year in years:
+            cls.objects.update_or_create(year=year, defaults={'stats': cls.compute(year)})
+
+
+class DatasetVersion(models.Model):
+    """
+    Version of imported data set, single record. bumped whenever seasons are imported
+    used to validate http caches (ETag / Last-Modified) of stats responses
+    """
+    version = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
@@ -0,0 +1,109 @@
+import json
+import os
+import pstats
+import re
+import tempfile
+import uuid
+
+from django.conf import settings
+from django.utils import timezone
+
+# ?profile= query param / X-Profile header options, comma separated, any other value just profiles the request
+RETURN_OPTION = 'return'  # respond with profile summary instead of the response
+NOCACHE_OPTION = 'nocache'  # skip stats result cache lookups, profile the computation
+PROFILE_ID = re.compile(r'^[\w-]+$')
+PROFILE_SUFFIXES = ('prof', 'json')
+
+
+def profile_dir():
+    """
+    directory of stored profiles, PROFILE_DIR setting or season_profiles at temp directory
+    :return:
+    """
+    return getattr(settings, 'PROFILE_DIR', None) or os.path.join(tempfile.gettempdir(), 'season_profiles')
+
+
+def profile_options(request):
+    """
+    profiling options requested by ?profile= query param or X-Profile header
+    :param request:
+    :return: set of options, None if profiling is not requested
+    """
+    value = request.GET.get('profile', request.headers.get('X-Profile'))
+    if value is None:
+        return None
+    return {option.strip().lower() for option in value.split(',')}
+
+
+def top_functions(profiler, limit):
+    """
+    functions of the profile taking most cumulative time
+    :param profiler: finished cProfile.Profile
+    :param limit:
+    :return:
+    """
+    stats = pstats.Stats(profiler).stats
+    res = sorted(stats.items(), key=lambda item: -item[1][3])[:limit]
+    return [{
+        'function': pstats.func_std_string(function),
+        'calls': calls,
+        'primitive_calls': primitive_calls,
+        'tottime_ms': round(total_time * 1000, 3),
+        'cumtime_ms': round(cumulative_time * 1000, 3),
+    } for function, (primitive_calls, calls, total_time, cumulative_time, _) in res]
+
+
+def profile_summary(request, response, profiler, queries, wall_ms):
+    """
+    top N functions by cumulative time and sql executed in order
+    :param request:
+    :param response:
+    :param profiler: finished cProfile.Profile
+    :param queries: (sql, params, milliseconds) of the request
+    :param wall_ms:
+    :return:
+    """
+    return {
+        'method': request.method,
+        'path': request.get_full_path(),
+        'status': response.status_code,
+        'created_at': timezone.now().isoformat(),
+        'wall_ms': round(wall_ms, 2),
+        'queries': len(queries),
+        'db_ms': round(sum(query[2] for query in queries), 2),
+        'top_functions': top_functions(profiler, getattr(settings, 'PROFILE_TOP', 30)),
+        'sql': [{'sql': sql, 'params': repr(params)[:500], 'ms': round(milliseconds, 2)}
+                for sql, params, milliseconds in queries],
+    }
+
+
+def store_profile(profiler, summary, action):
+    """
+    write pstats file (python -m pstats / snakeviz) and summary json to profile directory
+    :param profiler: finished cProfile.Profile
+    :param summary: profile_summary
+    :param action: action name of the request, part of profile id
+    :return: profile id
+    """
+    directory = profile_dir()
+    os.makedirs(directory, exist_ok=True)
+    action = re.sub(r'[^-\w]', '_', action)
+    profile_id = f'{timezone.now():%Y%m%d%H%M%S}-{action}-{uuid.uuid4().hex[:8]}'
+    summary['id'] = profile_id
+    profiler.dump_stats(os.path.join(directory, f'{profile_id}.prof'))
+    with open(os.path.join(directory, f'{profile_id}.json'), 'w') as summary_file:
+        json.dump(summary, summary_file, indent=2)
+    return profile_id
+
+
+def profile_path(profile_id, suffix):
+    """
+    path of stored profile file
+    :param profile_id:
+    :param suffix: prof or json
+    :return: None if profile id or suffix is not valid or file does not exist
+    """
+    if not PROFILE_ID.match(profile_id) or suffix not in PROFILE_SUFFIXES:
+        return None
+    path = os.path.join(profile_dir(), f'{profile_id}.{suffix}')
+    return path if os.path.isfile(path) else None
@@ -0,0 +1,128 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from season.models import DatasetVersion, Season
+
+DATASET_VERSION_CACHE_KEY = 'season:dataset:version'
+
+
+def shared_cache():
+    """
+    cache shared between worker processes, configured by SEASON_REGISTRY_CACHE setting
+    :return: None if not configured
+    """
+    alias = getattr(settings, 'SEASON_REGISTRY_CACHE', None)
+    return caches[alias] if alias else None
+
+
+def dataset_version():
+    """
+    current data set version. read from db (single primary key read) or from shared cache
+    never kept in process, another process may import new data at any time
+    :return: dict of version and updated_at (None if nothing imported yet)
+    """
+    cache = shared_cache()
+    current = cache.get(DATASET_VERSION_CACHE_KEY) if cache else None
+    if current is None:
+        current = DatasetVersion.objects.filter(pk=1).values('version', 'updated_at').first() or {
+            'version': 0, 'updated_at': None}
+        if cache:
+            cache.set(DATASET_VERSION_CACHE_KEY, current, timeout=None)
+    return current
+
+
+def bump_dataset_version():
+    """
+    new data set imported, invalidates every http cache validator of stats responses
+    :return:
+    """
+    with transaction.atomic():
+        DatasetVersion.objects.get_or_create(pk=1)
+        DatasetVersion.objects.filter(pk=1).update(version=F('version') + 1, updated_at=timezone.now())
+    cache = shared_cache()
+    if cache:
+        # other workers must not cache old version again before import is committed
+        transaction.on_commit(lambda: cache.delete(DATASET_VERSION_CACHE_KEY))
+
+
+class SeasonRegistry:
+    """
+    Registry of available season years, avoids db hit on every season validation
+    years are loaded lazily per worker process together with the data set version they were loaded at, and reloaded
+    once the version changes (seasons imported by another process). when SEASON_REGISTRY_CACHE setting names a
+    django cache alias the loaded years are shared between worker processes through that cache
+    """
+    cache_key = 'season:registry:years'
+
+    def __init__(self):
+        # (data set version, frozenset of years)
+        self._loaded = None
+
+    @property
+    def cache(self):
+        """
+        shared cache configured by SEASON_REGISTRY_CACHE setting, None for in process registry
+        :return:
+        """
+        return shared_cache()
+
+    def years_of(self, version):
+        """
+        frozenset of season years available at data set version
+        :param version: current data set version, e.g. read once per request
+        :return:
+        """
+        loaded = self._loaded
+        if loaded is not None and loaded[0] == version:
+            return loaded[1]
+        cache = self.cache
+        loaded = cache.get(self.cache_key) if cache else None
+        if loaded is None or loaded[0] != version:
+            loaded = (version, frozenset(Season.objects.values_list('year', flat=True)))
+            if cache:
+                cache.set(self.cache_key, loaded, timeout=None)
+        self._loaded = loaded
+        return loaded[1]
+
+    @property
+    def years(self):
+        """
+        frozenset of season years available at current data set version
+        :return:
+        """
+        return self.years_of(dataset_version()['version'])
+
+    @property
+    def min_year(self):
+        """
+
+        :return:
+        """
+        return min(self.years, default=None)
+
+    @property
+    def max_year(self):
+        """
+
+        :return:
+        """
+        return max(self.years, default=None)
+
+    def __contains__(self, year):
+        return year in self.years
+
+    def invalidate(self):
+        """
+        forget loaded years, next access reloads them from db
+        :return:
+        """
+        self._loaded = None
+        cache = self.cache
+        if cache:
+            cache.delete(self.cache_key)
+
+
+season_registry = SeasonRegistry()
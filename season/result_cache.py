@@ -0,0 +1,188 @@
+import contextvars
+import threading
+from collections import Counter, OrderedDict
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import caches
+
+# results are computed without cache lookups in this context, e.g. profiled request
+_bypass = contextvars.ContextVar('bypass_result_cache', default=False)
+
+
+@contextmanager
+def bypass_result_cache():
+    """
+    stats results computed inside the block are not looked up at cache (still stored)
+    :return:
+    """
+    token = _bypass.set(True)
+    try:
+        yield
+    finally:
+        _bypass.reset(token)
+
+
+def evaluate(result):
+    """
+    run lazy queryset of ORM stats action, cached results are shared by concurrent requests and must not query
+    :param result:
+    :return:
+    """
+    return result if isinstance(result, dict) else list(result)
+
+
+class StatsResultCache:
+    """
+    Two tier cache of stats results keyed by (action, season years, data set version)
+    in process LRU tier (STATS_RESULT_CACHE_SIZE entries) in front of django cache alias (STATS_RESULT_CACHE),
+    e.g. local memory, file based or redis cache. importing new data bumps data set version, so results of old
+    data set are never hit again and age out of both tiers
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.local = OrderedDict()
+        self.counters = Counter()
+
+    @property
+    def shared(self):
+        """
+        shared tier configured by STATS_RESULT_CACHE setting, None if not configured
+        :return:
+        """
+        alias = getattr(settings, 'STATS_RESULT_CACHE', None)
+        return caches[alias] if alias else None
+
+    @staticmethod
+    def key(action_name, years, version, top=None):
+        """
+
+        :param action_name:
+        :param years: season year or list of years
+        :param version: data set version
+        :param top: top N counts of leaderboard action
+        :return:
+        """
+        years = '-'.join(str(year) for year in years) if isinstance(years, (list, tuple)) else years
+        return f'stats:result:{version}:{action_name}:{years}:{top or ""}'
+
+    def get_local(self, key):
+        """
+        LRU read, hit becomes most recently used
+        :param key:
+        :return:
+        """
+        with self.lock:
+            if key not in self.local:
+                return None
+            self.local.move_to_end(key)
+            return self.local[key]
+
+    def set_local(self, key, result):
+        """
+        LRU write, least recently used entries are evicted above the size limit
+        :param key:
+        :param result:
+        :return:
+        """
+        size = getattr(settings, 'STATS_RESULT_CACHE_SIZE', 1024)
+        if size <= 0:
+            return
+        with self.lock:
+            self.local[key] = result
+            self.local.move_to_end(key)
+            while len(self.local) > size:
+                self.local.popitem(last=False)
+                self.counters['evictions'] += 1
+
+    def count(self, name):
+        """
+        counters are updated by concurrent request threads
+        :param name:
+        :return:
+        """
+        with self.lock:
+            self.counters[name] += 1
+
+    def get(self, key):
+        """
+        cached result from in process tier, then from shared tier
+        :param key: see key()
+        :return: None on miss
+        """
+        if _bypass.get():
+            self.count('bypassed')
+            return None
+        result = self.get_local(key)
+        if result is not None:
+            self.count('local_hits')
+            return result
+
+        shared = self.shared
+        result = shared.get(key) if shared else None
+        if result is not None:
+            self.count('shared_hits')
+            self.set_local(key, result)
+            return result
+        self.count('misses')
+        return None
+
+    def set(self, key, result):
+        """
+        store result into both tiers
+        :param key: see key()
+        :param result:
+        :return:
+        """
+        shared = self.shared
+        if shared:
+            shared.set(key, result, timeout=getattr(settings, 'STATS_RESULT_CACHE_TIMEOUT', None))
+        self.set_local(key, result)
+
+    def get_or_compute(self, action_name, years, version, compute, top=None):
+        """
+        cached result of stats action, computed and stored on miss
+        :param action_name:
+        :param years: season year or list of years
+        :param version: data set version
+        :param compute: callable computing the result, lazy querysets are evaluated before they are stored
+        :param top: top N counts of leaderboard action
+        :return:
+        """
+        key = self.key(action_name, years, version, top)
+        result = self.get(key)
+        if result is None:
+            result = evaluate(compute())
+            self.set(key, result)
+        return result
+
+    def stats(self):
+        """
+        hit / miss counters of this worker process
+        :return:
+        """
+        with self.lock:
+            counters, local_size = Counter(self.counters), len(self.local)
+        lookups = counters['local_hits'] + counters['shared_hits'] + counters['misses']
+        hits = counters['local_hits'] + counters['shared_hits']
+        return {
+            'local_hits': counters['local_hits'],
+            'shared_hits': counters['shared_hits'],
+            'misses': counters['misses'],
+            'evictions': counters['evictions'],
+            'bypassed': counters['bypassed'],
+            'hit_ratio': round(hits / lookups, 4) if lookups else 0,
+            'local_size': local_size,
+        }
+
+    def clear(self):
+        """
+        drop in process tier and reset counters
+        :return:
+        """
+        with self.lock:
+            self.local.clear()
+            self.counters.clear()
+
+
+stats_result_cache = StatsResultCache()
@@ -0,0 +1,52 @@
+from collections import Counter
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from season.models import Season, SeasonMatch, SeasonTeamPlay, TeamSeasonLedger, WICKET_KINDS
+from season.registry import bump_dataset_version, season_registry
+
+
+@receiver(post_save, sender=Season)
+@receiver(post_delete, sender=Season)
+def invalidate_season_registry(sender, **kwargs):
+    """
+    season added / removed, data set version is bumped so season registry of every worker process is reloaded on
+    next validation. bulk_create does not send signals, importers bump version and invalidate registry explicitly
+    :param sender:
+    :param kwargs:
+    :return:
+    """
+    bump_dataset_version()
+    season_registry.invalidate()
+
+
+@receiver(post_save, sender=SeasonMatch)
+def add_match_to_ledger(sender, instance, created, raw=False, **kwargs):
+    """
+    count match saved one by one into team season ledger
+    bulk inserts do not send signals, importers update ledger explicitly
+    :param sender:
+    :param instance:
+    :param created:
+    :param raw: fixture loading
+    :param kwargs:
+    :return:
+    """
+    if created and not raw:
+        TeamSeasonLedger.apply(TeamSeasonLedger.match_deltas([vars(instance)]))
+
+
+@receiver(post_save, sender=SeasonTeamPlay)
+def add_delivery_to_ledger(sender, instance, created, raw=False, **kwargs):
+    """
+    count wicket of delivery saved one by one into team season ledger
+    :param sender:
+    :param instance:
+    :param created:
+    :param raw: fixture loading
+    :param kwargs:
+    :return:
+    """
+    if created and not raw and instance.dismissal_kind in WICKET_KINDS:
+        TeamSeasonLedger.apply({(instance.season_id, instance.bowling_by_id): Counter(wickets=1)})
@@ -0,0 +1,284 @@
+import datetime
+import os
+
+import numpy as np
+import pandas as pd
+
+# csv columns expected by InitialDataProcessor, same order as bundled season/migrations csv files
+MATCH_COLUMNS = ['id', 'season', 'city', 'date', 'team1', 'team2', 'toss_winner', 'toss_decision', 'result',
+                 'dl_applied', 'winner', 'win_by_runs', 'win_by_wickets', 'player_of_match', 'venue', 'umpire1',
+                 'umpire2', 'umpire3']
+DELIVERY_COLUMNS = ['match_id', 'inning', 'batting_team', 'bowling_team', 'over', 'ball', 'batsman', 'non_striker',
+                    'bowler', 'is_super_over', 'wide_runs', 'bye_runs', 'legbye_runs', 'noball_runs', 'penalty_runs',
+                    'batsman_runs', 'extra_runs', 'total_runs', 'player_dismissed', 'dismissal_kind', 'fielder']
+
+# match level rates of bundled matches.csv
+TOSS_FIELD_RATE = 0.571
+TIE_RATE = 0.011
+NO_RESULT_RATE = 0.005
+DL_APPLIED_RATE = 0.025
+
+# ball by ball rates of T20 deliveries: runs off the bat, extras and dismissals
+BATSMAN_RUNS = np.array([0, 1, 2, 3, 4, 6])
+BATSMAN_RUNS_RATES = np.array([0.37, 0.37, 0.065, 0.003, 0.125, 0.055])
+# delivery kinds: legal, wide, no ball, byes, leg byes
+LEGAL, WIDE, NO_BALL, BYE, LEG_BYE = range(5)
+DELIVERY_KIND_RATES = np.array([0.953, 0.031, 0.004, 0.002, 0.01])
+WICKET_RATE = 0.049
+DISMISSAL_KINDS = np.array(['caught', 'bowled', 'run out', 'lbw', 'stumped', 'caught and bowled', 'retired hurt',
+                            'hit wicket', 'obstructing the field'], dtype=object)
+DISMISSAL_KIND_RATES = np.array([0.61, 0.18, 0.1, 0.06, 0.03, 0.015, 0.003, 0.0015, 0.0005])
+# dismissals credited to a fielder, stumped by the wicket keeper
+FIELDER_KINDS = ('caught', 'run out')
+
+# T20 innings
+OVERS = 20
+BALLS_PER_OVER = 6
+WICKETS = 10
+# deliveries drawn per innings, enough to bowl 120 legal balls with extras
+MAX_DELIVERIES = 170
+PLAYING_XI = 11
+BOWLERS = 5
+
+
+def rates(values):
+    """
+    probabilities normalized to 1
+    :param values:
+    :return:
+    """
+    values = np.asarray(values, dtype=float)
+    return values / values.sum()
+
+
+class DatasetGenerator:
+    """
+    Synthetic IPL like matches and deliveries in the csv schema of InitialDataProcessor
+    every season is a double round robin of all teams plus 4 playoff matches. both innings are simulated ball by
+    ball, team strengths of the season skew run and wicket rates, so leaderboards are not uniform. result,
+    margins and player of the match follow from the simulated deliveries. same seed gives same files
+    """
+    def __init__(self, seasons=10, start_year=2008, teams=8, players=18, umpires=40, seed=None):
+        """
+
+        :param seasons: number of seasons
+        :param start_year: year of first season
+        :param teams: teams playing every season
+        :param players: squad size of every team, at least 11
+        :param umpires: umpire pool size
+        :param seed: random seed
+        """
+        if teams < 2 or players < PLAYING_XI or umpires < 2:
+            raise ValueError(f'at least 2 teams, {PLAYING_XI} players per team and 2 umpires are needed')
+        self.seasons = seasons
+        self.start_year = start_year
+        self.rng = np.random.default_rng(seed)
+        self.teams = [f'Team {number:02d}' for number in range(1, teams + 1)]
+        # every team has a home city and stadium
+        self.cities = [f'City {number:02d}' for number in range(1, teams + 1)]
+        self.venues = [f'Stadium {number:02d}' for number in range(1, teams + 1)]
+        self.squads = [np.array([f'{team} P{number}' for number in range(players)], dtype=object)
+                       for team in self.teams]
+        self.umpires = [f'Umpire {number:02d}' for number in range(1, umpires + 1)]
+
+    def innings(self, batting_xi, bowling_xi, edge, target=None):
+        """
+        ball by ball innings, ends after 20 overs, 10 wickets or when target is passed
+        :param batting_xi: batting order
+        :param bowling_xi: playing XI of fielding team, last 5 bowl
+        :param edge: batting team strength minus bowling team strength
+        :param target: runs to pass in second innings
+        :return: delivery columns, runs, wickets
+        """
+        rng = self.rng
+        size = MAX_DELIVERIES
+        kind = rng.choice(5, size=size, p=DELIVERY_KIND_RATES)
+        # stronger batting side hits more boundaries and gets out less
+        run_rates = BATSMAN_RUNS_RATES * np.exp(edge * np.array([-1, 0, 0, 0, 1, 1]))
+        batsman_runs = rng.choice(BATSMAN_RUNS, size=size, p=rates(run_rates))
+        extra = np.where(rng.random(size) < 0.9, 1, 4)
+        wide_runs = np.where(kind == WIDE, extra, 0)
+        bye_runs = np.where(kind == BYE, extra, 0)
+        legbye_runs = np.where(kind == LEG_BYE, extra, 0)
+        noball_runs = (kind == NO_BALL).astype(int)
+        batsman_runs[(kind == WIDE) | (kind == BYE) | (kind == LEG_BYE)] = 0
+        wicket = (kind == LEGAL) & (rng.random(size) < WICKET_RATE * np.exp(-edge))
+        batsman_runs[wicket] = 0
+        legal = (kind != WIDE) & (kind != NO_BALL)
+
+        extra_runs = wide_runs + bye_runs + legbye_runs + noball_runs
+        total_runs = batsman_runs + extra_runs
+        runs = np.cumsum(total_runs)
+        wickets = np.cumsum(wicket)
+        legal_balls = np.cumsum(legal)
+        ended = (legal_balls >= OVERS * BALLS_PER_OVER) | (wickets >= WICKETS)
+        if target is not None:
+            ended |= runs > target
+        end = int(np.argmax(ended)) + 1 if ended.any() else size
+        legal_before = (legal_balls - legal)[:end]
+
+        over = legal_before // BALLS_PER_OVER
+        over_starts = np.searchsorted(over, np.arange(over[-1] + 1))
+        ball = np.arange(end) - over_starts[over] + 1
+        # batsmen at the crease are next two of the batting order, strike changes on odd runs and over end
+        wickets_before = (wickets - wicket)[:end]
+        odd_runs = (batsman_runs[:end] + bye_runs[:end] + legbye_runs[:end]) % 2
+        strike = (np.cumsum(odd_runs) - odd_runs + over) % 2
+        batsman = batting_xi[np.minimum(wickets_before + strike, PLAYING_XI - 1)]
+        non_striker = batting_xi[np.minimum(wickets_before + 1 - strike, PLAYING_XI - 1)]
+        bowler = bowling_xi[PLAYING_XI - BOWLERS + over % BOWLERS]
+
+        wicket = wicket[:end]
+        kinds = np.full(end, '', dtype=object)
+        kinds[wicket] = rng.choice(DISMISSAL_KINDS, size=int(wicket.sum()), p=rates(DISMISSAL_KIND_RATES))
+        fielder = np.full(end, '', dtype=object)
+        fielded = np.isin(kinds, FIELDER_KINDS)
+        fielder[fielded] = rng.choice(bowling_xi[:PLAYING_XI - BOWLERS], size=int(fielded.sum()))
+        # second in the fielding order keeps wicket
+        fielder[kinds == 'stumped'] = bowling_xi[1]
+        columns = {
+            'over': over + 1,
+            'ball': ball,
+            'batsman': batsman,
+            'non_striker': non_striker,
+            'bowler': bowler,
+            'is_super_over': np.zeros(end, dtype=int),
+            'wide_runs': wide_runs[:end],
+            'bye_runs': bye_runs[:end],
+            'legbye_runs': legbye_runs[:end],
+            'noball_runs': noball_runs[:end],
+            'penalty_runs': np.zeros(end, dtype=int),
+            'batsman_runs': batsman_runs[:end],
+            'extra_runs': extra_runs[:end],
+            'total_runs': total_runs[:end],
+            'player_dismissed': np.where(wicket, batsman, ''),
+            'dismissal_kind': kinds,
+            'fielder': fielder,
+        }
+        return columns, int(runs[end - 1]), int(wickets[end - 1])
+
+    def match(self, match_id, year, date, team1, team2, strengths, venue=None):
+        """
+        one match, team1 is the home team
+        :param match_id:
+        :param year:
+        :param date:
+        :param team1: team index
+        :param team2: team index
+        :param strengths: season team strengths
+        :param venue: venue index, home venue of team1 if not given
+        :return: match row, delivery columns (None for no result), winner team index
+        """
+        rng = self.rng
+        venue = team1 if venue is None else venue
+        toss_winner = team1 if rng.random() < 0.5 else team2
+        field = rng.random() < TOSS_FIELD_RATE
+        other = team2 if toss_winner == team1 else team1
+        first, second = (other, toss_winner) if field else (toss_winner, other)
+        umpires = rng.choice(len(self.umpires), size=2, replace=False)
+        row = {
+            'id': match_id, 'season': year, 'city': self.cities[venue], 'date': date.isoformat(),
+            'team1': self.teams[team1], 'team2': self.teams[team2], 'toss_winner': self.teams[toss_winner],
+            'toss_decision': 'field' if field else 'bat', 'result': 'normal', 'dl_applied': 0, 'winner': '',
+            'win_by_runs': 0, 'win_by_wickets': 0, 'player_of_match': '', 'venue': self.venues[venue],
+            'umpire1': self.umpires[umpires[0]], 'umpire2': self.umpires[umpires[1]], 'umpire3': '',
+        }
+        if rng.random() < NO_RESULT_RATE:
+            # washed out before a ball is bowled
+            row['result'] = 'no result'
+            return row, None, None
+
+        xi = {team: rng.permutation(self.squads[team])[:PLAYING_XI] for team in (first, second)}
+        edge = strengths[first] - strengths[second]
+        innings_1, runs_1, _ = self.innings(xi[first], xi[second], edge)
+        # small random target shift turns close finishes into ties at the bundled tie rate
+        target = runs_1 - 1 if rng.random() < TIE_RATE else runs_1
+        innings_2, runs_2, wickets_2 = self.innings(xi[second], xi[first], -edge, target=target)
+        if runs_2 > runs_1:
+            winner, loser = second, first
+            row['win_by_wickets'] = WICKETS - wickets_2
+        elif runs_2 < runs_1:
+            winner, loser = first, second
+            row['win_by_runs'] = runs_1 - runs_2
+        else:
+            # tie decided by super over
+            row['result'] = 'tie'
+            winner, loser = (first, second) if rng.random() < 0.5 else (second, first)
+        row['winner'] = self.teams[winner]
+        row['dl_applied'] = int(row['result'] == 'normal' and rng.random() < DL_APPLIED_RATE)
+        # top scorer of the winning side
+        batting = innings_1 if winner == first else innings_2
+        scorers = pd.Series(batting['batsman_runs']).groupby(batting['batsman']).sum()
+        row['player_of_match'] = scorers.idxmax()
+
+        deliveries = list()
+        for inning, (batting_team, bowling_team, columns) in enumerate(
+                ((first, second, innings_1), (second, first, innings_2)), start=1):
+            size = len(columns['over'])
+            deliveries.append({
+                'match_id': np.full(size, match_id), 'inning': np.full(size, inning),
+                'batting_team': np.full(size, self.teams[batting_team], dtype=object),
+                'bowling_team': np.full(size, self.teams[bowling_team], dtype=object), **columns})
+        return row, deliveries, (winner, loser)
+
+    def season(self, year, first_id):
+        """
+        double round robin and playoffs (qualifier 1, eliminator, qualifier 2, final) of the season
+        :param year:
+        :param first_id: match id of first match
+        :return: match rows, delivery column dicts
+        """
+        rng = self.rng
+        teams = len(self.teams)
+        strengths = rng.normal(0, 0.1, size=teams)
+        fixtures = [(home, away) for home in range(teams) for away in range(teams) if home != away]
+        fixtures = [fixtures[index] for index in rng.permutation(len(fixtures))]
+        start = datetime.date(year, 4, 5)
+        rows, deliveries = list(), list()
+        wins = np.zeros(teams)
+
+        def play(team1, team2, venue=None):
+            row, match_deliveries, result = self.match(
+                first_id + len(rows), year, start + datetime.timedelta(days=len(rows) // 2), team1, team2,
+                strengths, venue)
+            rows.append(row)
+            deliveries.extend(match_deliveries or [])
+            if result is None:
+                # no result, home team goes through
+                return team1, team2
+            wins[result[0]] += 1
+            return result
+
+        for home, away in fixtures:
+            play(home, away)
+        if teams >= 4:
+            # standings by wins, ties broken by strength
+            top = sorted(range(teams), key=lambda team: (-wins[team], -strengths[team]))[:4]
+            final_venue = int(rng.integers(teams))
+            winner_1, loser_1 = play(top[0], top[1], final_venue)
+            winner_e, _ = play(top[2], top[3], final_venue)
+            winner_2, _ = play(loser_1, winner_e, final_venue)
+            play(winner_1, winner_2, final_venue)
+        return rows, deliveries
+
+    def write(self, directory):
+        """
+        matches.csv and deliveries.csv of all seasons, deliveries are appended season by season
+        :param directory:
+        :return: number of matches, number of deliveries
+        """
+        os.makedirs(directory, exist_ok=True)
+        matches_path = os.path.join(directory, 'matches.csv')
+        deliveries_path = os.path.join(directory, 'deliveries.csv')
+        matches = deliveries = 0
+        for number, year in enumerate(range(self.start_year, self.start_year + self.seasons)):
+            rows, columns = self.season(year, matches + 1)
+            pd.DataFrame(rows, columns=MATCH_COLUMNS).to_csv(
+                matches_path, mode='a' if number else 'w', header=not number, index=False)
+            season_deliveries = pd.DataFrame({column: np.concatenate([part[column] for part in columns])
+                                              for column in DELIVERY_COLUMNS}) if columns else pd.DataFrame(
+                columns=DELIVERY_COLUMNS)
+            season_deliveries.to_csv(deliveries_path, mode='a' if number else 'w', header=not number, index=False)
+            matches += len(rows)
+            deliveries += len(season_deliveries)
+        return matches, deliveries
@@ -0,0 +1,47 @@
+import os
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.test.runner import DiscoverRunner
+
+from season.dataset_snapshot import restore_dataset
+from season.db_pool import close_pools
+from season.models import SeasonMatch
+
+
+class DatasetTestRunner(DiscoverRunner):
+    """
+    test databases get the data set of TEST_DATASET snapshot (dump_dataset) right after migrate instead of an
+    import of csv files. test databases kept by --keepdb are restored only once. tests start with empty database
+    when TEST_DATASET is not set
+    """
+    def setup_databases(self, **kwargs):
+        """
+
+        :param kwargs:
+        :return:
+        """
+        path = getattr(settings, 'TEST_DATASET', None)
+        if path and not os.path.isfile(path):
+            # checked before test databases are created
+            raise ImproperlyConfigured(f'TEST_DATASET snapshot {path} not found, write it by '
+                                       f'python manage.py dump_dataset --output {path} or unset test_dataset')
+        old_config = super().setup_databases(**kwargs)
+        if path:
+            for connection, _, _ in old_config:
+                if not SeasonMatch.objects.using(connection.alias).exists():
+                    restore_dataset(path, using=connection.alias)
+        return old_config
+
+    def teardown_databases(self, old_config, **kwargs):
+        """
+        idle pooled connections (pooled db engine) are closed first, test databases can not be dropped while
+        connections are open
+        :param old_config:
+        :param kwargs:
+        :return:
+        """
+        for connection, _, _ in old_config:
+            connection.close()
+            close_pools(connection.alias)
+        super().teardown_databases(old_config, **kwargs)
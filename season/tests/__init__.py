@@ -0,0 +1,41 @@
+import os
+
+from django.test import TestCase
+
+from season.import_raw_data import InitialDataProcessor
+from season.registry import season_registry
+from season.result_cache import stats_result_cache
+
+# tiny data set of seasons 2031 and 2032, clear of bundled seasons and match ids. test database may have the
+# bundled data set too (TEST_DATASET), tests read these seasons only
+SEASONS = (2031, 2032)
+DATA_DIR = os.path.join(os.path.dirname(__file__), 'data')
+MATCHES_CSV = os.path.join(DATA_DIR, 'matches.csv')
+DELIVERIES_CSV = os.path.join(DATA_DIR, 'deliveries.csv')
+
+
+def import_fixture(matches_path=MATCHES_CSV, deliveries_path=DELIVERIES_CSV, **kwargs):
+    """
+    import test data set the way import_season command does
+    :param matches_path:
+    :param deliveries_path:
+    :param kwargs: InitialDataProcessor arguments
+    :return:
+    """
+    processor = InitialDataProcessor(matches_path, deliveries_path, **kwargs)
+    processor.transform_input_save()
+    return processor
+
+
+class SeasonDataTestCase(TestCase):
+    """
+    test data set imported once per test case class
+    """
+    @classmethod
+    def setUpTestData(cls):
+        import_fixture()
+
+    def setUp(self):
+        # in process caches outlive rolled back test transactions
+        stats_result_cache.clear()
+        season_registry.invalidate()
@@ -0,0 +1,83 @@
+from django.test import TransactionTestCase
+
+from season.registry import season_registry
+from season.result_cache import stats_result_cache
+from season.tests import import_fixture, SeasonDataTestCase
+
+
+class StatsRouteTest(SeasonDataTestCase):
+    """
+    stats urls of single season and of several seasons
+    """
+    url = '/api/season/stats/'
+
+    def get(self, path, **headers):
+        """
+
+        :param path: stats url path
+        :param headers: request headers
+        :return:
+        """
+        return self.client.get(f'{self.url}{path}', HTTP_ACCEPT='application/json', **headers)
+
+    def test_bare_year(self):
+        # not routed as action of several seasons
+        for path in ['2031/', 'unknown/?years=2031']:
+            self.assertEqual(self.get(path).status_code, 404, path)
+        self.assertEqual(self.get('most_toss/?years=2031').status_code, 200)
+
+
+class AsyncStatsRouteTest(TransactionTestCase):
+    """
+    same urls of async views, their queries run on worker thread connections so test data set is committed
+    """
+    url = '/api/season/async/stats/'
+    get = StatsRouteTest.get
+    test_bare_year = StatsRouteTest.test_bare_year
+
+    def setUp(self):
+        import_fixture()
+        stats_result_cache.clear()
+        season_registry.invalidate()
+
+
+class ConditionalStatsTest(SeasonDataTestCase):
+    """
+    ETag / Last-Modified validators of stats responses
+    """
+    url = '/api/season/stats/'
+    get = StatsRouteTest.get
+
+    def test_not_modified(self):
+        response = self.get('2031/most_toss/')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.has_header('ETag'))
+        self.assertTrue(response.has_header('Last-Modified'))
+        not_modified = self.get('2031/most_toss/', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(not_modified['ETag'], response['ETag'])
+        other = self.get('2032/most_toss/', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(other.status_code, 200)
+        self.assertNotEqual(other['ETag'], response['ETag'])
+
+    def test_error_without_validators(self):
+        for path in ['1999/most_toss/', 'most_toss/?years=1999-2031', '2031/most_toss/?top=0']:
+            response = self.get(path)
+            self.assertEqual(response.status_code, 400, path)
+            self.assertFalse(response.has_header('ETag'), path)
+            self.assertFalse(response.has_header('Last-Modified'), path)
+
+
+class AsyncConditionalStatsTest(TransactionTestCase):
+    """
+    same validators of async views, their queries run on worker thread connections so test data set is committed
+    """
+    url = '/api/season/async/stats/'
+    get = StatsRouteTest.get
+    test_not_modified = ConditionalStatsTest.test_not_modified
+    test_error_without_validators = ConditionalStatsTest.test_error_without_validators
+
+    def setUp(self):
+        import_fixture()
+        stats_result_cache.clear()
+        season_registry.invalidate()
@@ -0,0 +1,101 @@
+import json
+import os
+import tempfile
+import zipfile
+from unittest import mock
+
+from django.core.exceptions import ImproperlyConfigured
+from django.test import SimpleTestCase
+from django.test.runner import DiscoverRunner
+
+from season.dataset_snapshot import (dump_dataset, flush_tables, MANIFEST, restore_dataset, snapshot_models,
+                                     SnapshotError)
+from season.models import SeasonMatch, SeasonTeamPlay
+from season.registry import dataset_version
+from season.test_runner import DatasetTestRunner
+from season.tests import SeasonDataTestCase, SEASONS
+
+
+def table_counts():
+    """
+
+    :return: table label -> rows of every snapshot table
+    """
+    return {model._meta.label_lower: model.objects.count() for model in snapshot_models()}
+
+
+def season_rows():
+    """
+    matches and deliveries of test seasons as stored
+    :return:
+    """
+    return (list(SeasonMatch.objects.filter(season__year__in=SEASONS).order_by('pk').values()),
+            list(SeasonTeamPlay.objects.filter(season__year__in=SEASONS).order_by('pk').values()))
+
+
+class DatasetSnapshotTest(SeasonDataTestCase):
+    """
+    snapshot of dump_dataset restored by restore_dataset: same rows, new data set version
+    """
+    def setUp(self):
+        super().setUp()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        self.path = os.path.join(directory.name, 'dataset.zip')
+
+    def test_round_trip(self):
+        counts, rows, version = table_counts(), season_rows(), dataset_version()['version']
+        self.assertEqual(dump_dataset(self.path, batch_size=100), counts)
+        flush_tables([model._meta.db_table for model in snapshot_models()])
+        self.assertEqual(SeasonMatch.objects.count(), 0)
+        self.assertEqual(restore_dataset(self.path, batch_size=100), counts)
+        self.assertEqual(table_counts(), counts)
+        self.assertEqual(season_rows(), rows)
+        self.assertEqual(dataset_version()['version'], version + 1)
+        # restored stats served by api
+        response = self.client.get('/api/season/stats/2031/most_toss/', HTTP_ACCEPT='application/json')
+        self.assertEqual(response.json(), [{'toss_won_by__name': 'Alpha Kings', 'count': 2}])
+
+    def test_replace(self):
+        counts, rows = table_counts(), season_rows()
+        dump_dataset(self.path)
+        SeasonMatch.objects.filter(csv_match_id=990101).delete()
+        version = dataset_version()['version']
+        with self.assertRaisesMessage(SnapshotError, 'restore with replace'):
+            restore_dataset(self.path)
+        self.assertEqual(dataset_version()['version'], version)
+        self.assertFalse(SeasonMatch.objects.filter(csv_match_id=990101).exists())
+        self.assertEqual(restore_dataset(self.path, replace=True), counts)
+        self.assertEqual(season_rows(), rows)
+        self.assertEqual(dataset_version()['version'], version + 1)
+
+    def test_migration_mismatch(self):
+        dump_dataset(self.path)
+        mismatch = os.path.join(self.directory, 'mismatch.zip')
+        with zipfile.ZipFile(self.path) as archive, zipfile.ZipFile(mismatch, 'w') as copy:
+            for name in archive.namelist():
+                content = archive.read(name)
+                if name == MANIFEST:
+                    manifest = json.loads(content)
+                    # dumped before the last season migration
+                    manifest['migrations'] = manifest['migrations'][:-1]
+                    content = json.dumps(manifest)
+                copy.writestr(name, content)
+        flush_tables([model._meta.db_table for model in snapshot_models()])
+        with self.assertRaisesMessage(SnapshotError, 'dump it again'):
+            restore_dataset(mismatch)
+        self.assertEqual(SeasonMatch.objects.count(), 0)
+
+
+class DatasetTestRunnerTest(SimpleTestCase):
+    """
+    missing TEST_DATASET snapshot fails the run before test databases are created
+    """
+    def test_missing_dataset(self):
+        path = os.path.join(tempfile.gettempdir(), 'missing_season_dataset.zip')
+        self.assertFalse(os.path.exists(path))
+        with self.settings(TEST_DATASET=path), mock.patch.object(DiscoverRunner, 'setup_databases') as setup:
+            with self.assertRaisesMessage(ImproperlyConfigured, f'TEST_DATASET snapshot {path} not found'):
+                DatasetTestRunner().setup_databases()
+        setup.assert_not_called()
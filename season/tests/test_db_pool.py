@@ -0,0 +1,136 @@
+import os
+import tempfile
+import threading
+import time
+
+from django.db import OperationalError
+from django.db.utils import ConnectionHandler
+from django.test import SimpleTestCase
+
+from season.db_pool import close_pools, connection_pool, pool_stats
+
+
+class ConnectionPoolTest(SimpleTestCase):
+    """
+    pooled sqlite backend (season.db_pool.sqlite3) on a database file, the local stand-in of pooled postgresql
+    """
+    alias = 'pooled'
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.name = os.path.join(directory.name, 'pool.db')
+        self.addCleanup(close_pools, self.alias)
+
+    def wrapper(self, **pool):
+        """
+        new connection wrapper of the database, every wrapper takes connections from the same pool
+        :param pool: POOL settings
+        :return:
+        """
+        handler = ConnectionHandler({'default': {'ENGINE': 'django.db.backends.dummy'},
+                                     self.alias: {'ENGINE': 'season.db_pool.sqlite3', 'NAME': self.name, 'POOL': pool}})
+        wrapper = handler[self.alias]
+        self.addCleanup(wrapper.close)
+        return wrapper
+
+    def pool(self, wrapper):
+        """
+
+        :param wrapper:
+        :return: pool of the wrapper database
+        """
+        return connection_pool(self.alias, wrapper.get_connection_params())
+
+    def test_reuse(self):
+        wrapper = self.wrapper()
+        wrapper.ensure_connection()
+        connection = wrapper.connection
+        wrapper.close()
+        wrapper.ensure_connection()
+        self.assertIs(wrapper.connection, connection)
+        stats = self.pool(wrapper).stats()
+        self.assertEqual((stats['checkouts'], stats['created'], stats['reused']), (2, 1, 1))
+        self.assertEqual((stats['size'], stats['in_use']), (1, 1))
+
+    def test_exhausted(self):
+        first, second = self.wrapper(MAX_SIZE=1, TIMEOUT=0.05), self.wrapper(MAX_SIZE=1, TIMEOUT=0.05)
+        first.ensure_connection()
+        with self.assertRaises(OperationalError):
+            second.ensure_connection()
+        stats = self.pool(first).stats()
+        self.assertEqual((stats['exhausted'], stats['size'], stats['in_use']), (1, 1, 1))
+
+    def test_wait(self):
+        first, second = self.wrapper(MAX_SIZE=1, TIMEOUT=5), self.wrapper(MAX_SIZE=1, TIMEOUT=5)
+        first.ensure_connection()
+        # connection of first wrapper released by another thread while second one waits
+        releaser = threading.Timer(0.1, first.close)
+        first.inc_thread_sharing()
+        releaser.start()
+        second.ensure_connection()
+        releaser.join()
+        first.dec_thread_sharing()
+        stats = self.pool(second).stats()
+        self.assertEqual((stats['waits'], stats['reused'], stats['exhausted']), (1, 1, 0))
+        self.assertGreaterEqual(stats['wait_ms_max'], 50)
+        self.assertEqual(stats['wait_ms_total'], stats['wait_ms_max'])
+        self.assertIn({'alias': self.alias, 'database': self.name, **stats}, pool_stats())
+
+    def test_failed_ping(self):
+        wrapper = self.wrapper()
+        wrapper.ensure_connection()
+        broken = wrapper.connection
+        wrapper.close()
+        # broken while idle, e.g. db restart
+        broken.close()
+        wrapper.ensure_connection()
+        self.assertIsNot(wrapper.connection, broken)
+        stats = self.pool(wrapper).stats()
+        self.assertEqual((stats['ping_failures'], stats['closed_broken'], stats['created']), (1, 1, 2))
+        self.assertEqual(stats['size'], 1)
+
+    def test_idle_timeout(self):
+        wrapper = self.wrapper(IDLE_TIMEOUT=0.05)
+        wrapper.ensure_connection()
+        idle = wrapper.connection
+        wrapper.close()
+        time.sleep(0.1)
+        wrapper.ensure_connection()
+        self.assertIsNot(wrapper.connection, idle)
+        stats = self.pool(wrapper).stats()
+        self.assertEqual((stats['closed_idle'], stats['created'], stats['size']), (1, 2, 1))
+
+    def test_min_size(self):
+        wrapper = self.wrapper(MIN_SIZE=2, IDLE_TIMEOUT=0)
+        wrapper.ensure_connection()
+        wrapper.close()
+        stats = self.pool(wrapper).stats()
+        # idle connections of MIN_SIZE never expire
+        self.assertEqual((stats['created'], stats['idle'], stats['closed_idle']), (2, 2, 0))
+
+    def test_rollback_on_release(self):
+        wrapper = self.wrapper()
+        with wrapper.cursor() as cursor:
+            cursor.execute('CREATE TABLE delivery (id integer)')
+        wrapper.set_autocommit(False)
+        with wrapper.cursor() as cursor:
+            cursor.execute('INSERT INTO delivery VALUES (1)')
+        connection = wrapper.connection
+        wrapper.close()
+        with wrapper.cursor() as cursor:
+            cursor.execute('SELECT count(*) FROM delivery')
+            self.assertEqual(cursor.fetchone(), (0,))
+        self.assertIs(wrapper.connection, connection)
+
+    def test_close_pools(self):
+        first, second = self.wrapper(), self.wrapper()
+        first.ensure_connection()
+        second.ensure_connection()
+        first.close()
+        close_pools(self.alias)
+        self.assertEqual(self.pool(second).stats()['idle'], 0)
+        # connection in use is closed too and discarded once released
+        second.close()
+        stats = self.pool(second).stats()
+        self.assertEqual((stats['size'], stats['closed_broken']), (0, 1))
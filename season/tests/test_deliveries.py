@@ -0,0 +1,75 @@
+import base64
+import json
+
+from season.models import SeasonTeamPlay
+from season.tests import SeasonDataTestCase
+
+
+def bool_cursor():
+    """
+    cursor of json booleans, int instances in python
+    :return:
+    """
+    return base64.urlsafe_b64encode(json.dumps([True, 1, 1, 1, 1]).encode()).decode()
+
+
+class DeliveryPagesTest(SeasonDataTestCase):
+    """
+    keyset pages of deliveries, ordered by match, inning, over, ball and id
+    """
+    url = '/api/season/deliveries/'
+
+    def get(self, url, status_code=200):
+        """
+
+        :param url: deliveries url
+        :param status_code: expected status code
+        :return: response data
+        """
+        response = self.client.get(url, HTTP_ACCEPT='application/json')
+        self.assertEqual(response.status_code, status_code, url)
+        return response.json()
+
+    def pages(self, limit):
+        """
+        every page of season 2031 following next urls
+        :param limit: page size
+        :return: delivery ids of every page
+        """
+        pages, url = list(), f'{self.url}?season=2031&limit={limit}'
+        while url:
+            page = self.get(url)
+            self.assertLessEqual(len(page['results']), limit)
+            pages.append([record['id'] for record in page['results']])
+            url = page['next']
+        return pages
+
+    def ordered_ids(self):
+        """
+
+        :return: delivery ids of season 2031 in key order
+        """
+        return list(SeasonTeamPlay.objects.filter(season__year=2031).order_by(
+            'match__csv_match_id', 'inning', 'over', 'ball', 'id').values_list('id', flat=True))
+
+    def test_pages(self):
+        ids = self.ordered_ids()
+        self.assertEqual(self.pages(len(ids) + 1), [ids])
+        for limit in [1, 2, 3]:
+            pages = self.pages(limit)
+            self.assertEqual(sum(pages, []), ids, limit)
+            self.assertTrue(all(pages), limit)
+
+    def test_repeated_ball(self):
+        # csv files may repeat a ball number of an over, id keeps both deliveries in order
+        play = SeasonTeamPlay.objects.get(match__csv_match_id=990001, inning=1, over=1, ball=3)
+        play.pk = None
+        play.save()
+        ids = self.ordered_ids()
+        self.assertIn(play.pk, ids)
+        for limit in [1, 2]:
+            self.assertEqual(sum(self.pages(limit), []), ids, limit)
+
+    def test_invalid_cursor(self):
+        for cursor in ['x', bool_cursor(), base64.urlsafe_b64encode(b'[1, 1, 1, 1]').decode()]:
+            self.get(f'{self.url}?season=2031&cursor={cursor}', status_code=400)
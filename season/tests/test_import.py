@@ -0,0 +1,243 @@
+import os
+import pickle
+import tempfile
+from concurrent.futures import Future
+from io import StringIO
+from unittest import mock, skipUnless
+
+import pandas as pd
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+
+from season import import_raw_data
+from season.import_raw_data import DISMISSAL_KIND_MAPPER, InitialDataProcessor
+from season.models import DismissalKind, SeasonMatch, SeasonStatsSnapshot, SeasonTeamPlay, TeamSeasonLedger, WonBy
+from season.registry import bump_dataset_version, season_registry
+from season.result_cache import stats_result_cache
+from season.tests import DELIVERIES_CSV, import_fixture, MATCHES_CSV, SeasonDataTestCase, SEASONS
+
+
+def imported_deliveries():
+    """
+    dismissal kind of every imported delivery by csv key
+    :return:
+    """
+    deliveries = SeasonTeamPlay.objects.filter(season__year__in=SEASONS)
+    return {(match, inning, over, ball): kind for match, inning, over, ball, kind in deliveries.values_list(
+        'match__csv_match_id', 'inning', 'over', 'ball', 'dismissal_kind')}
+
+
+def csv_deliveries():
+    """
+    dismissal kind of every delivery of test data set by csv key
+    :return:
+    """
+    deliveries = pd.read_csv(DELIVERIES_CSV, dtype={'dismissal_kind': str})
+    return {(row.match_id, row.inning, row.over, row.ball): DISMISSAL_KIND_MAPPER.get(
+        row.dismissal_kind, DismissalKind.NOT_OUT.value) for row in deliveries.itertuples()}
+
+
+def season_counts():
+    """
+    matches, deliveries and team season ledger of test data set
+    :return:
+    """
+    seasons = {'season__year__in': SEASONS}
+    return (SeasonMatch.objects.filter(**seasons).count(), SeasonTeamPlay.objects.filter(**seasons).count(),
+            sorted(TeamSeasonLedger.objects.filter(**seasons).values_list('season__year', 'team__name', 'matches',
+                                                                          'wins', 'wickets')))
+
+
+def import_season(*args, matches=MATCHES_CSV):
+    """
+
+    :param args: import_season command arguments
+    :param matches: matches csv path
+    :return: command output
+    """
+    out = StringIO()
+    call_command('import_season', '--matches', matches, '--deliveries', DELIVERIES_CSV, *args, stdout=out)
+    return out.getvalue()
+
+
+class InitialDataProcessorTest(SeasonDataTestCase):
+    """
+    csv data set translated into matches and deliveries
+    """
+    def test_matches(self):
+        self.assertEqual(SeasonMatch.objects.filter(season__year=2031).count(), 5)
+        match = SeasonMatch.objects.get(csv_match_id=990003)
+        self.assertEqual(match.winner.name, 'Gamma Giants')
+        self.assertEqual((match.won_by, match.score), (WonBy.WICKETS.value, 7))
+        self.assertEqual(match.venue.name, 'Alpha Ground, North End')
+        self.assertEqual(match.venue.city.name, 'Alpha City')
+        self.assertIsNone(match.umpire_3)
+        no_result = SeasonMatch.objects.get(csv_match_id=990005)
+        self.assertIsNone(no_result.winner)
+        self.assertIsNone(no_result.man_of_match)
+
+    def test_deliveries(self):
+        self.assertEqual(SeasonTeamPlay.objects.filter(season__year__in=SEASONS).count(),
+                         len(pd.read_csv(DELIVERIES_CSV)))
+        play = SeasonTeamPlay.objects.get(match__csv_match_id=990001, inning=1, over=1, ball=3)
+        self.assertEqual(play.season.year, 2031)
+        self.assertEqual((play.batting_by.name, play.bowling_by.name), ('Alpha Kings', 'Beta Riders'))
+        self.assertEqual(play.dismissal_kind, DismissalKind.CAUGHT.value)
+        self.assertEqual((play.dismissed.name, play.fielder.name), ('Player A2', 'Player B1'))
+        not_out = SeasonTeamPlay.objects.get(match__csv_match_id=990001, inning=2, over=1, ball=1)
+        self.assertEqual(not_out.dismissal_kind, DismissalKind.NOT_OUT.value)
+        self.assertIsNone(not_out.dismissed)
+        self.assertEqual((not_out.wide_runs, not_out.extra_runs), (1, 1))
+        self.assertTrue(SeasonTeamPlay.objects.get(match__csv_match_id=990101, inning=2).is_super_over)
+
+
+class ChunkedImportTest(TestCase):
+    """
+    streaming mode gives the same data as reading whole deliveries csv
+    """
+    def test_tiny_chunks(self):
+        # first chunk has no dismissal at all, its text columns are empty
+        import_fixture(chunk_size=2)
+        self.assertEqual(imported_deliveries(), csv_deliveries())
+        wickets = dict(TeamSeasonLedger.objects.filter(season__year=2031, wickets__gt=0).values_list(
+            'team__name', 'wickets'))
+        self.assertEqual(wickets, {'Alpha Kings': 1, 'Beta Riders': 1, 'Gamma Giants': 2})
+
+    def test_whole_file(self):
+        import_fixture()
+        self.assertEqual(imported_deliveries(), csv_deliveries())
+
+
+class ImportSeasonCommandTest(TestCase):
+    """
+    import_season is safe to rerun, only new seasons / matches are inserted
+    """
+    def test_rerun(self):
+        import_season()
+        imported = season_counts()
+        self.assertEqual(imported[:2], (6, len(csv_deliveries())))
+        output = import_season()
+        self.assertIn('Season 2031: 0 new matches imported', output)
+        self.assertIn('Season 2032: 0 new matches imported', output)
+        self.assertEqual(season_counts(), imported)
+        self.assertEqual(imported_deliveries(), csv_deliveries())
+
+    def test_new_season(self):
+        self.assertIn('Season 2031: 5 new matches imported', import_season('--season', '2031'))
+        self.assertFalse(SeasonMatch.objects.filter(season__year=2032).exists())
+        output = import_season('--chunk-size', '3')
+        self.assertIn('Season 2031: 0 new matches imported', output)
+        self.assertIn('Season 2032: 1 new matches imported', output)
+        self.assertEqual(imported_deliveries(), csv_deliveries())
+        self.assertTrue(SeasonStatsSnapshot.objects.filter(year=2032).exists())
+
+    def test_top_up_season(self):
+        stats_result_cache.clear()
+        season_registry.invalidate()
+        url = '/api/season/stats/2031/get_top_4_teams/'
+        with tempfile.TemporaryDirectory() as directory:
+            # season 2031 imported without match 990004 (won by Beta Riders)
+            matches = os.path.join(directory, 'matches.csv')
+            matches_df = pd.read_csv(MATCHES_CSV)
+            matches_df[matches_df.id != 990004].to_csv(matches, index=False)
+            import_season(matches=matches)
+        old = self.client.get(url, HTTP_ACCEPT='application/json')
+        self.assertNotIn('Beta Riders', {record['winner__name'] for record in old.json()})
+        responses = list()
+
+        def bump():
+            # request served right after new data set version is visible
+            bump_dataset_version()
+            responses.append(self.client.get(url, HTTP_ACCEPT='application/json'))
+
+        with mock.patch.object(import_raw_data, 'bump_dataset_version', bump):
+            self.assertIn('Season 2031: 1 new matches imported', import_season())
+        self.assertEqual(SeasonStatsSnapshot.objects.get(year=2031).stats, SeasonStatsSnapshot.compute(2031))
+        new = self.client.get(url, HTTP_ACCEPT='application/json')
+        self.assertEqual(len(responses), 1)
+        for response in responses + [new]:
+            self.assertNotEqual(response['ETag'], old['ETag'])
+            self.assertIn('Beta Riders', {record['winner__name'] for record in response.json()})
+        self.assertEqual(new['ETag'], responses[0]['ETag'])
+
+
+class InlineProcessPool:
+    """
+    process pool stand-in running jobs in this process one by one (test database is not visible to other
+    processes), arguments and results are pickled as by a process pool
+    """
+    def __init__(self, max_workers=None, initializer=None):
+        """
+
+        :param max_workers:
+        :param initializer:
+        """
+        initializer()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    @staticmethod
+    def submit(func, *args):
+        """
+
+        :param func: job function
+        :param args: job arguments
+        :return: done future
+        """
+        future = Future()
+        future.set_result(pickle.loads(pickle.dumps(func(*pickle.loads(pickle.dumps(args))))))
+        return future
+
+
+class SeasonDeliveriesTest(TestCase):
+    """
+    deliveries split by season for parallel import workers
+    """
+    def test_split(self):
+        processor = InitialDataProcessor(MATCHES_CSV, DELIVERIES_CSV, chunk_size=4)
+        with tempfile.TemporaryDirectory() as directory:
+            deliveries = {year: pd.read_csv(path) for year, path in processor.season_deliveries(
+                [2031, 2032], directory).items()}
+        self.assertEqual(sorted(deliveries[2031].match_id.unique()), [990001, 990002, 990003, 990004])
+        self.assertEqual(deliveries[2032].match_id.tolist(), [990101, 990101])
+        self.assertEqual(sum(len(deliveries_df) for deliveries_df in deliveries.values()), len(csv_deliveries()))
+
+
+class ParallelImportTest(TransactionTestCase):
+    """
+    import_season --workers gives the same data as serial import. seasons are committed by worker processes, test
+    data set is committed too
+    """
+    def parallel_import(self, *args):
+        """
+        serial import is undone and test data set imported again by workers
+        :param args: import_season command arguments
+        :return: counts of serial and parallel import
+        """
+        import_season()
+        imported = season_counts(), imported_deliveries()
+        SeasonMatch.objects.filter(season__year__in=SEASONS).delete()
+        TeamSeasonLedger.objects.filter(season__year__in=SEASONS).delete()
+        self.assertEqual(season_counts(), (0, 0, []))
+        output = import_season('--workers', '2', *args)
+        self.assertIn('Season 2031: 5 new matches imported', output)
+        self.assertIn('Season 2032: 1 new matches imported', output)
+        return imported, (season_counts(), imported_deliveries())
+
+    def test_patched_pool(self):
+        # sqlite test database is in memory of this process, jobs run in process by pool stand-in
+        with mock.patch('season.import_raw_data.ProcessPoolExecutor', InlineProcessPool), \
+                mock.patch('season.management.commands.import_season.connection', mock.Mock(vendor='postgresql')):
+            serial, parallel = self.parallel_import('--chunk-size', '3')
+        self.assertEqual(parallel, serial)
+        self.assertEqual(serial[1], csv_deliveries())
+
+    @skipUnless(connection.vendor == 'postgresql', 'concurrent writers need postgres')
+    def test_process_pool(self):
+        serial, parallel = self.parallel_import('--chunk-size', '3')
+        self.assertEqual(parallel, serial)
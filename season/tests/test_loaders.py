@@ -0,0 +1,125 @@
+import csv
+import io
+import re
+from unittest import mock, skipUnless
+
+from django.db import connection
+from django.db.backends.utils import CursorWrapper
+from django.test import SimpleTestCase, TestCase
+
+from season.import_raw_data import DELIVERY_FIELDS
+from season.loaders import get_loader, PostgresCopyLoader
+from season.models import Player, SeasonMatch, SeasonTeamPlay
+from season.tests import import_fixture, SEASONS
+from season.tests.test_import import csv_deliveries, imported_deliveries
+
+COPY_STATEMENT = re.compile(r'COPY (\S+) \((.*)\) FROM STDIN WITH \(FORMAT csv(?:, FORCE_NOT_NULL \((.*)\))?\)$')
+# quoted field (quotes doubled inside) or unquoted field up to delimiter / end of line
+COPY_FIELD = re.compile(r'"((?:[^"]|"")*)"|([^,\r\n]*)')
+
+
+class PostgresCopyLoaderTest(SimpleTestCase):
+    """
+    csv sent by COPY, postgres itself is not needed
+    """
+    def test_csv_buffer(self):
+        rows = [
+            (1, None, 'Player "Q" Quote', True),
+            (2, '', 'North\nEnd', False),
+            (3, 'Bay, Oval', 'Carriage\rReturn', None),
+        ]
+        text = PostgresCopyLoader.csv_buffer(rows).read()
+        self.assertEqual(text, '1,,"Player ""Q"" Quote",True\r\n'
+                               '2,,"North\nEnd",False\r\n'
+                               '3,"Bay, Oval","Carriage\rReturn",\r\n')
+        # NULL is unquoted empty field, every value is read back as written
+        parsed = list(csv.reader(io.StringIO(text, newline='')))
+        self.assertEqual(parsed, [[str(value) if value is not None else '' for value in row] for row in rows])
+
+    def test_copy_statement(self):
+        loader = PostgresCopyLoader()
+        self.assertEqual(loader.copy_statement(Player, ['id', 'name']),
+                         'COPY "season_player" ("id", "name") FROM STDIN WITH (FORMAT csv, FORCE_NOT_NULL ("name"))')
+        statement = loader.copy_statement(SeasonTeamPlay, DELIVERY_FIELDS)
+        self.assertTrue(statement.endswith('FROM STDIN WITH (FORMAT csv)'))
+        self.assertIn('"batting_by_id"', statement)
+
+
+def read_copy_csv(text):
+    """
+    records of csv as postgres COPY reads them: unquoted empty field is None, quoted empty field is empty string
+    :param text:
+    :return:
+    """
+    records, record, position = list(), list(), 0
+    while position < len(text):
+        field = COPY_FIELD.match(text, position)
+        quoted, unquoted = field.groups()
+        record.append(quoted.replace('""', '"') if quoted is not None else unquoted or None)
+        position = field.end()
+        if text.startswith(',', position):
+            position += 1
+        else:
+            # record ends at line terminator
+            assert text.startswith('\r\n', position), text[position:position + 10]
+            records.append(record)
+            record, position = list(), position + 2
+    return records
+
+
+def copy_expert(cursor, sql, file):
+    """
+    COPY FROM STDIN stand-in of sqlite cursor, rows read from csv file the way postgres does are inserted
+    :param cursor:
+    :param sql: COPY statement of PostgresCopyLoader
+    :param file: csv buffer
+    :return:
+    """
+    table, columns, not_null = COPY_STATEMENT.match(sql).groups()
+    columns = columns.split(', ')
+    not_null = [columns.index(column) for column in not_null.split(', ')] if not_null else []
+    rows = list()
+    for record in read_copy_csv(file.read()):
+        for index in not_null:
+            record[index] = '' if record[index] is None else record[index]
+        rows.append([{'True': True, 'False': False}.get(value, value) for value in record])
+    placeholders = ', '.join(['%s'] * len(columns))
+    cursor.executemany(f'INSERT INTO {table} ({", ".join(columns)}) VALUES ({placeholders})', rows)
+
+
+class CopyImportTest(TestCase):
+    """
+    test data set imported through COPY csv buffers of PostgresCopyLoader: every value, NULL and empty string
+    has to be read back as imported by default loader
+    """
+    def test_copy_import(self):
+        import_fixture()
+        expected = csv_deliveries()
+        matches = SeasonMatch.objects.filter(season__year__in=SEASONS)
+        imported = list(matches.order_by('csv_match_id').values_list(
+            'csv_match_id', 'date', 'winner__name', 'won_by', 'score', 'man_of_match__name', 'umpire_3__name'))
+        matches.delete()
+        with mock.patch.object(CursorWrapper, 'copy_expert', copy_expert, create=True):
+            import_fixture(loader=PostgresCopyLoader(batch_size=4))
+        self.assertEqual(imported_deliveries(), expected)
+        self.assertEqual(list(matches.order_by('csv_match_id').values_list(
+            'csv_match_id', 'date', 'winner__name', 'won_by', 'score', 'man_of_match__name', 'umpire_3__name')),
+            imported)
+        not_out = SeasonTeamPlay.objects.filter(season__year=2031, dismissed__isnull=True).first()
+        self.assertIsNone(not_out.fielder_id)
+
+    def test_read_copy_csv(self):
+        text = '1,,""\r\n2,"Bay, ""Oval""","North\r\nEnd"\r\n'
+        self.assertEqual(read_copy_csv(text), [['1', None, ''], ['2', 'Bay, "Oval"', 'North\r\nEnd']])
+
+
+@skipUnless(connection.vendor == 'postgresql', 'COPY needs postgres')
+class PostgresCopyTest(TestCase):
+    """
+    test data set imported by COPY of postgres itself
+    """
+    def test_copy_import(self):
+        self.assertIsInstance(get_loader(), PostgresCopyLoader)
+        import_fixture()
+        self.assertEqual(imported_deliveries(), csv_deliveries())
+        self.assertEqual(SeasonMatch.objects.filter(season__year__in=SEASONS, winner__isnull=True).count(), 1)
@@ -0,0 +1,114 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+
+from season.metrics import metrics_registry, RETIRED_FILE
+from season.tests import SeasonDataTestCase
+
+OPERATOR_URLS = ['/api/season/metrics/', '/api/season/stats-cache/', '/api/season/db-pool/']
+
+
+def exited_pid():
+    """
+    pid of a process which already exited
+    :return:
+    """
+    process = subprocess.Popen([sys.executable, '-c', ''])
+    process.wait()
+    return process.pid
+
+
+class OperatorEndPointsTest(TestCase):
+    """
+    worker process internals for staff users and monitoring token only
+    """
+    def test_anonymous(self):
+        for url in OPERATOR_URLS:
+            self.assertEqual(self.client.get(url).status_code, 403, url)
+
+    def test_staff(self):
+        self.client.force_login(User.objects.create_user('operator', is_staff=True))
+        for url in OPERATOR_URLS:
+            self.assertEqual(self.client.get(url).status_code, 200, url)
+        self.client.force_login(User.objects.create_user('user'))
+        for url in OPERATOR_URLS:
+            self.assertEqual(self.client.get(url).status_code, 403, url)
+
+    def test_token(self):
+        with self.settings(METRICS_TOKEN='secret'):
+            for url in OPERATOR_URLS:
+                self.assertEqual(self.client.get(url, HTTP_AUTHORIZATION='Bearer secret').status_code, 200, url)
+                self.assertEqual(self.client.get(url, HTTP_AUTHORIZATION='Bearer other').status_code, 403, url)
+        self.assertEqual(self.client.get(OPERATOR_URLS[0], HTTP_AUTHORIZATION='Bearer None').status_code, 403)
+
+
+class RequestMetricsTest(SeasonDataTestCase):
+    """
+    requests are counted by stats action
+    """
+    def setUp(self):
+        super().setUp()
+        metrics_registry.reset()
+
+    def test_action_label(self):
+        self.client.get('/api/season/stats/most_toss/?years=2031-2032')
+        self.client.get('/api/season/stats/2031/get_top_4_teams/')
+        self.client.get('/api/season/stats/unknown_action/?years=2031')
+        samples = metrics_registry.collect()
+        requests = {labels: value for (name, labels), value in samples.items() if name == 'season_requests_total'}
+        self.assertEqual(requests, {
+            (('action', 'most_toss'), ('status', '200')): 1,
+            (('action', 'get_top_4_teams'), ('status', '200')): 1,
+            # unknown actions are not routed, no label of their own
+            (('action', 'unresolved'), ('status', '404')): 1,
+        })
+
+
+class MetricsDirectoryTest(TestCase):
+    """
+    multiprocess mode, metrics of every worker process written to shared directory
+    """
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        settings = self.settings(METRICS_DIR=self.directory)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        metrics_registry.reset()
+
+    def write(self, name, value):
+        """
+        metrics file of another worker process
+        :param name: file name
+        :param value: requests counted by the worker
+        :return:
+        """
+        with open(os.path.join(self.directory, name), 'w') as metrics_file:
+            json.dump([['season_requests_total', [['action', 'most_toss'], ['status', '200']], value]], metrics_file)
+
+    def requests(self):
+        """
+        most_toss requests of every worker process
+        :return:
+        """
+        samples = metrics_registry.read_directory()
+        return samples.get(('season_requests_total', (('action', 'most_toss'), ('status', '200'))))
+
+    def test_exited_workers_retired(self):
+        first, second = exited_pid(), exited_pid()
+        self.write(f'metrics_{first}.json', 3)
+        self.write(f'metrics_{os.getppid()}.json', 5)
+        self.assertEqual(self.requests(), 8)
+        self.assertEqual(sorted(os.listdir(self.directory)), sorted(
+            ['metrics.lock', RETIRED_FILE, f'metrics_{os.getppid()}.json']))
+        # restarted worker exits too, its counts are added to retired ones
+        self.write(f'metrics_{second}.json', 2)
+        self.assertEqual(self.requests(), 10)
+        self.assertNotIn(f'metrics_{second}.json', os.listdir(self.directory))
+        self.assertEqual(self.requests(), 10)
@@ -0,0 +1,133 @@
+import asyncio
+import json
+import re
+import tempfile
+import time
+from unittest import mock
+
+from asgiref.sync import iscoroutinefunction
+from django.contrib.auth.models import User
+from django.db import connection
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase
+from django.test.utils import CaptureQueriesContext
+
+from season.instrumentation import install_query_recorder
+from season.middleware import logger, ProfilingMiddleware, ServerTimingMiddleware, SLOW_REQUEST_QUERIES
+from season.tests import SeasonDataTestCase
+
+# db entry of Server-Timing header
+DB_TIMING = re.compile(r'db;dur=([\d.]+);desc="(\d+) queries"')
+TOTAL_TIMING = re.compile(r'total;dur=([\d.]+)')
+# milliseconds every sql query of slowed down requests takes at least
+QUERY_MS = 20
+
+
+class AsyncMiddlewareTest(SimpleTestCase):
+    """
+    middlewares are awaited by async handler, called directly by sync handler
+    """
+    def test_coroutine_marked(self):
+        async def get_response(request):
+            return HttpResponse('async')
+
+        for middleware_class in [ServerTimingMiddleware, ProfilingMiddleware]:
+            middleware = middleware_class(get_response)
+            # django handlers check with asyncio (django 3.1) or asgiref
+            self.assertTrue(iscoroutinefunction(middleware))
+            self.assertTrue(asyncio.iscoroutinefunction(middleware))
+            response = asyncio.run(middleware(RequestFactory().get('/admin/')))
+            self.assertEqual(response.content, b'async')
+            self.assertFalse(iscoroutinefunction(middleware_class(lambda request: HttpResponse())))
+
+
+class ProfilingMiddlewareTest(SeasonDataTestCase):
+    """
+    profiled responses of staff users are not shared with other requests
+    """
+    def setUp(self):
+        super().setUp()
+        profile_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(profile_dir.cleanup)
+        settings = self.settings(PROFILING_ENABLED=True, PROFILE_DIR=profile_dir.name)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.client.force_login(User.objects.create_user('staff', is_staff=True))
+
+    def test_not_cached(self):
+        for path, headers in [('?profile=1', {}), ('', {'HTTP_X_PROFILE': 'return'})]:
+            response = self.client.get(f'/api/season/stats/2031/most_toss/{path}', HTTP_ACCEPT='application/json',
+                                       **headers)
+            self.assertEqual(response.status_code, 200)
+            self.assertTrue(response.has_header('X-Profile-Id'))
+            cache_control = {value.strip() for value in response['Cache-Control'].split(',')}
+            self.assertTrue({'private', 'no-store'} <= cache_control)
+            self.assertNotIn('public', cache_control)
+            self.assertTrue({'X-Profile', 'Cookie'} <= {value.strip() for value in response['Vary'].split(',')})
+
+    def test_not_profiled(self):
+        response = self.client.get('/api/season/stats/2031/most_toss/', HTTP_ACCEPT='application/json')
+        self.assertFalse(response.has_header('X-Profile-Id'))
+        self.assertIn('public', response['Cache-Control'])
+
+
+def slow_query(execute, sql, params, many, context):
+    """
+    execute wrapper slowing down every sql query by QUERY_MS
+    :param execute:
+    :param sql:
+    :param params:
+    :param many:
+    :param context:
+    :return:
+    """
+    time.sleep(QUERY_MS / 1000)
+    return execute(sql, params, many, context)
+
+
+class ServerTimingMiddlewareTest(SeasonDataTestCase):
+    """
+    Server-Timing header carries sql query count and db time of the request, slow requests are logged
+    """
+    path = '/api/season/stats/2031/most_toss/'
+
+    def get(self):
+        """
+        request with every sql query slowed down, query recorder of the request wraps the slowing wrapper
+        :return: response, queries executed
+        """
+        install_query_recorder(connection)
+        with connection.execute_wrapper(slow_query), CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.path, HTTP_ACCEPT='application/json')
+        self.assertEqual(response.status_code, 200)
+        return response, len(queries)
+
+    def test_server_timing(self):
+        response, queries = self.get()
+        self.assertGreater(queries, 0)
+        db_ms, count = DB_TIMING.search(response['Server-Timing']).groups()
+        self.assertEqual(int(count), queries)
+        total_ms = float(TOTAL_TIMING.search(response['Server-Timing']).group(1))
+        self.assertGreaterEqual(float(db_ms), queries * QUERY_MS)
+        self.assertLessEqual(float(db_ms), total_ms)
+        # result served from cache, fewer queries
+        with CaptureQueriesContext(connection) as cached:
+            response = self.client.get(self.path, HTTP_ACCEPT='application/json')
+        self.assertLess(len(cached), queries)
+        self.assertEqual(int(DB_TIMING.search(response['Server-Timing']).group(2)), len(cached))
+        self.assertFalse(self.client.get('/admin/login/').has_header('Server-Timing'))
+
+    def test_slow_request(self):
+        with self.settings(SLOW_REQUEST_MS=QUERY_MS), self.assertLogs(logger, 'WARNING') as logs:
+            queries = self.get()[1]
+        self.assertEqual(len(logs.records), 1)
+        log = json.loads(logs.records[0].args[0])
+        self.assertEqual((log['path'], log['status'], log['queries']), (self.path, 200, queries))
+        self.assertGreaterEqual(log['total_ms'], QUERY_MS)
+        self.assertEqual(len(log['slowest_queries']), min(queries, SLOW_REQUEST_QUERIES))
+        self.assertGreaterEqual(log['slowest_queries'][0]['ms'], QUERY_MS)
+
+    def test_fast_request(self):
+        with self.settings(SLOW_REQUEST_MS=60000), mock.patch.object(logger, 'warning') as warning:
+            self.get()
+        warning.assert_not_called()
@@ -0,0 +1,39 @@
+from django.db.models import F
+from django.test import TestCase
+
+from season.models import DatasetVersion, Season
+from season.registry import bump_dataset_version, dataset_version, season_registry
+
+
+class SeasonRegistryTest(TestCase):
+    """
+    season years kept in process per data set version
+    """
+    def setUp(self):
+        season_registry.invalidate()
+        bump_dataset_version()
+        Season.objects.bulk_create([Season(year=2031), Season(year=2032)])
+        bump_dataset_version()
+
+    def test_loaded_once_per_version(self):
+        version = dataset_version()['version']
+        with self.assertNumQueries(1):
+            self.assertTrue({2031, 2032} <= season_registry.years_of(version))
+        with self.assertNumQueries(0):
+            self.assertIn(2031, season_registry.years_of(version))
+
+    def test_reloaded_on_new_version(self):
+        self.assertNotIn(2033, season_registry)
+        # season imported by another process: no signal, no invalidation of this registry
+        Season.objects.bulk_create([Season(year=2033)])
+        self.assertNotIn(2033, season_registry)
+        DatasetVersion.objects.filter(pk=1).update(version=F('version') + 1)
+        self.assertIn(2033, season_registry)
+        self.assertEqual(season_registry.max_year, 2033)
+
+    def test_season_saved(self):
+        version = dataset_version()['version']
+        self.assertNotIn(2034, season_registry)
+        Season.objects.create(year=2034)
+        self.assertEqual(dataset_version()['version'], version + 1)
+        self.assertIn(2034, season_registry)
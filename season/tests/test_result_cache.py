@@ -0,0 +1,37 @@
+import threading
+
+from season.models import SeasonMatch
+from season.result_cache import StatsResultCache
+from season.tests import SeasonDataTestCase
+
+
+class StatsResultCacheTest(SeasonDataTestCase):
+    """
+    results shared by request threads of the worker process
+    """
+    def test_queryset_evaluated(self):
+        cache = StatsResultCache()
+        result = cache.get_or_compute('highest_run_margin', 2031, 1,
+                                      lambda: SeasonMatch.highest_run_margin(2031))
+        self.assertIsInstance(result, list)
+        with self.assertNumQueries(0):
+            cached = cache.get_or_compute('highest_run_margin', 2031, 1, lambda: self.fail('computed again'))
+        self.assertEqual(cached, [{'winner__name': 'Alpha Kings', 'score': 20},
+                                  {'winner__name': 'Beta Riders', 'score': 20}])
+
+    def test_concurrent_counters(self):
+        cache = StatsResultCache()
+        cache.set_local('hit', [])
+
+        def lookups():
+            for _ in range(1000):
+                cache.get('hit')
+                cache.get('missing')
+        threads = [threading.Thread(target=lookups) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        stats = cache.stats()
+        self.assertEqual((stats['local_hits'], stats['misses']), (8000, 8000))
+        self.assertEqual(stats['hit_ratio'], 0.5)
@@ -0,0 +1,71 @@
+import filecmp
+import os
+import tempfile
+from io import StringIO
+
+import pandas as pd
+from django.core.management import call_command
+from django.db.models import Sum
+from django.test import TestCase
+
+from season.models import MatchResult, SeasonMatch, SeasonStatsSnapshot, SeasonTeamPlay, TeamSeasonLedger
+
+# synthetic seasons, clear of bundled and test data set seasons
+YEARS = [2041, 2042]
+
+
+def generate(directory, seed, seasons=2, teams=4):
+    """
+
+    :param directory: output directory
+    :param seed:
+    :param seasons:
+    :param teams:
+    :return: command output
+    """
+    out = StringIO()
+    call_command('generate_dataset', '--output', directory, '--seasons', str(seasons), '--start-year', str(YEARS[0]),
+                 '--teams', str(teams), '--players', '12', '--umpires', '4', '--seed', str(seed), stdout=out)
+    return out.getvalue()
+
+
+class DatasetGeneratorTest(TestCase):
+    """
+    synthetic csv files: same seed gives same files, files import as bundled csv files do
+    """
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def path(self, *names):
+        """
+
+        :param names:
+        :return: path under test directory
+        """
+        return os.path.join(self.directory, *names)
+
+    def test_same_seed(self):
+        for name, seed in [('first', 7), ('second', 7), ('other', 8)]:
+            generate(self.path(name), seed)
+        for csv_name in ['matches.csv', 'deliveries.csv']:
+            self.assertTrue(filecmp.cmp(self.path('first', csv_name), self.path('second', csv_name), shallow=False))
+            self.assertFalse(filecmp.cmp(self.path('first', csv_name), self.path('other', csv_name), shallow=False))
+
+    def test_import(self):
+        output = generate(self.directory, 7)
+        # double round robin of 4 teams and 4 playoff matches per season
+        matches, deliveries = 2 * (4 * 3 + 4), len(pd.read_csv(self.path('deliveries.csv')))
+        self.assertIn(f'{matches} matches, {deliveries} deliveries written', output)
+        out = StringIO()
+        call_command('import_season', '--matches', self.path('matches.csv'), '--deliveries',
+                     self.path('deliveries.csv'), '--chunk-size', '1000', stdout=out)
+        for year in YEARS:
+            self.assertIn(f'Season {year}: 16 new matches imported', out.getvalue())
+        seasons = {'season__year__in': YEARS}
+        self.assertEqual(SeasonMatch.objects.filter(**seasons).count(), matches)
+        self.assertEqual(SeasonTeamPlay.objects.filter(**seasons).count(), deliveries)
+        wins = SeasonMatch.objects.filter(**seasons, result=MatchResult.NORMAL.value, winner__isnull=False).count()
+        self.assertEqual(TeamSeasonLedger.objects.filter(**seasons).aggregate(wins=Sum('wins'))['wins'], wins)
+        self.assertEqual(SeasonStatsSnapshot.objects.filter(year__in=YEARS).count(), 2)
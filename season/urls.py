@@ -1,7 +1,21 @@
+from django.urls import path
 from rest_framework.routers import SimpleRouter
 
-from season.api_resource.api_view import StatsViewSet
+from season.api_resource import async_view, metrics_view, profile_view
+from season.api_resource.api_view import DbPoolViewSet, StatsCacheViewSet, StatsViewSet
+from season.api_resource.deliveries_view import DeliveryViewSet
 
 router = SimpleRouter()
 router.register(r'stats', StatsViewSet, basename='season')
-urlpatterns = router.urls
+router.register(r'stats-cache', StatsCacheViewSet, basename='stats-cache')
+router.register(r'db-pool', DbPoolViewSet, basename='db-pool')
+router.register(r'deliveries', DeliveryViewSet, basename='deliveries')
+urlpatterns = router.urls + [
+    # async stats views, concurrent queries when served by ASGI server (djangoProject_test.asgi)
+    path('async/stats/<str:year>/<str:action_name>/', async_view.stats_action, name='async-stats'),
+    path('async/stats/<str:action_name>/', async_view.stats_seasons, name='async-stats-seasons'),
+    # Prometheus scrape end point
+    path('metrics/', metrics_view.metrics, name='metrics'),
+    # stored profiles of ?profile= requests, staff only
+    path('profiles/<slug:profile_id>.<str:suffix>', profile_view.profile_file, name='profile-file'),
+]